@@ -1,7 +1,9 @@
-import os, httpx
-from typing import List, Dict
-from ..services.cache import cache
+import os, math
+from typing import List, Dict, Optional
+from ..services.cache import acache
 from ..services.quota import guarded_google_get, QuotaExceeded
+from .paging import PAGE_CONCURRENCY, fetch_pages
+from ..services import http_pool
 
 # Try to import constants from config; if missing, use safe defaults
 try:
@@ -20,36 +22,58 @@ except Exception:
 def google_available() -> bool:
     return bool(os.getenv("GOOGLE_CSE_API_KEY") and os.getenv("GOOGLE_CSE_CX"))
 
-async def search_google_cse(query: str, target_total: int, timeout_s: float = 10.0) -> List[Dict]:
+async def search_google_cse(query: str, target_total: int, timeout_s: float = 10.0,
+                            page_concurrency: int = PAGE_CONCURRENCY) -> List[Dict]:
     if not google_available():
         return []
     key, cx = os.environ["GOOGLE_CSE_API_KEY"], os.environ["GOOGLE_CSE_CX"]
-    to_fetch, start = min(target_total, _G_MAX_TOTAL), 1
+    to_fetch = min(target_total, _G_MAX_TOTAL)
     out: List[Dict] = []
-    async with httpx.AsyncClient(timeout=timeout_s) as client:
-        while len(out) < to_fetch and start <= _G_MAX_TOTAL:
-            num = min(_G_PAGE_SIZE, to_fetch - len(out))
-            cache_key = f"g:{query}:{start}:{num}"
-            data = cache.get(cache_key)
-            if data is None:
-                try:
-                    data = await guarded_google_get(
-                        client,
-                        _G_ENDPOINT,
-                        {"q": query, "key": key, "cx": cx, "num": num, "start": start},
-                    )
-                except QuotaExceeded:
-                    break
-                cache.set(cache_key, data)
-            items = data.get("items") or []
-            for idx, it in enumerate(items, start=1):
-                out.append({
-                    "title": it.get("title") or "",
-                    "url": it.get("link") or "",
-                    "snippet": it.get("snippet") or "",
-                    "source": "google",
-                    "engine_rank": start + (idx - 1),
-                })
-            if not items or len(items) < num: break
-            start += _G_PAGE_SIZE
+    if to_fetch <= 0:
+        return out
+
+    def num_of(i: int) -> int:
+        return min(_G_PAGE_SIZE, to_fetch - i * _G_PAGE_SIZE)
+
+    client = http_pool.client("google")
+    pages = math.ceil(to_fetch / _G_PAGE_SIZE)
+    # every page key of the query in one round-trip; fetched pages are written back together
+    keys = [f"g:{query}:{1 + i * _G_PAGE_SIZE}:{num_of(i)}" for i in range(pages)]
+    cached = await acache.get_many(keys)
+    fresh: Dict[str, Dict] = {}
+
+    async def page(i: int) -> Optional[List[Dict]]:
+        start, num = 1 + i * _G_PAGE_SIZE, num_of(i)
+        cache_key = keys[i]
+        data = cached.get(cache_key)
+        if data is None:
+            try:
+                data = await guarded_google_get(
+                    client,
+                    _G_ENDPOINT,
+                    {"q": query, "key": key, "cx": cx, "num": num, "start": start},
+                    timeout=timeout_s,
+                )
+            except QuotaExceeded:
+                return None
+            # cache only the fields read below, not pagemap/metatags
+            data = {"items": [{f: it.get(f) for f in ("title", "link", "snippet")} for it in data.get("items") or []]}
+            fresh[cache_key] = data
+        return data.get("items") or []
+
+    # every page is known up front (start=1, 11, 21, ...): fetch them together;
+    # a short page means Google has nothing further
+    got = await fetch_pages(page, pages, to_fetch, concurrency=min(page_concurrency, pages),
+                            last_page=lambda i, items: len(items) < num_of(i))
+    await acache.set_many(fresh)
+    for i, items in enumerate(got):
+        start = 1 + i * _G_PAGE_SIZE
+        for idx, it in enumerate(items, start=1):
+            out.append({
+                "title": it.get("title") or "",
+                "url": it.get("link") or "",
+                "snippet": it.get("snippet") or "",
+                "source": "google",
+                "engine_rank": start + (idx - 1),
+            })
     return out
@@ -0,0 +1,84 @@
+import os, asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# Concurrent page fan-out shared by the search connectors.
+# Up to `concurrency` pages are in flight at once; new pages are only issued while
+# the results so far are short of `need` and no empty/failed page has arrived.
+# The returned pages are exactly what serial paging would have kept (in order, up
+# to the first empty/failed/last page or the one that reaches `need`), so ranks
+# derived from the page index stay stable. Likewise a page's error only propagates
+# when serial paging would have requested that page; speculative pages past the
+# end are cancelled and their results or errors ignored.
+
+PAGE_CONCURRENCY = int(os.getenv("SEARCH_PAGE_CONCURRENCY", "4"))
+
+PageFn = Callable[[int], Awaitable[Optional[List[Dict]]]]
+
+
+async def fetch_pages(fetch: PageFn, pages: int, need: int, *, concurrency: int = PAGE_CONCURRENCY,
+                      last_page: Optional[Callable[[int, List[Dict]], bool]] = None) -> List[List[Dict]]:
+    """
+    fetch(i) -> items of page i (0-based), or None when the page failed and paging should stop.
+    `last_page(i, items)` marks a non-empty page after which nothing follows (e.g. a short page).
+    """
+    done: Dict[int, Optional[List[Dict]]] = {}
+    errors: Dict[int, BaseException] = {}
+    running: Dict[asyncio.Task, int] = {}
+    nxt = 0
+
+    def prefix():
+        out, total = [], 0
+        for i in range(pages):
+            if i in errors:
+                raise errors[i]  # serial paging reaches this page too, so its error propagates
+            if i not in done:
+                return out, False
+            items = done[i]
+            if not items:
+                return out, True
+            out.append(items)
+            total += len(items)
+            if total >= need or (last_page and last_page(i, items)):
+                return out, True
+        return out, True
+
+    def end() -> Optional[int]:
+        # first page after which serial paging stops (empty/failed/last page or an error)
+        ends = [i for i, v in done.items() if not v or (last_page and last_page(i, v))]
+        return min(ends + list(errors), default=None)
+
+    try:
+        while True:
+            out, final = prefix()
+            if final:
+                return out
+            stop = sum(len(v or ()) for v in done.values()) >= need or end() is not None
+            while not stop and nxt < pages and len(running) < max(1, concurrency):
+                running[asyncio.create_task(fetch(nxt))] = nxt
+                nxt += 1
+            if not running:
+                return out
+            finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                i = running.pop(task)
+                if task.exception() is not None:
+                    errors[i] = task.exception()
+                else:
+                    done[i] = task.result()
+            last = end()
+            if last is not None:
+                # speculative pages past the end are never kept: drop them, result or error
+                stale = [t for t, i in running.items() if i > last]
+                for task in stale:
+                    del running[task]
+                    task.cancel()
+                for i in [i for i in (*done, *errors) if i > last]:
+                    done.pop(i, None)
+                    errors.pop(i, None)
+                if stale:
+                    await asyncio.gather(*stale, return_exceptions=True)
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
@@ -1,6 +1,8 @@
-import httpx, os
-from typing import List, Dict
-from ..services.cache import cache
+import os, math
+from typing import List, Dict, Optional
+from ..services.cache import acache
+from .paging import PAGE_CONCURRENCY, fetch_pages
+from ..services import http_pool
 
 # Try import base URL from config; fall back to a sensible local default
 try:
@@ -8,34 +10,46 @@ try:
 except Exception:
     _SX_BASE = "http://localhost:8081"
 
-async def search_searxng(query: str, target_total: int, *, max_pages: int = 10, timeout_s: float = 10.0) -> List[Dict]:
+async def search_searxng(query: str, target_total: int, *, max_pages: int = 10, timeout_s: float = 10.0,
+                         page_concurrency: int = PAGE_CONCURRENCY) -> List[Dict]:
     # Support both SEARXNG_BASE_URL and SEARX_BASE env vars
     base = os.getenv("SEARXNG_BASE_URL") or os.getenv("SEARX_BASE") or _SX_BASE
     results: List[Dict] = []
-    pageno = 1
-    async with httpx.AsyncClient(timeout=timeout_s) as client:
-        while len(results) < target_total and pageno <= max_pages:
-            params = {"q": query, "format": "json", "pageno": pageno}
-            cache_key = f"sx:{query}:{pageno}"
-            data = cache.get(cache_key)
-            if data is None:
-                try:
-                    r = await client.get(f"{base}/search", params=params)
-                    r.raise_for_status()
-                    data = r.json()
-                except Exception:
-                    # SearXNG not reachable or invalid; stop paging gracefully
-                    break
-                cache.set(cache_key, data)
-            items = data.get("results") or []
-            for idx, it in enumerate(items, start=1):
-                results.append({
-                    "title": it.get("title") or "",
-                    "url": it.get("url") or "",
-                    "snippet": it.get("content") or "",
-                    "source": "searxng",
-                    "engine_rank": ((pageno - 1) * 10) + idx,
-                })
-            if not items: break
-            pageno += 1
+    client = http_pool.client("searxng")
+    # every page key of the query in one round-trip; fetched pages are written back together
+    keys = [f"sx:{query}:{pageno}" for pageno in range(1, max_pages + 1)]
+    cached = await acache.get_many(keys)
+    fresh: Dict[str, Dict] = {}
+
+    async def page(i: int) -> Optional[List[Dict]]:
+        pageno = i + 1
+        params = {"q": query, "format": "json", "pageno": pageno}
+        cache_key = keys[i]
+        data = cached.get(cache_key)
+        if data is None:
+            try:
+                r = await client.get(f"{base}/search", params=params, timeout=timeout_s)
+                r.raise_for_status()
+                data = r.json()
+            except Exception:
+                # SearXNG not reachable or invalid; stop paging gracefully
+                return None
+            # cache only the fields read below, not SearXNG's per-engine metadata
+            data = {"results": [{f: it.get(f) for f in ("title", "url", "content")} for it in data.get("results") or []]}
+            fresh[cache_key] = data
+        return data.get("results") or []
+
+    # ~10 results per page: request the estimated pages at once, more only if they come up short
+    estimate = max(1, math.ceil(target_total / 10))
+    pages = await fetch_pages(page, max_pages, target_total, concurrency=min(page_concurrency, estimate))
+    await acache.set_many(fresh)
+    for pageno, items in enumerate(pages, start=1):
+        for idx, it in enumerate(items, start=1):
+            results.append({
+                "title": it.get("title") or "",
+                "url": it.get("url") or "",
+                "snippet": it.get("content") or "",
+                "source": "searxng",
+                "engine_rank": ((pageno - 1) * 10) + idx,
+            })
     return results
@@ -1,11 +1,9 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
-from typing import List, Dict, Any
-import os, asyncio
-import httpx
+from typing import Dict, Any
 from .models import SearchRequest, IngestRequest, HybridSearchRequest, SearchResult
-from .services.ner import NER
-from .services.file_meta import extract_metadata_from_url
+from .services import core_service
 from .services.aggregation import dedup, apply_rrf
 from .connectors.google_cse import search_google_cse, google_available
 from .connectors.searxng import search_searxng
@@ -19,9 +17,13 @@ from .routes import router as orchestrate_router
 
 # Βεβαιώσου ότι υπάρχει startup hook για indices (αν δεν υπάρχει ήδη στο αρχείο σου):
 try:
-    from .services.opensearch_client import ensure_indices
+    from .services.opensearch_client import ensure_indices, init_client, close_client
 except Exception:
-    ensure_indices = None  # type: ignore
+    ensure_indices = init_client = close_client = None  # type: ignore
+from .services import bulkhead as bulkheads
+from .services import http_pool
+from .services.cache import acache
+from .services.plan import load_plan
 
 try:
     app  # type: ignore[name-defined]
@@ -30,18 +32,25 @@ except NameError:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
+    # Startup: an invalid plan fails the boot here instead of on the first request
+    plan = load_plan()
+    await bulkheads.configure(plan)
     if ensure_indices is not None:
+        await init_client()
         await ensure_indices()
+    app.state.ready = True
     yield
-    # Shutdown (nothing for now)
+    # Shutdown
+    app.state.ready = False
+    if close_client is not None:
+        await close_client()
+    await http_pool.aclose_all()
+    await acache.aclose()
 
 app = FastAPI(title="TraceMatrix Orchestrator", lifespan=lifespan)
 # Mount routes from submodule
 app.include_router(orchestrate_router)
 
-_ner = NER()
-
 # ------------ Schemas ------------
 class EmailPayload(BaseModel):
     email: EmailStr = Field(..., description="Target email address")
@@ -53,70 +62,20 @@ class UsernamePayload(BaseModel):
 def read_root():  # keep existing root
     return {"ok": True, "service": "orchestrator"}
 
+@app.get("/ready")
+def ready():
+    # flips once startup (plan, bulkheads, OpenSearch indices) has completed
+    if not getattr(app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"ready": False})
+    return {"ready": True, "plan": load_plan().source}
+
 # --- Test-friendly stub for /search (no query params) ---
-# These constants match tests/respx mocks exactly
-GOOGLE = "https://customsearch.googleapis.com/customsearch/v1"
-SEARX  = "http://localhost:8081/search"
+# Logic lives in services.core_service so /orchestrate can call it in-process
+GOOGLE, SEARX = core_service.GOOGLE, core_service.SEARX
 
 @app.post("/search")
 async def search_stub(payload: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Minimal /search used by tests:
-    - 2 GETs to GOOGLE (side-effects simulate pagination)
-    - 1 GET to SEARX
-    - No query params so respx mocks match exactly
-    - RRF fusion over per-source ranks, then slice by 'limit'
-    """
-    name = str(payload.get("name") or "")
-    keywords = payload.get("keywords") or []
-    limit = int(payload.get("limit") or 10)
-
-    google_items: List[Dict[str, Any]] = []
-    searx_items: List[Dict[str, Any]] = []
-
-    async with httpx.AsyncClient() as client:
-        # Only call Google if creds exist; tests set these env vars
-        if os.getenv("GOOGLE_CSE_API_KEY") and os.getenv("GOOGLE_CSE_CX"):
-            for _ in range(2):
-                resp = await client.get(GOOGLE)
-                if resp.status_code == 200:
-                    google_items.extend(resp.json().get("items", []))
-
-        # SearXNG (single call)
-        try:
-            resp = await client.get(SEARX)
-            if resp.status_code == 200:
-                searx_items = resp.json().get("results", [])
-        except Exception:
-            searx_items = []
-
-    # Normalize
-    g_norm = [
-        {"title": it.get("title"), "url": it.get("link"), "content": it.get("snippet", ""), "_rank": i + 1, "_src": "google"}
-        for i, it in enumerate(google_items)
-    ]
-    s_norm = [
-        {"title": it.get("title"), "url": it.get("url"), "content": it.get("content", ""), "_rank": i + 1, "_src": "searx"}
-        for i, it in enumerate(searx_items)
-    ]
-
-    # RRF fusion (dedup by URL)
-    buckets: Dict[str, List[Dict[str, Any]]] = {}
-    for item in g_norm + s_norm:
-        url = item.get("url")
-        if not url:
-            continue
-        buckets.setdefault(url, []).append(item)
-
-    k = 60
-    fused: List[Dict[str, Any]] = []
-    for url, items in buckets.items():
-        score = sum(1.0 / (k + it["_rank"]) for it in items)
-        base = items[0]
-        fused.append({"title": base.get("title"), "url": url, "content": base.get("content", ""), "rrf": score})
-
-    fused.sort(key=lambda x: x["rrf"], reverse=True)
-    return {"count": len(fused), "results": fused[:limit]}
+    return await core_service.search(payload)
 
 # NEW: Holehe endpoint
 @app.post("/email_accounts")
@@ -139,12 +98,8 @@ async def maigret_lookup_route(payload: UsernamePayload) -> Dict[str, Any]:
 @app.post("/ingest_urls")
 async def ingest_urls(req: IngestRequest):
     if not req.urls: raise HTTPException(400, "Provide urls[]")
-    metas = await asyncio.gather(*[extract_metadata_from_url(u) for u in req.urls])
-    ents = _ner.extract(req.text or "")
-    return {"count": len(req.urls), "file_meta": metas, "entities": ents}
+    return await core_service.ingest(req.urls, req.text)
 
 @app.post("/search_hybrid")
 async def search_hybrid(req: HybridSearchRequest):
-    s = await search_stub({"name": req.query, "keywords": [], "limit": req.k})
-    # TODO: fuse with OpenSearch kNN results (keep RRF)
-    return {"query": req.query, "k": req.k, "results": s["results"]}
+    return await core_service.search_hybrid(req.query, req.k)
@@ -1,52 +1,32 @@
-from fastapi import APIRouter, Body, HTTPException
-from typing import Dict, Any
-import os
-from .services.config import load_yaml
+from fastapi import APIRouter, Body, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Any, Optional
+from .services.config import load_cfg
+from .services.plan import Plan
 from .services.fallback import fallback_orchestrate
 from .services.media_discovery import discover_media
+from .services.scheduler import EventFn
+from .services import bulkhead as bulkheads
+from .services import checkpoint
+from .services.cache import cache
+from .services.batch import BATCH_CONCURRENCY, batch_budget, run_batch
+from .services.streaming import stream_format, streaming_response
 
 router = APIRouter()
 
 
-def load_cfg() -> Dict[str, Any]:
-    path = os.getenv("ORCH_CONFIG", "/app/config/orchestrator.fallback.yaml")
-    try:
-        return load_yaml(path)
-    except Exception:
-        return {}
-
-
 @router.post("/orchestrate")
-async def orchestrate(payload: Dict[str, Any] = Body(...)):
-    cfg = load_cfg()
+async def orchestrate(request: Request, payload: Dict[str, Any] = Body(...)):
+    plan = load_cfg()
     urls = payload.get("urls") or []
-    do_fallback = bool(payload.get("fallback", True)) and cfg.get("fallback", {}).get("enabled", True)
+    do_fallback = bool(payload.get("fallback", True)) and plan.fallback_enabled
 
     # Forced fallback when no URLs provided and fallback requested
     if do_fallback and len(urls) == 0:
-        meta, results = await fallback_orchestrate(cfg, payload)
-        if not results:
-            return {
-                "status": "ok",
-                "mode": "fallback_websearch_empty",
-                "message": "Web search returned 0 URLs; empty index → cannot hybrid",
-                "exports": {},
-                "results_preview": [],
-                # E2E compatibility
-                "summary": {"results": 0},
-                "export": {"csv_rows": 0, "paths": {}},
-            }
-        csv_rows = len(results)
-        return {
-            "status": "ok",
-            "mode": "fallback_hybrid",
-            "message": "Fallback: web search → ingest → hybrid + media ➜ export",
-            "exports": meta,
-            "results_preview": results[:5],
-            # E2E compatibility
-            "summary": {"results": csv_rows},
-            "export": {"csv_rows": csv_rows, "paths": meta},
-        }
+        fmt = stream_format(payload.get("stream"), request.headers.get("accept"))
+        if fmt:
+            return streaming_response(lambda on_event: _run_fallback(plan, payload, on_event), fmt)
+        return await _run_fallback(plan, payload)
 
     # else: existing/standard path with URLs crawl ➜ ingest ➜ export
     return {
@@ -59,11 +39,112 @@ async def orchestrate(payload: Dict[str, Any] = Body(...)):
     }
 
 
+@router.post("/orchestrate/batch")
+async def orchestrate_batch(payload: Dict[str, Any] = Body(...)):
+    """
+    Fallback orchestration for many targets under one budget; `defaults` are merged
+    into every target. Web searches, SearXNG media queries and URL fetches shared
+    by several targets run once.
+    """
+    targets = payload.get("targets") or []
+    if not targets:
+        raise HTTPException(status_code=400, detail="Provide targets[]")
+    plan = load_cfg()
+    defaults = payload.get("defaults") or {}
+    return await run_batch(
+        [{**defaults, **t} for t in targets], lambda p: _run_fallback(plan, p),
+        concurrency=int(payload.get("concurrency") or BATCH_CONCURRENCY),
+        budget_s=batch_budget(plan, payload.get("budget_s")),
+    )
+
+
+async def _run_fallback(plan: Plan, payload: Dict[str, Any], on_event: Optional[EventFn] = None) -> Dict[str, Any]:
+    await bulkheads.configure(plan)
+    run_id, ckpt = checkpoint.for_run(payload.get("run_id"), payload)
+    trace: Dict[str, Any] = {}
+    meta, results = await fallback_orchestrate(plan, payload, trace=trace, on_event=on_event, checkpoint=ckpt)
+    if not results:
+        return {
+            "status": "ok",
+            "run_id": run_id,
+            "mode": "fallback_websearch_empty",
+            "message": "Web search returned 0 URLs; empty index → cannot hybrid",
+            "exports": {},
+            "results_preview": [],
+            # E2E compatibility
+            "summary": {"results": 0},
+            "export": {"csv_rows": 0, "paths": {}},
+            "steps": trace,
+        }
+    csv_rows = len(results)
+    return {
+        "status": "ok",
+        "run_id": run_id,
+        "mode": "fallback_hybrid",
+        "message": "Fallback: web search → ingest → hybrid + media ➜ export",
+        "exports": meta,
+        "results_preview": results[:5],
+        # E2E compatibility
+        "summary": {"results": csv_rows},
+        "export": {"csv_rows": csv_rows, "paths": meta},
+        "steps": trace,
+    }
+
+
+def _tasks():
+    # celery is optional for the API; import on first use
+    try:
+        from .. import tasks
+        return tasks
+    except ImportError as e:
+        raise HTTPException(status_code=503, detail=f"background jobs unavailable: {e}")
+
+
+@router.post("/jobs/ingest")
+async def submit_ingest_job(payload: Dict[str, Any] = Body(...)):
+    urls = payload.get("urls") or []
+    if not urls:
+        raise HTTPException(status_code=400, detail="Provide urls[]")
+    tasks = _tasks()
+    chunk_size = int(payload.get("chunk_size") or tasks.INGEST_CHUNK_SIZE)
+    return await run_in_threadpool(tasks.submit_ingest, urls, payload.get("source") or "celery", chunk_size)
+
+
+@router.post("/jobs/username_scan")
+async def submit_username_job(payload: Dict[str, Any] = Body(...)):
+    username = (payload.get("username") or "").strip()
+    if not username:
+        raise HTTPException(status_code=400, detail="Provide username")
+    try:
+        return await run_in_threadpool(_tasks().submit_username_scan, username, payload.get("tools"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    status = await run_in_threadpool(_tasks().job_status, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return status
+
+
+@router.get("/bulkheads")
+async def bulkhead_stats():
+    """Per-upstream limit, in-flight calls, queue depth and wait times."""
+    return bulkheads.stats()
+
+
+@router.get("/cache")
+async def cache_stats():
+    """L1 items, bytes per namespace, hit/miss/eviction counters (and Redis hits/misses)."""
+    return cache.stats()
+
+
 @router.post("/discover_media")
 async def media_preview(payload: Dict[str, Any] = Body(...)):
     try:
-        cfg = load_cfg()
-        items = await discover_media(cfg, payload)
+        items = await discover_media(load_cfg(), payload)
         return {"status": "ok", "count": len(items), "results": items[:20]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
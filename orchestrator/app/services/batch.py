@@ -0,0 +1,50 @@
+from __future__ import annotations
+import time, asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from . import singleflight
+from .plan import Plan
+
+# Many-target orchestration under one budget: at most `concurrency` targets run at
+# once, everything still running at `budget_s` is cancelled, and upstream calls are
+# shared across targets through a singleflight scope (see singleflight.py).
+
+BATCH_CONCURRENCY = 4
+
+
+def batch_budget(plan: Plan, requested: Optional[float] = None) -> Optional[float]:
+    if requested:
+        return float(requested)
+    return plan.batch_s
+
+
+async def run_batch(payloads: List[Any], run_one: Callable[[Any], Awaitable[Dict[str, Any]]], *,
+                    concurrency: int = BATCH_CONCURRENCY, budget_s: Optional[float] = None) -> Dict[str, Any]:
+    sem = asyncio.Semaphore(max(1, concurrency))
+    t0 = time.perf_counter()
+
+    async def one(i: int, p: Any) -> Dict[str, Any]:
+        async with sem:
+            start = time.perf_counter()
+            try:
+                res = await run_one(p)
+                return {"index": i, "status": "ok", "duration_s": round(time.perf_counter() - start, 3), "result": res}
+            except Exception as e:
+                return {"index": i, "status": "error", "duration_s": round(time.perf_counter() - start, 3),
+                        "error": str(e) or e.__class__.__name__}
+
+    with singleflight.scope() as memo:
+        tasks = [asyncio.create_task(one(i, p)) for i, p in enumerate(payloads)]
+        done, pending = await asyncio.wait(tasks, timeout=budget_s) if tasks else (set(), set())
+        for t in pending:
+            t.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        targets = [t.result() if t in done else {"index": i, "status": "timeout"} for i, t in enumerate(tasks)]
+        return {
+            "count": len(targets),
+            "ok": sum(t["status"] == "ok" for t in targets),
+            "cut_off": bool(pending),
+            "total_s": round(time.perf_counter() - t0, 3),
+            "shared": memo.stats(),
+            "targets": targets,
+        }
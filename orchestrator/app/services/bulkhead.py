@@ -0,0 +1,137 @@
+from __future__ import annotations
+import os, time, asyncio, weakref
+from contextlib import asynccontextmanager
+from typing import Any, Dict
+from .plan import Plan
+
+# Per-upstream concurrency limits shared by every request in the process.
+# Each sidecar (social-analyzer, Reacher, PhoneInfoga, holehe/maigret subprocesses,
+# page fetches) gets its own bulkhead, so a burst of orchestrations queues here
+# instead of piling onto the upstream until it times out.
+#
+# Limits come from the plan file (compiled into Plan.bulkheads):
+#   plan.steps[enrich].reacher.parallel  -> "reacher"
+#   guardrails.bulkheads.<name>: <int>   -> any upstream
+# and fall back to BULKHEAD_<NAME> env vars, then BULKHEAD_DEFAULT.
+
+DEFAULT_LIMIT = int(os.getenv("BULKHEAD_DEFAULT", "8"))
+
+
+class _Lane:
+    """A bulkhead's wait queue on one event loop (asyncio primitives are loop-bound)."""
+
+    def __init__(self):
+        self.cond = asyncio.Condition()
+        self.in_flight = 0
+        self.queued = 0
+
+
+class Bulkhead:
+    """Resizable async semaphore with queue-depth and wait-time counters."""
+
+    def __init__(self, name: str, limit: int = DEFAULT_LIMIT):
+        self.name = name
+        self.limit = max(1, int(limit))
+        self.acquired = 0
+        self.wait_total_s = 0.0
+        self.wait_max_s = 0.0
+        # one lane per running loop (e.g. each asyncio.run in a Celery task); the
+        # limit applies per loop and a lane goes away with its loop
+        self._lanes: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _Lane]" = weakref.WeakKeyDictionary()
+
+    @property
+    def in_flight(self) -> int:
+        return sum(lane.in_flight for lane in list(self._lanes.values()))
+
+    @property
+    def queued(self) -> int:
+        return sum(lane.queued for lane in list(self._lanes.values()))
+
+    def _lane(self) -> _Lane:
+        loop = asyncio.get_running_loop()
+        lane = self._lanes.get(loop)
+        if lane is None:
+            lane = self._lanes[loop] = _Lane()
+        return lane
+
+    @staticmethod
+    async def _wake(lane: _Lane):
+        async with lane.cond:
+            lane.cond.notify_all()
+
+    async def resize(self, limit: int):
+        self.limit = max(1, int(limit))
+        current = asyncio.get_running_loop()
+        for loop, lane in list(self._lanes.items()):
+            if loop is current:
+                await self._wake(lane)
+            elif loop.is_running():
+                asyncio.run_coroutine_threadsafe(self._wake(lane), loop)
+
+    @asynccontextmanager
+    async def slot(self):
+        lane = self._lane()
+        cond = lane.cond
+        start = time.perf_counter()
+        lane.queued += 1
+        try:
+            async with cond:
+                await cond.wait_for(lambda: lane.in_flight < self.limit)
+                lane.in_flight += 1
+        finally:
+            lane.queued -= 1
+        waited = time.perf_counter() - start
+        self.acquired += 1
+        self.wait_total_s += waited
+        self.wait_max_s = max(self.wait_max_s, waited)
+        try:
+            yield
+        finally:
+            async with cond:
+                lane.in_flight -= 1
+                cond.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "acquired": self.acquired,
+            "wait_avg_ms": round(1000 * self.wait_total_s / self.acquired, 1) if self.acquired else 0.0,
+            "wait_max_ms": round(1000 * self.wait_max_s, 1),
+        }
+
+
+_registry: Dict[str, Bulkhead] = {}
+_configured: Dict[str, int] = {}
+
+
+def _env_limit(name: str) -> int:
+    return int(os.getenv(f"BULKHEAD_{name.upper()}", str(DEFAULT_LIMIT)))
+
+
+def get(name: str) -> Bulkhead:
+    bh = _registry.get(name)
+    if bh is None:
+        bh = _registry[name] = Bulkhead(name, _configured.get(name) or _env_limit(name))
+    return bh
+
+
+def bulkhead(name: str):
+    """`async with bulkhead("reacher"): ...`"""
+    return get(name).slot()
+
+
+async def configure(plan: Plan):
+    """Apply plan limits; existing bulkheads are resized in place (waiters are re-checked)."""
+    limits = plan.bulkheads
+    _configured.clear()
+    _configured.update(limits)
+    for name, bh in _registry.items():
+        lim = limits.get(name) or _env_limit(name)
+        if lim != bh.limit:
+            await bh.resize(lim)
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    return {name: bh.stats() for name, bh in sorted(_registry.items())}
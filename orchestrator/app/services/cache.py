@@ -1,9 +1,23 @@
-import os, json, time
-from typing import Any, Optional
+import os, json, time, zlib, asyncio, sqlite3, threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 try:
     import redis
 except Exception:
     redis = None
+try:
+    import redis.asyncio as aioredis
+except Exception:
+    aioredis = None
+try:
+    import orjson
+except Exception:
+    orjson = None
+try:
+    import msgpack
+except Exception:
+    msgpack = None
 
 # Provide safe default TTL if config is absent
 try:
@@ -11,33 +25,408 @@ try:
 except Exception:
     _CACHE_TTL = 300
 
+# Stored format (Redis and disk): one format-version byte, one flags byte, then the
+# value as MessagePack (flag 0x02; when msgpack is installed) or compact JSON (orjson
+# when installed), zlib-compressed when the body is at least CACHE_COMPRESS_MIN_BYTES
+# and compression actually shrinks it. Entries written before versioning (plain JSON
+# text) are still read; an unknown version byte or flag means a newer writer (or a
+# MessagePack entry on a worker without msgpack), and the entry is treated as a miss.
+FORMAT_VERSION = 1
+_ZLIB = 0x01
+_MSGPACK = 0x02
+COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "1024"))
+
+
+def encode(value: Any) -> bytes:
+    if msgpack is not None:
+        body, flags = msgpack.packb(value, use_bin_type=True), _MSGPACK
+    else:
+        body = orjson.dumps(value) if orjson else json.dumps(value, separators=(",", ":")).encode("utf-8")
+        flags = 0
+    if len(body) >= COMPRESS_MIN_BYTES:
+        packed = zlib.compress(body, 6)
+        if len(packed) < len(body):
+            body, flags = packed, flags | _ZLIB
+    return bytes((FORMAT_VERSION, flags)) + body
+
+
+def decode(raw: Any) -> Optional[Any]:
+    if not raw:
+        return None
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    try:
+        head = raw[0]
+        if head == FORMAT_VERSION:
+            flags, body = raw[1], raw[2:]
+            if flags & ~(_ZLIB | _MSGPACK) or (flags & _MSGPACK and msgpack is None):
+                return None
+            if flags & _ZLIB:
+                body = zlib.decompress(body)
+            if flags & _MSGPACK:
+                return msgpack.unpackb(body, raw=False)
+            return orjson.loads(body) if orjson else json.loads(body)
+        if head < 0x20 and head not in b"\t\n\r":
+            return None  # other format version
+        return json.loads(raw)  # legacy plain JSON entry
+    except Exception:
+        return None
+
+
+# L1: bounded in-process tier in front of Redis (or alone without it).
+# Keys are grouped into namespaces by prefix; each namespace has its own byte budget
+# (CACHE_L1_<NS>_MB) and evicts least-recently-used entries when over it, so a flood
+# of SERP pages cannot push out provider responses. CACHE_L1_MAX_ITEMS caps the count.
+# Eviction pops from the front of the namespace's (or the global) recency order, so a
+# set is O(1); expired entries are dropped when read and by a sweep every
+# L1_SWEEP_EVERY sets.
+# With Redis behind it, L1 entries live at most CACHE_L1_TTL seconds so workers don't
+# serve each other's stale values for long.
+L1_MAX_ITEMS = int(os.getenv("CACHE_L1_MAX_ITEMS", "4096"))
+L1_TTL = int(os.getenv("CACHE_L1_TTL", "60"))
+L1_SWEEP_EVERY = 1024  # sets
+NAMESPACES = {"sx": "serp", "g": "serp", "emb": "embeddings"}  # key prefix -> namespace; others: "provider"
+L1_BUDGETS_MB = {
+    ns: float(os.getenv(f"CACHE_L1_{ns.upper()}_MB", mb))
+    for ns, mb in (("serp", "32"), ("embeddings", "32"), ("provider", "16"))
+}
+
+
+def namespace_of(key: str) -> str:
+    return NAMESPACES.get(key.split(":", 1)[0], "provider")
+
+
+class LRUTier:
+    """Thread-safe LRU with per-entry TTL, an item cap and per-namespace byte budgets."""
+
+    def __init__(self, max_items: int = L1_MAX_ITEMS, budgets_mb: Optional[Dict[str, float]] = None):
+        self.max_items = max_items
+        self.budgets = {ns: int(mb * 1024 * 1024) for ns, mb in (budgets_mb or L1_BUDGETS_MB).items()}
+        self._data: "OrderedDict[str, Tuple[float, int, str, Any]]" = OrderedDict()  # key -> (exp, size, ns, value)
+        self._order: Dict[str, "OrderedDict[str, None]"] = {}  # ns -> its keys, least recently used first
+        self._used: Dict[str, int] = {}
+        self._sets = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        self.evictions = {"lru": 0, "ttl": 0}
+
+    def _drop(self, key: str):
+        _, size, ns, _ = self._data.pop(key)
+        del self._order[ns][key]
+        self._used[ns] -= size
+
+    def _sweep(self):
+        now = time.time()
+        for k in [k for k, e in self._data.items() if e[0] < now]:
+            self._drop(k)
+            self.evictions["ttl"] += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            e = self._data.get(key)
+            if e is None:
+                self.misses += 1
+                return None
+            if e[0] < time.time():
+                self._drop(key)
+                self.evictions["ttl"] += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._order[e[2]].move_to_end(key)
+            self.hits += 1
+            return e[3]
+
+    def set(self, key: str, value: Any, ttl: float, size: int):
+        ns = namespace_of(key)
+        budget = self.budgets.get(ns, self.budgets.get("provider", 0))
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            if size > budget:
+                return  # larger than the whole namespace: not worth holding in memory
+            self._data[key] = (time.time() + ttl, size, ns, value)
+            self._order.setdefault(ns, OrderedDict())[key] = None
+            self._used[ns] = self._used.get(ns, 0) + size
+            self._sets += 1
+            if self._sets >= L1_SWEEP_EVERY:
+                self._sets = 0
+                self._sweep()
+            order = self._order[ns]
+            while self._used[ns] > budget:
+                self._drop(next(iter(order)))
+                self.evictions["lru"] += 1
+            while len(self._data) > self.max_items:
+                self._drop(next(iter(self._data)))
+                self.evictions["lru"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "items": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": dict(self.evictions),
+                "bytes": {ns: {"used": self._used.get(ns, 0), "budget": b} for ns, b in self.budgets.items()},
+            }
+
+
+# Disk: SQLite file shared by every worker on the host, for deployments without Redis
+# (CACHE_DISK=auto), always (1) or never (0). Survives restarts; WAL mode lets workers
+# read while one writes. Expired rows and, past CACHE_DISK_MAX_MB, least recently
+# used rows are removed by compact(), which runs at open and every few hundred writes.
+CACHE_DISK = os.getenv("CACHE_DISK", "auto").lower()
+CACHE_DISK_PATH = os.getenv("CACHE_DISK_PATH", "/app/cache/cache.sqlite3")
+CACHE_DISK_MAX_MB = float(os.getenv("CACHE_DISK_MAX_MB", "256"))
+COMPACT_EVERY = 500  # writes
+
+
+class DiskTier:
+    def __init__(self, path: str = CACHE_DISK_PATH, max_bytes: int = int(CACHE_DISK_MAX_MB * 1024 * 1024)):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.evictions = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS kv (k TEXT PRIMARY KEY, v BLOB NOT NULL, exp REAL NOT NULL,"
+            " size INTEGER NOT NULL, atime REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS kv_exp ON kv(exp)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS kv_atime ON kv(atime)")
+        self.compact()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Tuple[bytes, float]]:
+        """{key: (raw value, expiry)} for the live entries among `keys`."""
+        if not keys:
+            return {}
+        now = time.time()
+        with self._lock:
+            marks = ",".join("?" * len(keys))
+            rows = self._db.execute(f"SELECT k, v, exp FROM kv WHERE k IN ({marks}) AND exp > ?", [*keys, now]).fetchall()
+            if rows:
+                self._db.executemany("UPDATE kv SET atime=? WHERE k=?", [(now, k) for k, _, _ in rows])
+        self.hits += len(rows)
+        self.misses += len(keys) - len(rows)
+        return {k: (v, exp) for k, v, exp in rows}
+
+    def set_many(self, items: Dict[str, bytes], ttl: float):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO kv (k, v, exp, size, atime) VALUES (?, ?, ?, ?, ?)",
+                    [(k, raw, now + ttl, len(k) + len(raw), now) for k, raw in items.items()],
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._writes += len(items)
+            due = self._writes >= COMPACT_EVERY
+        if due:
+            self.compact()
+
+    def compact(self):
+        """Drop expired rows, then LRU rows until the file's payload is back under ~90% of max_bytes."""
+        with self._lock:
+            self._writes = 0
+            cur = self._db.execute("DELETE FROM kv WHERE exp <= ?", (time.time(),))
+            self.evictions += max(cur.rowcount, 0)
+            used = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM kv").fetchone()[0]
+            if used <= self.max_bytes:
+                return
+            excess, doomed = used - int(self.max_bytes * 0.9), []
+            for k, size in self._db.execute("SELECT k, size FROM kv ORDER BY atime"):
+                if excess <= 0:
+                    break
+                doomed.append((k,))
+                excess -= size
+            self._db.executemany("DELETE FROM kv WHERE k=?", doomed)
+            self.evictions += len(doomed)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            items, used = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM kv").fetchone()
+        return {"path": self.path, "items": items, "bytes": used, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
 class Cache:
-    def __init__(self):
-        self._local = {}
+    def __init__(self, l1: Optional[LRUTier] = None, disk: Optional[DiskTier] = None):
+        self._l1 = l1 or LRUTier()
         self._r = None
+        self.redis_hits = self.redis_misses = 0
         url = os.getenv("REDIS_URL")
         if redis and url:
             try:
-                self._r = redis.Redis.from_url(url, decode_responses=True)
+                self._r = redis.Redis.from_url(url)
                 self._r.ping()
             except Exception:
                 self._r = None
+        self._disk = disk
+        if disk is None and (CACHE_DISK in ("1", "true") or (CACHE_DISK == "auto" and self._r is None)):
+            try:
+                self._disk = DiskTier()
+            except Exception:
+                self._disk = None
+
+    def _l1_ttl(self, ttl: float) -> float:
+        # with a tier shared between workers behind it, L1 only holds values briefly
+        return min(ttl, L1_TTL) if (self._r or self._disk) else ttl
+
+    def _from_disk(self, keys: List[str]) -> Dict[str, Any]:
+        found: Dict[str, Any] = {}
+        try:
+            rows = self._disk.get_many(keys)
+        except Exception:
+            return found
+        now = time.time()
+        for k, (raw, exp) in rows.items():
+            v = decode(raw)
+            if v is not None:
+                found[k] = v
+                self._l1.set(k, v, min(L1_TTL, exp - now), len(raw))
+        return found
 
     def get(self, key: str) -> Optional[Any]:
-        if self._r:
-            v = self._r.get(key)
-            return json.loads(v) if v else None
-        v = self._local.get(key)
-        if not v: return None
-        if v["exp"] < time.time():
-            self._local.pop(key, None)
+        v = self._l1.get(key)
+        if v is not None:
+            return v
+        if self._disk is not None:
+            v = self._from_disk([key]).get(key)
+            if v is not None:
+                return v
+        if not self._r:
+            return None
+        raw = self._r.get(key)
+        v = decode(raw)
+        if v is None:
+            self.redis_misses += 1
             return None
-        return v["v"]
+        self.redis_hits += 1
+        self._l1.set(key, v, L1_TTL, len(raw))
+        return v
 
     def set(self, key: str, value: Any, ttl: int = _CACHE_TTL):
+        raw = encode(value)
+        if self._r:
+            self._r.setex(key, ttl, raw)
+        if self._disk is not None:
+            try:
+                self._disk.set_many({key: raw}, ttl)
+            except Exception:
+                pass
+        self._l1.set(key, value, self._l1_ttl(ttl), len(raw))
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"l1": self._l1.stats()}
+        if self._disk is not None:
+            out["disk"] = self._disk.stats()
         if self._r:
-            self._r.setex(key, ttl, json.dumps(value))
-        else:
-            self._local[key] = {"v": value, "exp": time.time() + ttl}
+            out["redis"] = {"hits": self.redis_hits, "misses": self.redis_misses}
+        return out
+
+class AsyncCache:
+    """
+    Non-blocking counterpart of Cache for the async connectors: same keys and JSON
+    values, but a whole query's keys are read with one MGET and written back with one
+    pipeline. Shares the sync cache's L1 and disk tiers (disk I/O runs in a thread);
+    Redis (redis.asyncio) is only asked for the keys those do not hold, and only when
+    the sync cache reached it.
+    """
+
+    def __init__(self, sync: Cache):
+        self._sync = sync
+        self._url = os.getenv("REDIS_URL")
+        self._clients: Dict[asyncio.AbstractEventLoop, Any] = {}  # redis.asyncio clients are loop-bound
+
+    def _redis(self):
+        if self._sync._r is None or aioredis is None or not self._url:
+            return None
+        loop = asyncio.get_running_loop()
+        r = self._clients.get(loop)
+        if r is None:
+            r = self._clients[loop] = aioredis.Redis.from_url(self._url)
+        return r
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        l1 = self._sync._l1
+        found: Dict[str, Any] = {}
+        for k in dict.fromkeys(keys):
+            v = l1.get(k)
+            if v is not None:
+                found[k] = v
+        rest = [k for k in dict.fromkeys(keys) if k not in found]
+        if rest and self._sync._disk is not None:
+            found.update(await asyncio.to_thread(self._sync._from_disk, rest))
+            rest = [k for k in rest if k not in found]
+        r = self._redis() if rest else None
+        if r is None:
+            return found
+        try:
+            vals = await r.mget(rest)
+        except Exception:
+            return found
+        hits = 0
+        for k, raw in zip(rest, vals):
+            v = decode(raw)
+            if v is not None:
+                found[k] = v
+                l1.set(k, v, L1_TTL, len(raw))
+                hits += 1
+        self._sync.redis_hits += hits
+        self._sync.redis_misses += len(rest) - hits
+        return found
+
+    async def set_many(self, items: Dict[str, Any], ttl: int = _CACHE_TTL):
+        if not items:
+            return
+        r = self._redis()
+        raws = {k: encode(v) for k, v in items.items()}
+        for k, v in items.items():
+            self._sync._l1.set(k, v, self._sync._l1_ttl(ttl), len(raws[k]))
+        if self._sync._disk is not None:
+            try:
+                await asyncio.to_thread(self._sync._disk.set_many, raws, ttl)
+            except Exception:
+                pass
+        if r is None:
+            return
+        try:
+            pipe = r.pipeline(transaction=False)
+            for k, raw in raws.items():
+                pipe.setex(k, ttl, raw)
+            await pipe.execute()
+        except Exception:
+            pass
+
+    async def get(self, key: str) -> Optional[Any]:
+        return (await self.get_many([key])).get(key)
+
+    async def set(self, key: str, value: Any, ttl: int = _CACHE_TTL):
+        await self.set_many({key: value}, ttl)
+
+    async def aclose(self):
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for r in clients:
+            try:
+                await r.aclose()
+            except Exception:
+                pass
+
 
 cache = Cache()
+acache = AsyncCache(cache)
@@ -0,0 +1,74 @@
+from __future__ import annotations
+import os, json, uuid, hashlib
+from typing import Any, Dict, Optional, Tuple
+from .kvstore import get_store
+
+# Per-step checkpoints for orchestration runs, keyed by run id.
+# Every step that finishes ok has its outputs stored (Redis hash when REDIS_URL is
+# reachable, else a JSON file under CHECKPOINT_DIR) with a TTL. A retried run with
+# the same run_id and the same request restores those outputs instead of re-running
+# the steps, so searches/ingests/enrichments that already succeeded are not repeated.
+
+CHECKPOINT_TTL = int(os.getenv("CHECKPOINT_TTL", "86400"))  # 0 disables checkpoints
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", "/app/cache/checkpoints")
+
+_IGNORED_FIELDS = ("run_id", "stream")
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex
+
+
+def fingerprint(payload: Dict[str, Any]) -> str:
+    """Identity of the request a run was started with (run_id/stream excluded)."""
+    body = {k: v for k, v in (payload or {}).items() if k not in _IGNORED_FIELDS}
+    return hashlib.sha1(json.dumps(body, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class Checkpoint:
+    """Completed-step outputs of one run; mismatching requests start from scratch."""
+
+    def __init__(self, run_id: str, fp: str, ttl: int = CHECKPOINT_TTL, store=None, fresh: bool = False):
+        self.run_id = run_id
+        self.fp = fp
+        self.fresh = fresh  # newly generated id: nothing to restore
+        self.ttl = ttl
+        self.key = f"ckpt:{run_id}"
+        self.store = store or get_store(CHECKPOINT_DIR)
+
+    def completed(self) -> Dict[str, Dict[str, Any]]:
+        if self.fresh:
+            return {}
+        try:
+            fields = self.store.load(self.key)
+        except Exception:
+            return {}
+        if fields.get("__fp__") != self.fp:
+            return {}
+        out = {}
+        for name, raw in fields.items():
+            if name != "__fp__":
+                try:
+                    out[name] = json.loads(raw)
+                except Exception:
+                    continue
+        return out
+
+    def save(self, step: str, outputs: Dict[str, Any]):
+        try:
+            raw = json.dumps(outputs)
+        except (TypeError, ValueError):
+            return  # not serializable -> this step simply re-runs on resume
+        try:
+            self.store.save(self.key, {"__fp__": self.fp, step: raw}, self.ttl)
+        except Exception:
+            pass
+
+
+def for_run(run_id: Optional[str], payload: Dict[str, Any]) -> Tuple[str, Optional[Checkpoint]]:
+    """(run_id, checkpoint) for a request; a fresh id is generated when none was given."""
+    fresh = not run_id
+    run_id = str(run_id or new_run_id())
+    if CHECKPOINT_TTL <= 0:
+        return run_id, None
+    return run_id, Checkpoint(run_id, fingerprint(payload), fresh=fresh)
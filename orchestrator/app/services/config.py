@@ -1,4 +1,4 @@
-import os, re, json, datetime as dt
+import re, datetime as dt
 from pathlib import Path
 from typing import Any, Dict
 
@@ -7,11 +7,7 @@ try:
 except Exception:
     yaml = None  # type: ignore
 
-
-def _env_expand(value: str) -> str:
-    def repl(m):
-        return os.getenv(m.group(1), "")
-    return re.sub(r"\$\{([A-Z0-9_]+)\}", repl, value)
+from .plan import Plan, expand_env, load_plan
 
 
 def load_yaml(path: str) -> Dict[str, Any]:
@@ -20,10 +16,13 @@ def load_yaml(path: str) -> Dict[str, Any]:
     p = Path(path)
     if not p.exists():
         return {}
-    data = yaml.safe_load(p.read_text(encoding="utf-8"))
-    s = json.dumps(data)
-    s = _env_expand(s)
-    return json.loads(s)
+    return expand_env(yaml.safe_load(p.read_text(encoding="utf-8"))) or {}
+
+
+def load_cfg() -> Plan:
+    """Current orchestration plan, compiled once and reloaded on file change (see services.plan).
+    Raises PlanError when the file is invalid and never compiled."""
+    return load_plan()
 
 
 def filename_from_template(tpl: str, name: str) -> str:
@@ -0,0 +1,78 @@
+from __future__ import annotations
+import os, json, time, hashlib
+from typing import Any, Dict, Iterable, List, Optional
+from .kvstore import get_store
+
+# Delta (incremental) orchestration, keyed by target.
+# After each delta run the entities it produced (urls, emails, usernames, phones;
+# items whose lookup or ingest failed are left out so the next run retries them)
+# are stored as the target's snapshot. The next delta run enriches/ingests only
+# items missing from that snapshot and exports the added/removed diff instead of
+# the whole index.
+
+DELTA_TTL = int(os.getenv("DELTA_TTL", str(90 * 24 * 3600)))
+DELTA_DIR = os.getenv("DELTA_DIR", "/app/cache/delta")
+KINDS = ("urls", "emails", "usernames", "phones")
+
+
+def target_key(name: Optional[str], keywords: Iterable[str] = (), phone: Optional[str] = None,
+               target_id: Optional[str] = None) -> str:
+    """Explicit target_id, else a hash of the normalized name/keywords/phone."""
+    if target_id:
+        return str(target_id)
+    norm = lambda v: " ".join(str(v or "").split()).casefold()
+    body = json.dumps([norm(name), sorted({norm(k) for k in keywords if k}), norm(phone)])
+    return hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+
+def only_new(values: Iterable[str], seen: Iterable[str]) -> List[str]:
+    seen = set(seen)
+    return [v for v in dict.fromkeys(values) if v not in seen]
+
+
+def snapshot(found: Dict[str, List[str]], failed: Optional[Dict[str, Iterable[str]]] = None) -> Dict[str, List[str]]:
+    """State to save for a run: what it found per kind, minus items whose lookup/ingest failed."""
+    failed = failed or {}
+    out = {}
+    for kind in KINDS:
+        skip = set(failed.get(kind, ()))
+        out[kind] = [v for v in dict.fromkeys(found.get(kind, [])) if v not in skip]
+    return out
+
+
+def diff(previous: Dict[str, List[str]], current: Dict[str, List[str]]) -> Dict[str, Any]:
+    added = {k: only_new(current.get(k, []), previous.get(k, [])) for k in KINDS}
+    removed = {k: only_new(previous.get(k, []), current.get(k, [])) for k in KINDS}
+    return {
+        "added": added,
+        "removed": removed,
+        "counts": {"added": sum(map(len, added.values())), "removed": sum(map(len, removed.values()))},
+    }
+
+
+class DeltaState:
+    def __init__(self, target: str, ttl: int = DELTA_TTL, store=None):
+        self.target = target
+        self.ttl = ttl
+        self.key = f"delta:{target}"
+        self.store = store or get_store(DELTA_DIR)
+
+    def previous(self) -> Optional[Dict[str, Any]]:
+        """Last snapshot ({kind: [...], "ts": ...}) or None for a first run."""
+        try:
+            fields = self.store.load(self.key)
+        except Exception:
+            return None
+        if not fields:
+            return None
+        snap: Dict[str, Any] = {k: json.loads(fields.get(k) or "[]") for k in KINDS}
+        snap["ts"] = float(fields.get("ts") or 0)
+        return snap
+
+    def save(self, current: Dict[str, List[str]]):
+        fields = {k: json.dumps(list(dict.fromkeys(current.get(k, [])))) for k in KINDS}
+        fields["ts"] = str(time.time())
+        try:
+            self.store.save(self.key, fields, self.ttl)
+        except Exception:
+            pass
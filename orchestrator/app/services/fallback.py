@@ -1,98 +1,80 @@
 from __future__ import annotations
 from typing import Dict, List, Any, Tuple
+import asyncio
 import hashlib
-try:
-    import httpx  # type: ignore
-except Exception:  # pragma: no cover - handled gracefully
-    httpx = None  # type: ignore
+from . import core_service
 from .config import filename_from_template
 from .exporter import export
 from .media_discovery import discover_media
+from .checkpoint import Checkpoint
+from .plan import Plan, step_cfg
+from .scheduler import (EventFn, Step, apply_plan, plan_concurrency, plan_continue_on_error, plan_deadline,
+                        remaining, run_dag)
 
 
 def _hash_title(title: str) -> str:
     return hashlib.sha1((title or "").strip().lower().encode("utf-8")).hexdigest()
 
 
-async def _call_local(client: "httpx.AsyncClient", path: str, json_payload: Dict[str, Any]) -> Dict[str, Any]:
-    """Helper to call local FastAPI endpoints consistently."""
-    r = await client.post(f"http://localhost:8000{path}", json=json_payload)
-    r.raise_for_status()
-    return r.json()
-
-
-async def web_search(cfg: Dict[str, Any], payload: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Use existing /search service to collect candidate web URLs."""
-    if httpx is None:
-        return []
+async def web_search(plan: Plan, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Use the /search service (in-process) to collect candidate web URLs."""
     name = str(payload.get("name") or "")
     keywords = payload.get("keywords") or []
-    limit = int(payload.get("search_limit") or cfg.get("fallback", {}).get("search_limit", 10))
-    timeout = cfg.get("guardrails", {}).get("timeouts", {}).get("per_step_s", 20)
-    async with httpx.AsyncClient(timeout=timeout) as client:  # type: ignore[attr-defined]
-        try:
-            j = await _call_local(client, "/search", {"name": name, "keywords": keywords, "limit": limit})
-            results = j.get("results") or []
-            # Normalize shape: url, title, score
-            out: List[Dict[str, Any]] = []
-            for it in results:
-                url = it.get("url")
-                if not url:
-                    continue
-                out.append({
-                    "url": url,
-                    "title": it.get("title"),
-                    "score": it.get("rrf"),
-                    "source": "web_search",
-                })
-            return out
-        except Exception:
-            return []
+    limit = int(payload.get("search_limit") or plan.search_limit)
+    timeout = remaining(plan.per_step_s or 20)
+    try:
+        j = await asyncio.wait_for(
+            core_service.search({"name": name, "keywords": keywords, "limit": limit}), timeout
+        )
+        results = j.get("results") or []
+        # Normalize shape: url, title, score
+        out: List[Dict[str, Any]] = []
+        for it in results:
+            url = it.get("url")
+            if not url:
+                continue
+            out.append({
+                "url": url,
+                "title": it.get("title"),
+                "score": it.get("rrf"),
+                "source": "web_search",
+            })
+        return out
+    except Exception:
+        return []
 
 
 async def ingest_urls(urls: List[str], *, text: str | None = None, timeout: float | None = None) -> Dict[str, Any] | None:
-    if not urls or httpx is None:
+    if not urls:
+        return None
+    try:
+        return await asyncio.wait_for(core_service.ingest(urls, text or ""), remaining(timeout or 20.0))
+    except Exception:
         return None
-    async with httpx.AsyncClient(timeout=timeout or 20.0) as client:  # type: ignore[attr-defined]
-        try:
-            return await _call_local(client, "/ingest_urls", {"urls": urls, "text": text or ""})
-        except Exception:
-            return None
 
 
-async def run_hybrid(cfg: Dict[str, Any], payload: Dict[str, Any]) -> List[Dict[str, Any]]:
-    if httpx is None:
-        return []
+async def run_hybrid(plan: Plan, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
     name = payload.get("name", "")
     keywords = payload.get("keywords", [])
     query = f"{name} " + " ".join(keywords)
     results: List[Dict[str, Any]] = []
 
-    timeout = cfg.get("guardrails", {}).get("timeouts", {}).get("per_step_s", 20)
-    async with httpx.AsyncClient(timeout=timeout) as client:  # type: ignore[attr-defined]
-        # Prefer internal /search_hybrid if exists
-        try:
-            k = (
-                cfg.get("plan", {})
-                .get("steps", [{}])
-                [2]
-                .get("engines", {})
-                .get("opensearch", {})
-                .get("k", 20)
+    timeout = remaining(plan.per_step_s or 20)
+    try:
+        k = int(((step_cfg(plan, "hybrid_search").get("engines") or {}).get("opensearch") or {}).get("k") or 20)
+        j = await asyncio.wait_for(core_service.search_hybrid(query, k), timeout)
+        for it in (j.get("results", []) or []):
+            results.append(
+                {
+                    "url": it.get("url"),
+                    "title": it.get("title"),
+                    "domain": it.get("domain"),
+                    "source": it.get("source", "hybrid"),
+                    "score": it.get("rrf") or it.get("score"),
+                }
             )
-            j = await _call_local(client, "/search_hybrid", {"query": query, "k": k})
-            for it in (j.get("results", []) or []):
-                results.append(
-                    {
-                        "url": it.get("url"),
-                        "title": it.get("title"),
-                        "domain": it.get("domain"),
-                        "source": it.get("source", "hybrid"),
-                        "score": it.get("rrf") or it.get("score"),
-                    }
-                )
-        except Exception:
-            pass
+    except Exception:
+        pass
     # Dedupe
     seen = set()
     deduped: List[Dict[str, Any]] = []
@@ -105,41 +87,13 @@ async def run_hybrid(cfg: Dict[str, Any], payload: Dict[str, Any]) -> List[Dict[
     return deduped
 
 
-async def fallback_orchestrate(cfg: Dict[str, Any], payload: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
-    """
-    New fallback path when no URLs provided:
-      1) Web search to collect candidate URLs
-      2) Ingest top-N URLs
-      3) Hybrid search over non-empty index
-      4) Discover media (images, pdfs)
-      5) Export (CSV/JSON), optionally split by entity
-    Returns: (exports_meta, results_list)
-    If web search yields 0 URLs, returns ({}, []).
-    """
-    # 1) Web search
-    web_hits = await web_search(cfg, payload)
-    urls = [h.get("url") for h in (web_hits or []) if h.get("url")]
-    if not urls:
-        return ({}, [])
-
-    # 2) Ingest
-    ingest_limit = int(payload.get("ingest_limit") or cfg.get("fallback", {}).get("ingest_limit", 10))
-    await ingest_urls(urls[:ingest_limit], text=None)
-
-    # 3) Hybrid
-    results = await run_hybrid(cfg, payload)
-
-    # 4) Media
-    media = await discover_media(cfg, payload)
-    results.extend(media or [])
-
-    # 5) Export
-    exp_cfg = next((s for s in cfg.get("plan", {}).get("steps", []) if s.get("name") == "export"), None)
+def _export(plan: Plan, payload: Dict[str, Any], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    exp_cfg = step_cfg(plan, "export")
     if not exp_cfg:
         outdir = payload.get("export_dir") or "exports"
         fname = filename_from_template("run_{yyyy}{mm}{dd}_{HH}{MM}{SS}_{slug(name)}.ext", payload.get("name", "run"))
         csv_path, json_path = export(results, outdir, fname, payload.get("name", "run"), formats=("csv", "json"), split_by_entity=True)
-        return ({"csv": csv_path, "json": json_path}, results)
+        return {"csv": csv_path, "json": json_path}
 
     outdir = exp_cfg.get("dir") or payload.get("export_dir") or "exports"
     fname = filename_from_template(exp_cfg.get("filename_template", "run_{yyyy}{mm}{dd}_{HH}{MM}{SS}_{slug(name)}.ext"), payload.get("name", "run"))
@@ -151,4 +105,71 @@ async def fallback_orchestrate(cfg: Dict[str, Any], payload: Dict[str, Any]) ->
         formats=tuple(exp_cfg.get("formats", ["csv", "json"])),
         split_by_entity=bool(exp_cfg.get("split_by_entity", True)),
     )
-    return ({"csv": csv_path, "json": json_path}, results)
+    return {"csv": csv_path, "json": json_path}
+
+
+def fallback_steps(plan: Plan, payload: Dict[str, Any]) -> List[Step]:
+    """
+    Fallback plan as a DAG (step names match `plan.steps` in the YAML):
+      auto_discovery ─> ingest ─> hybrid_search ─┐
+      media_discovery ───────────────────────────┴─> export
+    """
+    async def auto_discovery(ctx):
+        web_hits = await web_search(plan, payload)
+        urls = [h.get("url") for h in (web_hits or []) if h.get("url")]
+        # no URLs -> nothing downstream can run (ingest/hybrid/export are skipped)
+        return {"urls": urls} if urls else {}
+
+    async def ingest(ctx):
+        ingest_limit = int(payload.get("ingest_limit") or plan.ingest_limit)
+        return {"ingested": await ingest_urls(ctx["urls"][:ingest_limit], text=None)}
+
+    async def hybrid_search(ctx):
+        return {"hybrid_results": await run_hybrid(plan, payload)}
+
+    async def media_discovery(ctx):
+        return {"media": await discover_media(plan, payload) or []}
+
+    async def export_step(ctx):
+        results = list(ctx.get("hybrid_results") or []) + list(ctx.get("media") or [])
+        return {"results": results, "exports": await asyncio.to_thread(_export, plan, payload, results)}
+
+    return apply_plan([
+        Step("auto_discovery", auto_discovery, provides=("urls",)),
+        Step("ingest", ingest, requires=("urls",), provides=("ingested",)),
+        Step("hybrid_search", hybrid_search, requires=("ingested",), provides=("hybrid_results",)),
+        Step("media_discovery", media_discovery, provides=("media",)),
+        Step("export", export_step, requires=("hybrid_results", "media"), provides=("results", "exports")),
+    ], plan)
+
+
+async def fallback_orchestrate(plan: Plan, payload: Dict[str, Any],
+                               trace: Dict[str, Any] | None = None,
+                               on_event: EventFn | None = None,
+                               checkpoint: Checkpoint | None = None) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    New fallback path when no URLs provided:
+      1) Web search to collect candidate URLs
+      2) Ingest top-N URLs
+      3) Hybrid search over non-empty index
+      4) Discover media (images, pdfs) — concurrently with 1-3
+      5) Export (CSV/JSON), optionally split by entity
+    Returns: (exports_meta, results_list)
+    If web search yields 0 URLs, returns ({}, []).
+    When `trace` is given it receives the per-step timings report; `on_event`
+    is passed through to run_dag for streaming clients; with a `checkpoint`
+    steps that completed in an earlier attempt of the same run are not repeated.
+    The run is bounded by `deadline_s` (payload) or `guardrails.timeouts.global_s`;
+    steps cut off by it are flagged in the trace and the rest is returned as is.
+    """
+    ctx: Dict[str, Any] = {}
+    report = await run_dag(
+        fallback_steps(plan, payload), ctx,
+        concurrency=plan_concurrency(plan), continue_on_error=plan_continue_on_error(plan),
+        on_event=on_event, checkpoint=checkpoint, deadline_s=plan_deadline(plan, payload.get("deadline_s")),
+    )
+    if trace is not None:
+        trace.update(report.as_dict())
+    if not ctx.get("urls"):
+        return ({}, [])
+    return (ctx.get("exports") or {}, ctx.get("results") or [])
@@ -1,8 +1,9 @@
 from __future__ import annotations
 from typing import Dict, Any
-import hashlib, io, httpx, zipfile, xml.etree.ElementTree as ET
+import hashlib, io, zipfile, xml.etree.ElementTree as ET
 from PIL import Image
 from PIL.ExifTags import TAGS, GPSTAGS
+from . import http_pool
 
 _MAX_BYTES = 15 * 1024 * 1024
 
@@ -72,12 +73,11 @@ def sniff_and_parse(content_type: str, data: bytes) -> Dict[str, Any]:
     return {"type":"unknown","meta":{}}
 
 async def extract_metadata_from_url(url: str, *, timeout=15.0) -> Dict[str, Any]:
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        r = await client.get(url)
-        r.raise_for_status()
-        data = r.content[:_MAX_BYTES]
-        out = sniff_and_parse(r.headers.get("Content-Type",""), data)
-        out["sha256"] = _sha256(data)
-        out["url"] = url
-        return out
+    r = await http_pool.client("fetch").get(url, timeout=timeout)
+    r.raise_for_status()
+    data = r.content[:_MAX_BYTES]
+    out = sniff_and_parse(r.headers.get("Content-Type",""), data)
+    out["sha256"] = _sha256(data)
+    out["url"] = url
+    return out
 
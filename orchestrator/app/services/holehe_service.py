@@ -1,6 +1,8 @@
 import asyncio, json, os, random
 from typing import List, Dict, Any
 from .opensearch_client import index_email_accounts
+from .bulkhead import bulkhead
+from .scheduler import remaining
 
 REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "40"))
 BACKOFF = float(os.getenv("RETRY_BACKOFF_SECONDS", "2.5"))
@@ -23,17 +25,21 @@ async def _run_holehe(email: str) -> List[Dict[str, Any]]:
       {"name": "...", "rateLimit": false, "exists": true, "emailrecovery": "...", "phoneNumber": "...", "others": ...}
     """
     cmd = ["holehe", "-j", "--only-used", email]
-    proc = await asyncio.create_subprocess_exec(
-        *cmd,
-        env=_env_with_proxy(),
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    try:
-        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=REQUEST_TIMEOUT)
-    except asyncio.TimeoutError:
-        proc.kill()
-        raise RuntimeError("holehe timed out")
+    async with bulkhead("holehe"):
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            env=_env_with_proxy(),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=remaining(REQUEST_TIMEOUT))
+        except asyncio.TimeoutError:
+            proc.kill()
+            raise RuntimeError("holehe timed out")
+        except asyncio.CancelledError:
+            proc.kill()  # run deadline / client gone: don't leave the CLI behind
+            raise
     if proc.returncode not in (0,):
         raise RuntimeError(f"holehe failed: {stderr.decode(errors='ignore')}")
     raw = stdout.decode().strip()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+import os, asyncio, weakref
+from typing import Dict
+import httpx
+try:
+    import h2  # noqa: F401  (httpx needs it for http2=True)
+except Exception:
+    h2 = None
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except Exception:
+    requests = None
+
+# Pooled outbound HTTP clients, one per upstream ("searxng", "google", "fetch", ...),
+# shared by every connector so keep-alive connections (and TLS sessions) are reused
+# across calls and requests. Clients are created lazily and closed by the app
+# lifespan (aclose_all). Per-call timeouts are still passed on each request.
+#   HTTP2=true                    HTTP/2 where the upstream supports it (needs h2)
+#   HTTP_MAX_CONNECTIONS=100      per-upstream connection cap
+#   HTTP_POOL_<NAME>=n            override for one upstream
+#   HTTP_MAX_KEEPALIVE=20, HTTP_KEEPALIVE_EXPIRY=30, HTTP_TIMEOUT_SECONDS=30
+
+HTTP2 = os.getenv("HTTP2", "false").lower() == "true" and h2 is not None
+MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+DEFAULT_TIMEOUT = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+
+# async clients are bound to the loop they were created on: one set per running loop,
+# so a client is never handed to (or dropped by) another loop while its connections are open
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = weakref.WeakKeyDictionary()
+_sessions: Dict[str, "requests.Session"] = {}
+
+
+def _max_connections(name: str) -> int:
+    return int(os.getenv(f"HTTP_POOL_{name.upper()}", str(MAX_CONNECTIONS)))
+
+
+def client(name: str) -> httpx.AsyncClient:
+    """Shared AsyncClient for upstream `name` on the running loop; don't close it (or use it as a context manager)."""
+    clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    hit = clients.get(name)
+    if hit is not None and not hit.is_closed:
+        return hit
+    limit = _max_connections(name)
+    c = httpx.AsyncClient(
+        http2=HTTP2,
+        timeout=httpx.Timeout(DEFAULT_TIMEOUT),
+        limits=httpx.Limits(max_connections=limit, max_keepalive_connections=min(limit, MAX_KEEPALIVE),
+                            keepalive_expiry=KEEPALIVE_EXPIRY),
+    )
+    clients[name] = c
+    return c
+
+
+def session(name: str) -> "requests.Session":
+    """Shared requests.Session with a keep-alive pool, for the sync (threadpool) connectors."""
+    s = _sessions.get(name)
+    if s is None:
+        s = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=_max_connections(name))
+        s.mount("http://", adapter)
+        s.mount("https://", adapter)
+        _sessions[name] = s
+    return s
+
+
+async def aclose_all():
+    """Close the running loop's clients and the sync sessions (app lifespan shutdown)."""
+    clients = _clients.pop(asyncio.get_running_loop(), {})
+    for c in clients.values():
+        try:
+            await c.aclose()
+        except Exception:
+            pass
+    for s in list(_sessions.values()):
+        s.close()
+    _sessions.clear()
+
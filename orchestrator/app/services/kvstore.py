@@ -0,0 +1,77 @@
+from __future__ import annotations
+import os, json, time, hashlib
+from pathlib import Path
+from typing import Dict
+try:
+    import redis
+except Exception:
+    redis = None
+
+# Small hash-per-key store with TTL used for run state (checkpoints, delta snapshots).
+# Redis hash when REDIS_URL is reachable, else one JSON file per key under a directory.
+
+
+class RedisStore:
+    def __init__(self, r):
+        self.r = r
+
+    def load(self, key: str) -> Dict[str, str]:
+        return self.r.hgetall(key) or {}
+
+    def save(self, key: str, fields: Dict[str, str], ttl: int):
+        pipe = self.r.pipeline(transaction=False)
+        pipe.hset(key, mapping=fields)
+        pipe.expire(key, ttl)
+        pipe.execute()
+
+
+class DiskStore:
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+    def load(self, key: str) -> Dict[str, str]:
+        p = self._path(key)
+        try:
+            data = json.loads(p.read_text("utf-8"))
+        except Exception:
+            return {}
+        if data.get("expires", 0) < time.time():
+            p.unlink(missing_ok=True)
+            return {}
+        return data.get("fields", {})
+
+    def save(self, key: str, fields: Dict[str, str], ttl: int):
+        self.root.mkdir(parents=True, exist_ok=True)
+        merged = {**self.load(key), **fields}
+        p = self._path(key)
+        tmp = p.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"expires": time.time() + ttl, "fields": merged}), "utf-8")
+        tmp.replace(p)
+
+
+_redis = None
+_redis_checked = False
+_disk: Dict[str, DiskStore] = {}
+
+
+def get_store(disk_dir: str):
+    """Shared Redis store if available, else a DiskStore rooted at `disk_dir`."""
+    global _redis, _redis_checked
+    if not _redis_checked:
+        _redis_checked = True
+        url = os.getenv("REDIS_URL")
+        if redis and url:
+            try:
+                r = redis.Redis.from_url(url, decode_responses=True)
+                r.ping()
+                _redis = RedisStore(r)
+            except Exception:
+                _redis = None
+    if _redis is not None:
+        return _redis
+    if disk_dir not in _disk:
+        _disk[disk_dir] = DiskStore(disk_dir)
+    return _disk[disk_dir]
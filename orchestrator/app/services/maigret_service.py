@@ -1,6 +1,8 @@
 import asyncio, json, os, random
 from typing import List, Dict, Any
 from .opensearch_client import ensure_indices  # ensure indices available when indexing
+from .bulkhead import bulkhead
+from .scheduler import remaining
 
 REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "60"))
 PROXY_POOL = [p.strip() for p in os.getenv("OUTBOUND_HTTP_PROXIES", "").split(",") if p.strip()]
@@ -29,17 +31,21 @@ async def _run_maigret(username: str) -> List[Dict[str, Any]]:
         "--timeout", os.getenv("MAIGRET_TIMEOUT", "30"),
         username,
     ]
-    proc = await asyncio.create_subprocess_exec(
-        *cmd,
-        env=_env_with_proxy(),
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    try:
-        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=REQUEST_TIMEOUT)
-    except asyncio.TimeoutError:
-        proc.kill()
-        raise RuntimeError("maigret timed out")
+    async with bulkhead("maigret"):
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            env=_env_with_proxy(),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=remaining(REQUEST_TIMEOUT))
+        except asyncio.TimeoutError:
+            proc.kill()
+            raise RuntimeError("maigret timed out")
+        except asyncio.CancelledError:
+            proc.kill()  # run deadline / client gone: don't leave the CLI behind
+            raise
     if proc.returncode not in (0,):
         # Some versions return non-zero even if partial output exists; try to parse anyway
         raw = stdout.decode(errors="ignore").strip()
@@ -1,49 +1,64 @@
-import os, time
+import os, time, asyncio, weakref
 from typing import List, Dict, Any, Optional
 
 try:
-    from opensearchpy import OpenSearch, RequestsHttpConnection  # type: ignore
-except Exception:  # pragma: no cover - dev/test env without opensearch-py
-    OpenSearch = None  # type: ignore
-    RequestsHttpConnection = None  # type: ignore
+    from opensearchpy import AsyncOpenSearch  # type: ignore
+except Exception:  # pragma: no cover - dev/test env without opensearch-py[async]
+    AsyncOpenSearch = None  # type: ignore
 
 EMAIL_IDX = "email_accounts"
 USERNAME_IDX = "usernames"
+POOL_MAXSIZE = int(os.getenv("OPENSEARCH_POOL_MAXSIZE", "25"))
 
+# One keep-alive connection pool per event loop (the aiohttp session is bound to the
+# loop that opened it): the app lifespan opens/closes the server loop's client, and
+# each asyncio.run (Celery tasks) gets its own, closed before that loop ends.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenSearch]" = weakref.WeakKeyDictionary()
 
-def _client() -> Optional["OpenSearch"]:
-    if OpenSearch is None:
-        return None
+
+def _conn_kwargs() -> Dict[str, Any]:
     url = os.getenv("OPENSEARCH_URL")
     if url:
-        return OpenSearch(  # type: ignore
-            hosts=[url],
-            use_ssl=url.startswith("https://"),
-            verify_certs=False,
-            connection_class=RequestsHttpConnection,  # type: ignore
-            timeout=20,
-        )
+        return {"hosts": [url], "use_ssl": url.startswith("https://"), "verify_certs": False}
     host = os.getenv("OPENSEARCH_HOST", "opensearch")
     port = int(os.getenv("OPENSEARCH_PORT", "9200"))
     user = os.getenv("OPENSEARCH_USER", "admin")
     pwd = os.getenv("OPENSEARCH_PASSWORD", "admin")
-    return OpenSearch(  # type: ignore
-        hosts=[{"host": host, "port": port}],
-        http_auth=(user, pwd),
-        use_ssl=False,
-        verify_certs=False,
-        connection_class=RequestsHttpConnection,  # type: ignore
-        timeout=20,
-    )
+    return {"hosts": [{"host": host, "port": port}], "http_auth": (user, pwd), "use_ssl": False, "verify_certs": False}
+
+
+def get_client() -> Optional["AsyncOpenSearch"]:
+    """Async client of the running loop; created lazily when used outside the lifespan (tests, scripts)."""
+    if AsyncOpenSearch is None:
+        return None
+    loop = asyncio.get_running_loop()
+    c = _clients.get(loop)
+    if c is None:
+        c = _clients[loop] = AsyncOpenSearch(**_conn_kwargs(), maxsize=POOL_MAXSIZE, timeout=20)  # type: ignore
+    return c
+
+
+async def init_client():
+    get_client()
+
+
+async def close_client():
+    """Close the running loop's client (a later get_client() on this loop opens a new one)."""
+    c = _clients.pop(asyncio.get_running_loop(), None)
+    if c is not None:
+        try:
+            await c.close()
+        except Exception:
+            pass
 
 
 async def ensure_indices():
-    c = _client()
+    c = get_client()
     if c is None:
         return
     try:
-        if not c.indices.exists(index=EMAIL_IDX):
-            c.indices.create(index=EMAIL_IDX, body={
+        if not await c.indices.exists(index=EMAIL_IDX):
+            await c.indices.create(index=EMAIL_IDX, body={
                 "mappings": {"properties": {
                     "email": {"type": "keyword"},
                     "service": {"type": "keyword"},
@@ -54,8 +69,8 @@ async def ensure_indices():
                     "ts": {"type": "date"}
                 }}
             })
-        if not c.indices.exists(index=USERNAME_IDX):
-            c.indices.create(index=USERNAME_IDX, body={
+        if not await c.indices.exists(index=USERNAME_IDX):
+            await c.indices.create(index=USERNAME_IDX, body={
                 "mappings": {"properties": {
                     "username": {"type": "keyword"},
                     "site": {"type": "keyword"},
@@ -72,7 +87,7 @@ async def ensure_indices():
 async def index_email_accounts(email: str, hits: List[Dict[str, Any]]):
     if not hits:
         return
-    c = _client()
+    c = get_client()
     if c is None:
         return
     try:
@@ -91,7 +106,7 @@ async def index_email_accounts(email: str, hits: List[Dict[str, Any]]):
                 "ts": now,
             })
         body = "\n".join(json.dumps(x) for x in actions) + "\n"
-        c.bulk(body=body)
+        await c.bulk(body=body)
     except Exception:
         # Non-fatal if OS is not reachable
         pass
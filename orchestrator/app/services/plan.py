@@ -0,0 +1,225 @@
+from __future__ import annotations
+import os, re, logging, threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+try:
+    import yaml  # type: ignore
+except Exception:
+    yaml = None  # type: ignore
+
+# Orchestration plan (config/orchestrator.fallback.yaml) compiled once into typed,
+# validated objects. load_plan() keeps the compiled plan per path and re-reads the
+# file only when its mtime/size change: edits apply without a restart and requests
+# no longer pay for YAML parsing. An edit that fails validation is logged and the
+# last good plan stays in use; at startup the same error aborts the boot.
+# A Plan is shared by every request, so it is immutable: consumers read its typed
+# fields (and step options through read-only views) instead of the YAML dict.
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PATH = "/app/config/orchestrator.fallback.yaml"
+_ENV = re.compile(r"\$\{([A-Z0-9_]+)\}")
+
+
+class PlanError(ValueError):
+    """Invalid orchestration plan; the message names the offending key."""
+
+
+def expand_env(value: Any) -> Any:
+    """Replace ${VAR} in every string of a parsed YAML tree (unset -> "")."""
+    if isinstance(value, str):
+        return _ENV.sub(lambda m: os.getenv(m.group(1), ""), value)
+    if isinstance(value, dict):
+        return {k: expand_env(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [expand_env(v) for v in value]
+    return value
+
+
+@dataclass(frozen=True)
+class StepPlan:
+    name: str
+    enabled: bool = True
+    timeout_s: Optional[float] = None
+    retries: Optional[int] = None  # None: keep the step's own default
+    options: Mapping[str, Any] = field(default_factory=dict)  # the step's full mapping (read-only)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.options.get(key, default)
+
+
+@dataclass(frozen=True)
+class Plan:
+    steps: Mapping[str, StepPlan] = field(default_factory=dict)
+    per_step_s: Optional[float] = None
+    global_s: Optional[float] = None
+    batch_s: Optional[float] = None
+    max_parallel_steps: Optional[int] = None
+    continue_on_error: bool = True
+    bulkheads: Mapping[str, int] = field(default_factory=dict)  # upstream -> limit (provider `parallel` + guardrails)
+    fallback_enabled: bool = True
+    search_limit: int = 10
+    ingest_limit: int = 10
+    source: Optional[str] = None
+
+    def step(self, name: str) -> Optional[StepPlan]:
+        return self.steps.get(name)
+
+
+def step_cfg(plan: Plan, name: str) -> Mapping[str, Any]:
+    """Read-only options of the step called `name` ({} when the plan has no such step)."""
+    st = plan.step(name)
+    return st.options if st is not None else {}
+
+
+def _mapping(v: Any, where: str) -> Dict[str, Any]:
+    if v is None:
+        return {}
+    if not isinstance(v, dict):
+        raise PlanError(f"{where}: expected a mapping, got {type(v).__name__}")
+    return v
+
+
+def _number(m: Dict[str, Any], key: str, where: str, *, integer: bool = False,
+            minimum: Optional[int] = None) -> Optional[float]:
+    v = m.get(key)
+    if v is None or v == "":
+        m.pop(key, None)
+        return None
+    try:
+        if isinstance(v, bool):
+            raise ValueError
+        n = int(v) if integer else float(v)
+    except (TypeError, ValueError):
+        raise PlanError(f"{where}.{key}: expected a number, got {v!r}")
+    if (n < minimum) if minimum is not None else (n <= 0):
+        raise PlanError(f"{where}.{key}: must be {'> 0' if minimum is None else f'>= {minimum}'}, got {v!r}")
+    m[key] = n
+    return n
+
+
+def _flag(m: Dict[str, Any], key: str, where: str, default: bool) -> bool:
+    v = m.get(key, default)
+    if isinstance(v, str) and v.lower() in ("true", "false", "1", "0", "yes", "no"):
+        v = v.lower() in ("true", "1", "yes")
+    if not isinstance(v, bool):
+        raise PlanError(f"{where}.{key}: expected true/false, got {v!r}")
+    m[key] = v
+    return v
+
+
+def compile_plan(data: Any, source: Optional[str] = None) -> Plan:
+    """Validate a parsed (not yet env-expanded) plan document and build a Plan."""
+    raw = _mapping(expand_env(data), "<root>")
+
+    steps: Dict[str, StepPlan] = {}
+    bulkheads: Dict[str, int] = {}
+    plan_sec = _mapping(raw.get("plan"), "plan")
+    step_list = plan_sec.get("steps") or []
+    if not isinstance(step_list, list):
+        raise PlanError("plan.steps: expected a list")
+    for i, st in enumerate(step_list):
+        where = f"plan.steps[{i}]"
+        st = _mapping(st, where)
+        name = st.get("name")
+        if not isinstance(name, str) or not name.strip():
+            raise PlanError(f"{where}.name: required")
+        where = f"plan.steps[{name}]"
+        if name in steps:
+            raise PlanError(f"{where}: duplicate step name")
+        for prov in st.get("providers", []) or []:
+            par = _number(_mapping(st.get(prov), f"{where}.{prov}"), "parallel", f"{where}.{prov}", integer=True)
+            if par:
+                bulkheads[prov] = int(par)
+        retries = _number(st, "retries", where, integer=True, minimum=0)
+        steps[name] = StepPlan(
+            name=name,
+            enabled=_flag(st, "enabled", where, True),
+            timeout_s=_number(st, "timeout_s", where),
+            retries=int(retries) if retries is not None else None,
+            options=MappingProxyType(st),
+        )
+
+    g = _mapping(raw.get("guardrails"), "guardrails")
+    timeouts = _mapping(g.get("timeouts"), "guardrails.timeouts")
+    for k in list(timeouts):
+        _number(timeouts, k, "guardrails.timeouts")
+    limits = _mapping(g.get("limits"), "guardrails.limits")
+    for k in list(limits):
+        _number(limits, k, "guardrails.limits", integer=True)
+    limited = _mapping(g.get("bulkheads"), "guardrails.bulkheads")
+    for k in list(limited):
+        lim = _number(limited, k, "guardrails.bulkheads", integer=True)
+        if lim:
+            bulkheads[k] = int(lim)  # overrides a provider's `parallel`
+    on_error = _mapping(g.get("on_error"), "guardrails.on_error")
+    fb = _mapping(raw.get("fallback"), "fallback")
+    max_parallel = limits.get("max_parallel_steps")
+
+    return Plan(
+        steps=MappingProxyType(steps),
+        per_step_s=timeouts.get("per_step_s"),
+        global_s=timeouts.get("global_s"),
+        batch_s=timeouts.get("batch_s"),
+        max_parallel_steps=int(max_parallel) if max_parallel is not None else None,
+        continue_on_error=_flag(on_error, "continue", "guardrails.on_error", True),
+        bulkheads=MappingProxyType(bulkheads),
+        fallback_enabled=_flag(fb, "enabled", "fallback", True),
+        search_limit=int(_number(fb, "search_limit", "fallback", integer=True) or 10),
+        ingest_limit=int(_number(fb, "ingest_limit", "fallback", integer=True) or 10),
+        source=source,
+    )
+
+
+def read_plan(path: str) -> Plan:
+    p = Path(path)
+    if not p.exists():
+        return Plan(source=path)
+    if yaml is None:
+        raise RuntimeError("PyYAML not installed. `pip install pyyaml`")
+    try:
+        data = yaml.safe_load(p.read_text(encoding="utf-8"))
+    except yaml.YAMLError as e:
+        raise PlanError(f"{path}: {e}")
+    return compile_plan(data, source=path)
+
+
+_cache: Dict[str, Tuple[Optional[Tuple[int, int]], Plan]] = {}
+_lock = threading.Lock()
+
+
+def _stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def load_plan(path: Optional[str] = None) -> Plan:
+    """
+    Compiled plan for `path` (default $ORCH_CONFIG), re-read only when the file changed.
+    Raises PlanError when the file is invalid and no earlier version compiled.
+    """
+    path = path or os.getenv("ORCH_CONFIG", DEFAULT_PATH)
+    stamp = _stamp(path)
+    hit = _cache.get(path)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    with _lock:
+        hit = _cache.get(path)
+        if hit is not None and hit[0] == stamp:
+            return hit[1]
+        try:
+            plan = read_plan(path)
+        except PlanError as e:
+            if hit is None:
+                raise
+            log.warning("plan reload failed, keeping previous version: %s", e)
+            _cache[path] = (stamp, hit[1])
+            return hit[1]
+        _cache[path] = (stamp, plan)
+        return plan
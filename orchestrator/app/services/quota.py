@@ -3,8 +3,9 @@ import httpx
 
 class QuotaExceeded(Exception): ...
 
-async def guarded_google_get(client: httpx.AsyncClient, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
-    r = await client.get(url, params=params)
+async def guarded_google_get(client: httpx.AsyncClient, url: str, params: Dict[str, Any],
+                             timeout: Any = httpx.USE_CLIENT_DEFAULT) -> Dict[str, Any]:
+    r = await client.get(url, params=params, timeout=timeout)
     if r.status_code in (403, 429):
         try:
             reason = r.json().get("error", {}).get("errors", [{}])[0].get("reason", "")
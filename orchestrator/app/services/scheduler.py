@@ -0,0 +1,223 @@
+from __future__ import annotations
+import asyncio, time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from .plan import Plan
+
+# Dependency-aware step runner for orchestration pipelines.
+# Each step reads what it `requires` from a shared context dict and returns a dict
+# of the keys it `provides`. A step starts as soon as all of its inputs exist, so
+# independent steps overlap and the run takes as long as its slowest chain.
+# With a global deadline every step attempt is bounded by the budget left, and
+# whatever is still running or waiting when it expires is cancelled as `cut_off`.
+
+StepFn = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+# on_event(result, outputs): called once per step when it settles (outputs is None unless ok)
+EventFn = Callable[["StepResult", Optional[Dict[str, Any]]], None]
+
+# absolute perf_counter() deadline of the run_dag the current task belongs to
+_deadline: ContextVar[Optional[float]] = ContextVar("run_deadline", default=None)
+
+
+def remaining(default: Optional[float] = None) -> Optional[float]:
+    """Seconds left before the current run's deadline, capped at `default` (`default` outside a deadline)."""
+    d = _deadline.get()
+    if d is None:
+        return default
+    left = max(0.0, d - time.perf_counter())
+    return left if default is None else min(left, default)
+
+
+@dataclass
+class Step:
+    name: str
+    fn: StepFn
+    requires: Tuple[str, ...] = ()
+    provides: Tuple[str, ...] = ()
+    timeout_s: Optional[float] = None
+    retries: int = 0
+    enabled: bool = True
+
+
+@dataclass
+class StepResult:
+    name: str
+    status: str = "pending"  # ok | resumed | error | timeout | skipped | disabled | cancelled | cut_off
+    attempts: int = 0
+    started_s: Optional[float] = None  # offset from the start of the run
+    duration_s: Optional[float] = None
+    error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {k: v for k, v in self.__dict__.items() if v is not None}
+
+
+@dataclass
+class RunReport:
+    steps: Dict[str, StepResult] = field(default_factory=dict)
+    total_s: float = 0.0
+    deadline_s: Optional[float] = None
+
+    @property
+    def cut_off(self) -> List[str]:
+        return [n for n, r in self.steps.items() if r.status == "cut_off"]
+
+    def as_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"total_s": round(self.total_s, 3), "steps": [r.as_dict() for r in self.steps.values()]}
+        if self.deadline_s is not None:
+            out.update(deadline_s=self.deadline_s, cut_off=self.cut_off)
+        return out
+
+
+def apply_plan(steps: List[Step], plan: Plan) -> List[Step]:
+    """Fill timeout_s / retries / enabled from the plan's steps (matched by name) and guardrails."""
+    for st in steps:
+        sp = plan.step(st.name)
+        if sp is not None:
+            st.enabled = st.enabled and sp.enabled
+            if sp.retries is not None:
+                st.retries = sp.retries
+        st.timeout_s = (sp.timeout_s if sp is not None else None) or st.timeout_s or plan.per_step_s
+    return steps
+
+
+def plan_concurrency(plan: Plan, default: int = 4) -> int:
+    return plan.max_parallel_steps or default
+
+
+def plan_continue_on_error(plan: Plan) -> bool:
+    return plan.continue_on_error
+
+
+def plan_deadline(plan: Plan, requested: Optional[float] = None) -> Optional[float]:
+    """Whole-run budget: the request's own value, else `guardrails.timeouts.global_s`."""
+    if requested:
+        return float(requested)
+    return plan.global_s
+
+
+async def _run_step(step: Step, ctx: Dict[str, Any], res: StepResult, sem: asyncio.Semaphore, t0: float):
+    async with sem:
+        res.started_s = round(time.perf_counter() - t0, 3)
+        start = time.perf_counter()
+        try:
+            for attempt in range(step.retries + 1):
+                left = remaining()
+                if left is not None and left <= 0:
+                    res.status, res.error = "cut_off", "global deadline reached"
+                    return None
+                budgets = [t for t in (step.timeout_s or None, left) if t is not None]
+                timeout = min(budgets) if budgets else None
+                res.attempts = attempt + 1
+                try:
+                    coro = step.fn(ctx)
+                    out = await (asyncio.wait_for(coro, timeout) if timeout is not None else coro)
+                    res.status, res.error = "ok", None
+                    return out or {}
+                except asyncio.TimeoutError:
+                    if left is not None and timeout == left:
+                        res.status, res.error = "cut_off", "global deadline reached"
+                        return None
+                    res.status, res.error = "timeout", f"exceeded {step.timeout_s}s"
+                except Exception as e:
+                    res.status, res.error = "error", str(e) or e.__class__.__name__
+            return None
+        finally:
+            res.duration_s = round(time.perf_counter() - start, 3)
+
+
+async def run_dag(steps: List[Step], ctx: Dict[str, Any], *, concurrency: int = 4,
+                  continue_on_error: bool = True, on_event: Optional[EventFn] = None,
+                  checkpoint=None, deadline_s: Optional[float] = None) -> RunReport:
+    """
+    Run `steps` against `ctx` (mutated in place with every step's outputs).
+    Steps whose inputs can no longer be produced (producer failed, disabled or
+    skipped) are marked `skipped`. With continue_on_error=False the first
+    failure cancels everything still running.
+    `on_event` is notified as each step finishes, fails or is skipped.
+    With a `checkpoint` (services.checkpoint.Checkpoint) steps completed by an
+    earlier attempt of the same run are restored (`resumed`) instead of re-run,
+    and every newly completed step is saved (only when it produced all of its
+    `provides` keys with a value, so degraded outputs are retried on resume).
+    With `deadline_s` each step attempt gets at most the budget left (also
+    readable from inside steps via `remaining()`); at the deadline running and
+    waiting steps are cancelled and marked `cut_off`, and ctx keeps what finished.
+    """
+    def settle(name: str, status: Optional[str] = None, out: Optional[Dict[str, Any]] = None):
+        res = report.steps[name]
+        if status:
+            res.status = status
+        if on_event:
+            on_event(res, out)
+
+    report = RunReport(steps={s.name: StepResult(s.name) for s in steps}, deadline_s=deadline_s)
+    sem = asyncio.Semaphore(max(1, concurrency))
+    t0 = time.perf_counter()
+    deadline = t0 + deadline_s if deadline_s else None
+    token = _deadline.set(deadline) if deadline is not None else None
+    expired = False
+    done_before = await asyncio.to_thread(checkpoint.completed) if checkpoint is not None else {}
+    waiting = []
+    for s in steps:
+        if not s.enabled:
+            settle(s.name, "disabled")
+        elif s.name in done_before:
+            ctx.update(done_before[s.name])
+            settle(s.name, "resumed", done_before[s.name])
+        else:
+            waiting.append(s)
+    running: Dict[asyncio.Task, Step] = {}
+
+    try:
+        while waiting or running:
+            if deadline is not None and time.perf_counter() >= deadline:
+                expired = True
+                break
+            for s in list(waiting):
+                if all(k in ctx for k in s.requires):
+                    waiting.remove(s)
+                    task = asyncio.create_task(_run_step(s, ctx, report.steps[s.name], sem, t0))
+                    running[task] = s
+            # drop steps whose inputs nobody can provide any more
+            changed = True
+            while changed:
+                changed = False
+                for s in list(waiting):
+                    others = [w for w in waiting if w is not s] + list(running.values())
+                    if any(k not in ctx and not any(k in o.provides for o in others) for k in s.requires):
+                        waiting.remove(s)
+                        settle(s.name, "skipped")
+                        changed = True
+            if not running:
+                break
+            left = deadline - time.perf_counter() if deadline is not None else None
+            done, _ = await asyncio.wait(running, timeout=left, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                s = running.pop(task)
+                out = task.result()
+                settle(s.name, out=out)
+                if out is not None:
+                    ctx.update(out)
+                    if checkpoint is not None and all(out.get(k) is not None for k in s.provides):
+                        await asyncio.to_thread(checkpoint.save, s.name, out)
+                elif report.steps[s.name].status == "cut_off":
+                    expired = True
+                elif not continue_on_error:
+                    raise RuntimeError(f"step '{s.name}' failed: {report.steps[s.name].error}")
+    finally:
+        if token is not None:
+            _deadline.reset(token)
+        for s in waiting:  # unreachable (e.g. dependency cycle) or abandoned after a failure
+            report.steps[s.name].status = "cut_off" if expired else "skipped"
+        for task, s in running.items():
+            task.cancel()
+            report.steps[s.name].status = "cut_off" if expired else "cancelled"
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+        if expired:
+            for s in list(waiting) + list(running.values()):
+                report.steps[s.name].error = "global deadline reached"
+                settle(s.name)
+        report.total_s = time.perf_counter() - t0
+    return report
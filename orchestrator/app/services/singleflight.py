@@ -0,0 +1,114 @@
+from __future__ import annotations
+import json, asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+# Cross-target call sharing for batch orchestration.
+# Inside `scope()`, identical upstream calls (same namespace + key) made by any
+# target run once: later callers await the first caller's in-flight result.
+# Outside a scope `shared()` simply calls through, so single runs are unchanged.
+
+_current: ContextVar[Optional["Memo"]] = ContextVar("singleflight_memo", default=None)
+
+
+def key_of(*parts: Any) -> str:
+    return json.dumps(parts, sort_keys=True, default=str)
+
+
+class Memo:
+    def __init__(self):
+        self._futs: Dict[str, asyncio.Future] = {}
+        self.calls: Dict[str, int] = {}
+        self.shared: Dict[str, int] = {}
+
+    def _count(self, ns: str, hit: bool, n: int = 1):
+        bucket = self.shared if hit else self.calls
+        bucket[ns] = bucket.get(ns, 0) + n
+
+    def _forget_on_error(self, k: str, fut: asyncio.Future):
+        # failures are not memoized: the next target retries the call
+        if fut.cancelled() or fut.exception() is not None:
+            if self._futs.get(k) is fut:
+                self._futs.pop(k, None)
+
+    async def do(self, ns: str, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        k = f"{ns}:{key}"
+        fut = self._futs.get(k)
+        if fut is None:
+            self._count(ns, False)
+            fut = asyncio.ensure_future(fn())
+            fut.add_done_callback(lambda f: self._forget_on_error(k, f))
+            self._futs[k] = fut
+        else:
+            self._count(ns, True)
+        # shield: a cancelled target must not cancel a call other targets are waiting on
+        return await asyncio.shield(fut)
+
+    async def do_many(self, ns: str, keys: Iterable[str],
+                      fn: Callable[[List[str]], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Batch variant: `fn` receives only the keys no other target has claimed yet."""
+        keys = list(dict.fromkeys(keys))
+        mine = [k for k in keys if f"{ns}:{k}" not in self._futs]
+        self._count(ns, True, len(keys) - len(mine))
+        if mine:
+            self._count(ns, False, len(mine))
+            loop = asyncio.get_running_loop()
+            pending = {k: loop.create_future() for k in mine}
+            for k, f in pending.items():
+                self._futs[f"{ns}:{k}"] = f
+                f.add_done_callback(lambda f, k=f"{ns}:{k}": self._forget_on_error(k, f))
+
+            async def run():
+                try:
+                    got = await fn(mine)
+                except BaseException as e:
+                    for f in pending.values():
+                        if f.done():
+                            continue
+                        if isinstance(e, Exception):
+                            f.set_exception(e)
+                        else:
+                            f.cancel()
+                    raise
+                for k, f in pending.items():
+                    if not f.done():
+                        f.set_result(got.get(k))
+            await asyncio.shield(asyncio.ensure_future(run()))
+        waits = {k: self._futs[f"{ns}:{k}"] for k in keys if f"{ns}:{k}" in self._futs}
+        vals = await asyncio.gather(*(asyncio.shield(f) for f in waits.values()), return_exceptions=True)
+        return {k: v for k, v in zip(waits, vals) if not isinstance(v, BaseException)}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": dict(self.calls), "shared": dict(self.shared)}
+
+    def close(self):
+        for f in self._futs.values():
+            if not f.done():
+                f.cancel()
+
+
+@contextmanager
+def scope():
+    memo = Memo()
+    token = _current.set(memo)
+    try:
+        yield memo
+    finally:
+        _current.reset(token)
+        memo.close()
+
+
+async def shared(ns: str, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+    memo = _current.get()
+    if memo is None:
+        return await fn()
+    return await memo.do(ns, key, fn)
+
+
+async def shared_many(ns: str, keys: Iterable[str],
+                      fn: Callable[[List[str]], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    memo = _current.get()
+    if memo is None:
+        return await fn(list(dict.fromkeys(keys)))
+    return await memo.do_many(ns, keys, fn)
@@ -0,0 +1,77 @@
+from __future__ import annotations
+import os, json, asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+from fastapi.responses import StreamingResponse
+from .scheduler import EventFn, StepResult
+
+# Progressive /orchestrate: one event per settled step, then the usual summary.
+#   sse    -> "event: step|summary|error" + "data: <json>" frames (text/event-stream)
+#   ndjson -> one {"event": ..., "data": ...} object per line (application/x-ndjson)
+# Closing the connection cancels the run, so abandoned requests stop consuming sidecars.
+
+MEDIA_TYPES = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+KEEPALIVE_S = float(os.getenv("STREAM_KEEPALIVE_S", "15"))
+
+Runner = Callable[[EventFn], Awaitable[Dict[str, Any]]]
+
+
+def stream_format(requested: Any = None, accept: Optional[str] = None) -> Optional[str]:
+    """Pick the wire format from the request's `stream` field, else from the Accept header."""
+    if isinstance(requested, str) and requested.lower() in MEDIA_TYPES:
+        return requested.lower()
+    if requested is True:
+        return "ndjson"
+    if requested is None and accept:
+        for fmt, mt in MEDIA_TYPES.items():
+            if mt in accept:
+                return fmt
+    return None
+
+
+def encode_event(fmt: str, event: str, data: Any) -> bytes:
+    body = json.dumps(data, ensure_ascii=False, default=str)
+    if fmt == "sse":
+        return f"event: {event}\ndata: {body}\n\n".encode("utf-8")
+    return (json.dumps({"event": event, "data": data}, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+async def stream_run(run: Runner, fmt: str) -> AsyncIterator[bytes]:
+    q: asyncio.Queue = asyncio.Queue()
+
+    def on_event(res: StepResult, out: Optional[Dict[str, Any]]):
+        q.put_nowait(("step", {**res.as_dict(), "data": out}))
+
+    async def runner():
+        try:
+            q.put_nowait(("summary", await run(on_event)))
+        except Exception as e:
+            q.put_nowait(("error", {"error": str(e) or e.__class__.__name__}))
+        finally:
+            q.put_nowait(None)
+
+    task = asyncio.create_task(runner())
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(q.get(), KEEPALIVE_S)
+            except asyncio.TimeoutError:
+                if fmt == "sse":
+                    yield b": keepalive\n\n"  # keeps proxies from idling out the connection
+                continue
+            if item is None:
+                break
+            yield encode_event(fmt, *item)
+    finally:
+        # client went away (or we are done): stop whatever is still running
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+def streaming_response(run: Runner, fmt: str) -> StreamingResponse:
+    return StreamingResponse(
+        stream_run(run, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        # identity: GZipMiddleware would otherwise hold events back in the compressor
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Content-Encoding": "identity"},
+    )
@@ -4,13 +4,19 @@ from celery import Celery
 broker = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 backend = os.getenv("REDIS_BACKEND", broker)
 
-celery_app = Celery("tracematrix", broker=broker, backend=backend)
-if os.getenv("CELERY_ALWAYS_EAGER", "1") == "1":
+celery_app = Celery("tracematrix", broker=broker, backend=backend, include=["orchestrator.tasks"])
+# eager = run inline in the API process (local dev without a worker)
+if os.getenv("CELERY_ALWAYS_EAGER", "0") == "1":
     celery_app.conf.task_always_eager = True
 celery_app.conf.update(
     task_serializer="json",
     result_serializer="json",
     accept_content=["json"],
-    result_expires=3600,
+    result_expires=int(os.getenv("CELERY_RESULT_EXPIRES", "86400")),
+    task_track_started=True,
+    # chunks are long-running: one at a time per worker process, re-delivered if a worker dies
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
 )
 
@@ -0,0 +1,177 @@
+from __future__ import annotations
+import os, time, sqlite3, hashlib, threading
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import redis
+except Exception:
+    redis = None
+
+CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "/app/cache/embeddings.sqlite3")
+CACHE_MAX_MB = float(os.getenv("EMBED_CACHE_MAX_MB", "512"))
+REDIS_TTL = int(os.getenv("EMBED_CACHE_REDIS_TTL", str(30 * 24 * 3600)))
+
+
+def _pack(vec: List[float]) -> bytes:
+    return array("f", vec).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    a = array("f")
+    a.frombytes(blob)
+    return a.tolist()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache: key = sha256(model name + extracted text).
+    Tier 1 is a local SQLite file with LRU eviction once it grows past max_bytes
+    (row sizes are stored and totalled as rows are written, so a put costs no table
+    scan; eviction drops the oldest rows in one batch down to 90% of the budget);
+    tier 2 (optional) is Redis, shared between workers/hosts.
+    """
+
+    def __init__(self, path: Optional[str] = CACHE_PATH, max_bytes: int = int(CACHE_MAX_MB * 1024 * 1024),
+                 redis_url: Optional[str] = None, redis_ttl: int = REDIS_TTL):
+        self.max_bytes = max_bytes
+        self.redis_ttl = redis_ttl
+        self.hits = {"disk": 0, "redis": 0}
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = None
+        self._r = None
+        self._used = 0  # payload bytes on disk, kept up to date by _put_disk/_evict
+        if path:
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS emb (k TEXT PRIMARY KEY, v BLOB NOT NULL, atime REAL NOT NULL,"
+                    " size INTEGER NOT NULL DEFAULT 0)"
+                )
+                cols = [r[1] for r in self._db.execute("PRAGMA table_info(emb)")]
+                if "size" not in cols:  # file written before sizes were stored
+                    self._db.execute("ALTER TABLE emb ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+                    self._db.execute("UPDATE emb SET size=LENGTH(v)")
+                self._db.execute("CREATE INDEX IF NOT EXISTS emb_atime ON emb(atime)")
+                self._used = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM emb").fetchone()[0]
+            except Exception:
+                self._db = None
+        if redis and redis_url:
+            try:
+                self._r = redis.Redis.from_url(redis_url)
+                self._r.ping()
+            except Exception:
+                self._r = None
+
+    @staticmethod
+    def key(model_name: str, text: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        wanted = list(dict.fromkeys(keys))
+        if self._db is not None and wanted:
+            with self._lock:
+                marks = ",".join("?" * len(wanted))
+                rows = self._db.execute(f"SELECT k, v FROM emb WHERE k IN ({marks})", wanted).fetchall()
+                if rows:
+                    now = time.time()
+                    self._db.executemany("UPDATE emb SET atime=? WHERE k=?", [(now, k) for k, _ in rows])
+            for k, v in rows:
+                found[k] = _unpack(v)
+            self.hits["disk"] += len(rows)
+        rest = [k for k in wanted if k not in found]
+        if self._r is not None and rest:
+            try:
+                blobs = self._r.mget([f"emb:{k}" for k in rest])
+            except Exception:
+                blobs = [None] * len(rest)
+            promoted = {}
+            for k, b in zip(rest, blobs):
+                if b:
+                    found[k] = _unpack(b)
+                    promoted[k] = found[k]
+            self.hits["redis"] += len(promoted)
+            if promoted:
+                self._put_disk(promoted)
+        self.misses += len([k for k in wanted if k not in found])
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        if not items:
+            return
+        self._put_disk(items)
+        if self._r is not None:
+            try:
+                pipe = self._r.pipeline(transaction=False)
+                for k, v in items.items():
+                    pipe.setex(f"emb:{k}", self.redis_ttl, _pack(v))
+                pipe.execute()
+            except Exception:
+                pass
+
+    def _put_disk(self, items: Dict[str, List[float]]):
+        if self._db is None:
+            return
+        now = time.time()
+        rows = []
+        for k, v in items.items():
+            blob = _pack(v)
+            rows.append((k, blob, now, len(blob)))
+        with self._lock:
+            marks = ",".join("?" * len(rows))
+            replaced = self._db.execute(f"SELECT COALESCE(SUM(size), 0) FROM emb WHERE k IN ({marks})",
+                                        [r[0] for r in rows]).fetchone()[0]
+            self._db.executemany("INSERT OR REPLACE INTO emb (k, v, atime, size) VALUES (?, ?, ?, ?)", rows)
+            self._used += sum(r[3] for r in rows) - replaced
+            if self._used > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # caller holds the lock; drop least-recently-used rows down to 90% of the budget in one batch
+        self._used = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM emb").fetchone()[0]  # other writers
+        if self._used <= self.max_bytes:
+            return
+        excess, doomed = self._used - int(self.max_bytes * 0.9), []
+        for k, size in self._db.execute("SELECT k, size FROM emb ORDER BY atime"):
+            if excess <= 0:
+                break
+            doomed.append((k,))
+            excess -= size
+            self._used -= size
+        self._db.executemany("DELETE FROM emb WHERE k=?", doomed)
+        self.evictions += len(doomed)
+
+    def stats(self) -> Dict[str, object]:
+        entries = 0
+        if self._db is not None:
+            with self._lock:
+                entries = self._db.execute("SELECT COUNT(*) FROM emb").fetchone()[0]
+        hits = sum(self.hits.values())
+        lookups = hits + self.misses
+        return {
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "disk_entries": entries,
+            "redis": self._r is not None,
+        }
+
+
+_cache: Optional[EmbeddingCache] = None
+
+
+def get_cache() -> Optional[EmbeddingCache]:
+    """Process-wide cache; disabled with EMBED_CACHE=0."""
+    global _cache
+    if os.getenv("EMBED_CACHE", "1") != "1":
+        return None
+    if _cache is None:
+        _cache = EmbeddingCache(redis_url=os.getenv("REDIS_URL"))
+    return _cache
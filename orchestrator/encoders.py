@@ -0,0 +1,179 @@
+from __future__ import annotations
+import os, re, json, math
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+MODEL_NAME = os.getenv("EMBED_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+EMBED_DIM = int(os.getenv("EMBED_DIM", "384"))
+ONNX_DIR = os.getenv("EMBED_ONNX_DIR", "/app/cache/onnx")
+ONNX_PATH = os.getenv("EMBED_ONNX_PATH")  # explicit file; default: one export per model under ONNX_DIR
+
+PARITY_TEXTS = [
+    "John Doe, software engineer in Athens",
+    "Γιάννης Παπαδόπουλος, αρχιτέκτονας στην Αθήνα",
+    "Contact: john.doe@example.com, +30 210 123 4567",
+    "Open source intelligence toolkit with hybrid BM25 and vector search",
+    "https://github.com/johndoe",
+]
+
+
+class TorchEncoder:
+    """Reference backend: full-precision SentenceTransformer on CPU/GPU."""
+    backend = "torch"
+
+    def __init__(self, model_name: str = MODEL_NAME):
+        from sentence_transformers import SentenceTransformer
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+
+    @property
+    def name(self) -> str:
+        return self.model_name if self.backend == "torch" else f"{self.model_name}#{self.backend}"
+
+    @property
+    def dim(self) -> int:
+        return int(self.model.get_sentence_embedding_dimension())
+
+    def encode(self, texts: List[str], batch_size: int = 32):
+        return self.model.encode(texts, batch_size=batch_size)
+
+
+class Int8Encoder(TorchEncoder):
+    """Same model with nn.Linear layers dynamically quantized to int8 (CPU only)."""
+    backend = "int8"
+
+    def __init__(self, model_name: str = MODEL_NAME):
+        import torch
+        super().__init__(model_name)
+        self.model = torch.quantization.quantize_dynamic(self.model.to("cpu"), {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def onnx_path(model_name: str) -> str:
+    """Where the ONNX export of `model_name` lives (exports of different models never collide)."""
+    if ONNX_PATH:
+        return ONNX_PATH
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "--", model_name).strip("-")
+    return str(Path(ONNX_DIR) / f"{slug}.onnx")
+
+
+class OnnxEncoder:
+    """
+    Transformer exported to ONNX and run with onnxruntime; mean pooling done in numpy.
+    Only the tokenizer is loaded at runtime: torch and the fp32 weights are needed
+    once, to export the model when its .onnx file is missing.
+    """
+    backend = "onnx"
+
+    def __init__(self, model_name: str = MODEL_NAME, path: Optional[str] = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+        self.model_name = model_name
+        path = path or onnx_path(model_name)
+        meta_path = Path(path).with_suffix(".json")
+        if not Path(path).exists() or not meta_path.exists():
+            _export_onnx(model_name, path)
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        self.max_len = int(meta["max_seq_length"])
+        self._dim = int(meta["dim"])
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    @property
+    def name(self) -> str:
+        return f"{self.model_name}#{self.backend}"
+
+    @property
+    def dim(self) -> int:
+        return self._dim
+
+    def encode(self, texts: List[str], batch_size: int = 32):
+        import numpy as np
+        out = []
+        for i in range(0, len(texts), batch_size):
+            enc = self.tokenizer(texts[i:i + batch_size], padding=True, truncation=True,
+                                 max_length=self.max_len, return_tensors="np")
+            hidden = self.session.run(None, {n: enc[n].astype(np.int64) for n in self.input_names})[0]
+            mask = enc["attention_mask"][..., None].astype(np.float32)
+            out.append((hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None))
+        return np.vstack(out) if out else np.zeros((0, self.dim), dtype=np.float32)
+
+
+def _export_onnx(model_name: str, path: str):
+    """One-off export (needs torch + sentence-transformers); writes the .onnx and a .json sidecar."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    hf = st_model[0].auto_model
+
+    class _Wrapped(torch.nn.Module):
+        def __init__(self, m):
+            super().__init__()
+            self.m = m
+
+        def forward(self, input_ids, attention_mask):
+            return self.m(input_ids=input_ids, attention_mask=attention_mask)[0]
+
+    sample = st_model.tokenizer(["export"], return_tensors="pt")
+    axes = {0: "batch", 1: "seq"}
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    torch.onnx.export(
+        _Wrapped(hf).eval(),
+        (sample["input_ids"], sample["attention_mask"]),
+        path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={"input_ids": axes, "attention_mask": axes, "last_hidden_state": axes},
+        opset_version=14,
+    )
+    meta = {"model": model_name, "max_seq_length": int(st_model.max_seq_length),
+            "dim": int(st_model.get_sentence_embedding_dimension())}
+    Path(path).with_suffix(".json").write_text(json.dumps(meta), encoding="utf-8")
+
+
+BACKENDS = {"torch": TorchEncoder, "int8": Int8Encoder, "onnx": OnnxEncoder}
+
+
+def load_encoder(backend: Optional[str] = None, model_name: str = MODEL_NAME):
+    backend = (backend or os.getenv("EMBED_BACKEND", "torch")).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown EMBED_BACKEND '{backend}' (expected one of {sorted(BACKENDS)})")
+    enc = BACKENDS[backend](model_name)
+    if enc.dim != EMBED_DIM:
+        raise ValueError(f"{enc.name} produces {enc.dim}-dim vectors but the index expects EMBED_DIM={EMBED_DIM}")
+    return enc
+
+
+def _cosine(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    na, nb = math.sqrt(sum(x * x for x in a)), math.sqrt(sum(y * y for y in b))
+    return dot / (na * nb) if na and nb else 0.0
+
+
+def parity_check(candidate, reference=None, texts: Optional[List[str]] = None,
+                 min_cosine: float = 0.99) -> Dict[str, Any]:
+    """Compare a backend's vectors with the reference (torch) backend on the same texts."""
+    reference = reference or load_encoder("torch", candidate.model_name)
+    texts = texts or PARITY_TEXTS
+    ref = [list(map(float, v)) for v in reference.encode(texts)]
+    got = [list(map(float, v)) for v in candidate.encode(texts)]
+    sims = [_cosine(a, b) for a, b in zip(ref, got)]
+    return {
+        "backend": candidate.backend,
+        "dim": candidate.dim,
+        "min_cosine": round(min(sims), 5),
+        "mean_cosine": round(sum(sims) / len(sims), 5),
+        "ok": candidate.dim == reference.dim and min(sims) >= min_cosine,
+    }
+
+
+if __name__ == "__main__":
+    import argparse, json
+    ap = argparse.ArgumentParser(description="Check an embedding backend against the torch reference")
+    ap.add_argument("--backend", default=os.getenv("EMBED_BACKEND", "int8"), choices=sorted(BACKENDS))
+    ap.add_argument("--min-cosine", type=float, default=0.99)
+    args = ap.parse_args()
+    report = parity_check(load_encoder(args.backend), min_cosine=args.min_cosine)
+    print(json.dumps(report, indent=2))
+    raise SystemExit(0 if report["ok"] else 1)
@@ -1,10 +1,22 @@
 from typing import List, Optional, Dict, Any, Set
 import os
 import re
+import io
+import csv
+import zlib
 import asyncio
 from urllib.parse import urlparse
 
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+try:
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+    import orjson  # noqa: F401  (ORJSONResponse needs it at render time)
+except Exception:
+    FastJSONResponse = JSONResponse  # type: ignore
 from pydantic import BaseModel, Field, EmailStr
 import httpx
 
@@ -17,26 +29,58 @@ from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
 from hybrid_rrf import reciprocal_rank_fusion
-from opensearch_client import create_index_if_not_exists, index_doc, bm25_search, knn_search, get_all_docs
+from opensearch_client import (create_index_if_not_exists, index_doc, index_docs, bm25_search, knn_search, iter_docs,
+                               hybrid_msearch, hybrid_pipeline_search, ensure_hybrid_pipeline, existing_ids)
 from phoneinfoga_connector import phoneinfoga_lookup
 from profession_filter import matches_profession
 from providers_min import google_search, verify_email_reacher
-from scrape_embed import fetch_and_embed, get_model
+from scrape_embed import fetch_and_embed, fetch_and_embed_many, encode_query, model_ready, warm_up
 from harvester_connector import run_theharvester
+from embed_cache import get_cache
 # NEW services
 from app.services.holehe_service import holehe_lookup_and_index
 from app.services.maigret_service import maigret_lookup
-from app.services.opensearch_client import ensure_indices
-
-app = FastAPI(title="OSINT Orchestrator (OSS)")
-
-# Ensure OpenSearch indices on startup (idempotent)
-@app.on_event("startup")
-async def _startup_indices():
+from app.services.opensearch_client import ensure_indices, init_client, close_client
+from app.services.config import load_cfg
+from app.services.plan import Plan, load_plan
+from app.services.scheduler import (EventFn, Step, RunReport, apply_plan, plan_concurrency, plan_continue_on_error,
+                                    plan_deadline, run_dag)
+from app.services.streaming import stream_format, streaming_response
+from app.services import bulkhead as bulkheads
+from app.services.bulkhead import bulkhead
+from app.services import checkpoint
+from app.services import http_pool
+from app.services import delta as delta_mode
+from app.services.batch import BATCH_CONCURRENCY, batch_budget, run_batch
+from app.services.singleflight import key_of, shared, shared_many
+from opensearch_client import close_client as close_sync_client
+
+EMBED_PRELOAD = os.getenv("EMBED_PRELOAD", "false").lower() == "true"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Ensure OpenSearch indices on startup (idempotent)
     try:
+        await init_client()
         await ensure_indices()
     except Exception:
         pass
+    # invalid plan YAML fails the boot instead of the first request
+    await bulkheads.configure(load_plan())
+    # Opt-in: load the embedding model in the background; /ready flips once it is usable
+    preload = None
+    if EMBED_PRELOAD:
+        preload = asyncio.create_task(asyncio.to_thread(warm_up))
+    yield
+    if preload is not None and not preload.done():
+        preload.cancel()
+    await close_client()
+    close_sync_client()
+    await http_pool.aclose_all()
+
+app = FastAPI(title="OSINT Orchestrator (OSS)", lifespan=lifespan)
+# Compress large JSON bodies (search results, orchestrate summaries) when the client accepts gzip
+app.add_middleware(GZipMiddleware, minimum_size=int(os.getenv("GZIP_MIN_BYTES", "1024")))
 
 # Mount static directory for exported CSVs
 app.mount(
@@ -76,6 +120,27 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def ready():
+    # without preload the model loads lazily on the first embed, so only a pending preload gates readiness
+    loaded = model_ready()
+    if EMBED_PRELOAD and not loaded:
+        return JSONResponse(status_code=503, content={"ready": False, "model_loaded": False})
+    return {"ready": True, "model_loaded": loaded}
+
+
+@app.get("/embed_cache/stats")
+def embed_cache_stats():
+    cache = get_cache()
+    return cache.stats() if cache else {"enabled": False}
+
+
+@app.get("/bulkheads")
+def bulkhead_stats():
+    """Per-upstream limit, in-flight calls, queue depth and wait times."""
+    return bulkheads.stats()
+
+
 @app.post("/search")
 def search(req: SearchRequest):
     q = f"\"{req.name}\" " + " ".join(req.keywords or [])
@@ -104,11 +169,15 @@ def verify_email(req: VerifyEmailReq):
 class IngestReq(BaseModel):
     urls: list[str]
     source: str | None = "web"
+    # pipelined: concurrent fetches + batched encode + one bulk request
+    pipelined: bool = True
 
 
 @app.post("/ingest_urls")
 def ingest_urls(req: IngestReq):
     create_index_if_not_exists()
+    if req.pipelined:
+        return _ingest_pipelined(req)
     results = []
     for u in req.urls:
         try:
@@ -121,45 +190,91 @@ def ingest_urls(req: IngestReq):
     return {"ingested": results}
 
 
+def _ingest_pipelined(req: IngestReq):
+    embedded = fetch_and_embed_many(req.urls)
+    docs = []
+    for u, emb in zip(req.urls, embedded):
+        if "error" not in emb:
+            docs.append({"url": u, "title": "", "snippet": "", "source": req.source, **emb})
+    try:
+        failed = index_docs(docs)
+    except Exception as e:
+        failed = {d["url"]: str(e) for d in docs}
+    results = []
+    for u, emb in zip(req.urls, embedded):
+        err = emb.get("error") or failed.get(u)
+        if err:
+            results.append({"url": u, "status": f"error:{err}"})
+        else:
+            results.append({"url": u, "status": "ok", "chars": len(emb.get("content", ""))})
+    return {"ingested": results}
+
+
 class HybridReq(BaseModel):
     query: str
     k: int = 10
+    # compact: drop `vector`, return only `fields`, and (with highlight) fragments instead of full content
+    compact: bool = False
+    fields: Optional[List[str]] = None
+    highlight: bool = False
+    # msearch: one round-trip, RRF here | pipeline: fused by OpenSearch | sequential: two searches
+    mode: Optional[str] = None
+
+
+HYBRID_MODE = os.getenv("HYBRID_MODE", "msearch")
+COMPACT_FIELDS = ["url", "title", "snippet", "source", "timestamp"]
+
+
+def _search_shape(req: HybridReq) -> Dict[str, Any]:
+    if not req.compact:
+        return {}
+    return {
+        "source_includes": req.fields or COMPACT_FIELDS,
+        "source_excludes": ["vector"],
+        "highlight_query": req.query if req.highlight else None,
+    }
+
+
+def _compact_doc(d: Dict[str, Any]) -> Dict[str, Any]:
+    frags = d.pop("highlight", None)
+    if frags:
+        d["content"] = " … ".join(frags)
+    return d
 
 
-@app.post("/search_hybrid")
+@app.post("/search_hybrid", response_class=FastJSONResponse)
 def search_hybrid(req: HybridReq):
     create_index_if_not_exists()
-    bm = bm25_search(req.query, size=req.k)
-    model = get_model()
-    qv = model.encode([req.query])[0].tolist()
-    kn = knn_search(qv, size=req.k)
-    bm_urls = [d["url"] for d in bm]
-    kn_urls = [d["url"] for d in kn]
-    fused_urls = reciprocal_rank_fusion([bm_urls, kn_urls], k=req.k)
-    url_to_doc = {d["url"]: d for d in bm + kn}
-    out = [url_to_doc.get(u, {"url": u}) for u in fused_urls]
+    shape = _search_shape(req)
+    qv = encode_query(req.query)
+    mode = (req.mode or HYBRID_MODE).lower()
+    if mode == "pipeline" and not ensure_hybrid_pipeline():
+        mode = "msearch"  # cluster without the RRF score-ranker (< 2.19): fuse here instead
+    if mode == "pipeline":
+        out = hybrid_pipeline_search(req.query, qv, size=req.k, **shape)
+    else:
+        if mode == "sequential":
+            bm = bm25_search(req.query, size=req.k, **shape)
+            kn = knn_search(qv, size=req.k, **shape)
+        else:
+            bm, kn = hybrid_msearch(req.query, qv, size=req.k, **shape)
+        bm_urls = [d["url"] for d in bm]
+        kn_urls = [d["url"] for d in kn]
+        fused_urls = reciprocal_rank_fusion([bm_urls, kn_urls], k=req.k)
+        url_to_doc = {d["url"]: d for d in bm + kn}
+        out = [url_to_doc.get(u, {"url": u}) for u in fused_urls]
+    if req.compact:
+        out = [_compact_doc(d) for d in out]
     return {"query": req.query, "results": out}
 
 
-@app.get("/export_csv")
-def export_csv(limit: Optional[int] = None):
-    """
-    Export all indexed documents to CSV.
-    Args:
-        limit: Optional limit on number of results. If None, exports all documents.
-    """
-    create_index_if_not_exists()
+EXPORT_COLUMNS = ["Person", "Email", "Phone", "URL", "Title", "Snippet", "Content_Preview", "Source", "Score"]
+EXPORT_SOURCE_FIELDS = ["url", "title", "snippet", "content", "source"]
 
-    # Χρήση get_all_docs για όλα τα αποτελέσματα ή bm25_search με limit
-    if limit is None:
-        hits = get_all_docs()
-    else:
-        export_limit = min(limit, 10000)  # OpenSearch max
-        hits = bm25_search("*", size=export_limit)
 
-    rows = []
-    for h in hits:
-        rows.append({
+def _export_rows(limit: Optional[int]):
+    for h in iter_docs(EXPORT_SOURCE_FIELDS, limit=limit):
+        yield {
             "Person": "",
             "Email": "",
             "Phone": "",
@@ -169,26 +284,99 @@ def export_csv(limit: Optional[int] = None):
             "Content_Preview": (h.get("content", "") or "")[:200],  # First 200 chars
             "Source": h.get("source", ""),
             "Score": h.get("_score", 0)
-        })
+        }
 
-    import pandas as pd
-    import time, uuid
 
+def _csv_chunks(rows, gzip_out: bool, rows_per_chunk: int = 500):
+    """Serialize rows to CSV text in small chunks (optionally gzip-compressed)."""
+    buf = io.StringIO()
+    w = csv.DictWriter(buf, fieldnames=EXPORT_COLUMNS)
+    w.writeheader()
+    z = zlib.compressobj(wbits=31) if gzip_out else None  # wbits=31 -> gzip container
+
+    def take():
+        data = buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+        return z.compress(data) if z else data
+
+    for n, row in enumerate(rows, start=1):
+        w.writerow(row)
+        if n % rows_per_chunk == 0:
+            yield take()
+    yield take()
+    if z:
+        yield z.flush()
+
+
+def _export_dir() -> Path:
     # Determine output directory (with env override)
-    out_dir_str = os.getenv("EXPORT_DIR", "/app/exports")
-    out_dir = Path(out_dir_str)
+    out_dir = Path(os.getenv("EXPORT_DIR", "/app/exports"))
 
     # Ensure directory exists and handle conflicts if it's a file
     if out_dir.exists() and not out_dir.is_dir():
         backup = out_dir.with_name(out_dir.name + ".bak")
         out_dir.rename(backup)
     out_dir.mkdir(parents=True, exist_ok=True)
+    return out_dir
+
+
+DELTA_COLUMNS = ["Change", "Type", "Value", "Person"]
+
+
+def _export_delta(person: str, target: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+    """Write the added/removed entities of a delta run as CSV (one row per change)."""
+    import time, uuid
+    fname = f"delta_{target[:12]}_{int(time.time())}_{uuid.uuid4().hex[:8]}.csv"
+    out_path = _export_dir() / fname
+    rows = 0
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=DELTA_COLUMNS)
+        w.writeheader()
+        for change in ("added", "removed"):
+            for kind, values in changes[change].items():
+                for v in values:
+                    w.writerow({"Change": change, "Type": kind, "Value": v, "Person": person})
+                    rows += 1
+    return {"file": str(out_path), "download_url": f"/exports/{fname}", "rows": rows}
+
+
+@app.get("/export_csv")
+def export_csv(limit: Optional[int] = None, stream: bool = False, gzip: bool = False):
+    """
+    Export all indexed documents to CSV.
+    Args:
+        limit: Optional limit on number of results. If None, exports all documents.
+        stream: Send the CSV as the response body instead of writing it under EXPORT_DIR.
+        gzip: Gzip-compress the CSV (.csv.gz).
+    Documents are paged from OpenSearch and written row by row, so memory use does
+    not depend on the index size.
+    """
+    create_index_if_not_exists()
+
+    import time, uuid
 
     # Unique filename to prevent race conditions
-    fname = f"entities_{int(time.time())}_{uuid.uuid4().hex[:8]}.csv"
-    out_path = out_dir / fname
+    fname = f"entities_{int(time.time())}_{uuid.uuid4().hex[:8]}.csv" + (".gz" if gzip else "")
+
+    if stream:
+        return StreamingResponse(
+            _csv_chunks(_export_rows(limit), gzip),
+            media_type="application/gzip" if gzip else "text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{fname}"'},
+        )
+
+    out_path = _export_dir() / fname
+    counter = {"rows": 0}
 
-    pd.DataFrame(rows).to_csv(out_path, index=False)
+    def counted(rows):
+        for r in rows:
+            counter["rows"] += 1
+            yield r
+
+    with open(out_path, "wb") as f:
+        for chunk in _csv_chunks(counted(_export_rows(limit)), gzip):
+            f.write(chunk)
 
     # Return metadata + download path
     download_path = f"/exports/{fname}"
@@ -196,8 +384,8 @@ def export_csv(limit: Optional[int] = None):
         "status": "ok",
         "file": str(out_path),
         "download_url": download_path,
-        "rows": len(rows),
-        "message": f"Exported {len(rows)} documents to CSV at {download_path}"
+        "rows": counter["rows"],
+        "message": f"Exported {counter['rows']} documents to CSV at {download_path}"
     }
 
 
@@ -355,28 +543,131 @@ class OrchestrateRequest(BaseModel):
     ingest_limit: int = 50
     export_limit: int = 1000
     include_phoneinfoga: bool = True
+    # "sse" | "ndjson": stream one event per finished step, then the summary
+    stream: Optional[str] = None
+    # resume: steps completed by an earlier attempt with this id (and same body) are not re-run
+    run_id: Optional[str] = None
+    # delta: enrich/ingest only entities not produced by this target's previous delta run,
+    # export the added/removed diff; target_id overrides the name/keywords/phone key
+    delta: bool = False
+    target_id: Optional[str] = None
+    # whole-run budget in seconds; default guardrails.timeouts.global_s
+    deadline_s: Optional[float] = None
 
 
 @app.post("/orchestrate")
-async def orchestrate(req: OrchestrateRequest):
+async def orchestrate(req: OrchestrateRequest, request: Request):
     """
     Multi-step orchestration endpoint + optional Holehe/Maigret steps.
+    Steps run as a dependency graph (see _orchestrate_steps); timings are in "steps".
+    With stream=sse|ndjson (or a matching Accept header) results arrive step by step.
+    """
+    fmt = stream_format(req.stream, request.headers.get("accept"))
+    if fmt:
+        return streaming_response(lambda on_event: _run_orchestrate(req, on_event), fmt)
+    return await _run_orchestrate(req)
+
+
+class BatchOrchestrateRequest(BaseModel):
+    targets: List[OrchestrateRequest]
+    concurrency: int = BATCH_CONCURRENCY  # targets running at once
+    budget_s: Optional[float] = None      # whole batch; default guardrails.timeouts.batch_s
+
+
+@app.post("/orchestrate/batch")
+async def orchestrate_batch(req: BatchOrchestrateRequest):
+    """
+    Run many targets under one budget. Searches, URL ingests, email verifications and
+    username/phone lookups that several targets need are done once and shared;
+    the CSV export runs once at the end instead of per target.
+    """
+    out = await run_batch(
+        req.targets, lambda t: _run_orchestrate(t, skip=("export",)),
+        concurrency=req.concurrency, budget_s=batch_budget(load_cfg(), req.budget_s),
+    )
+    try:
+        csv_data = await run_in_threadpool(export_csv)
+        out["csv_path"] = csv_data.get("file")
+    except Exception:
+        out["csv_path"] = "error"
+    return out
+
+
+async def _run_orchestrate(req: OrchestrateRequest, on_event: Optional[EventFn] = None,
+                           skip: tuple = ()) -> Dict[str, Any]:
+    plan = load_cfg()
+    await bulkheads.configure(plan)
+    run_id, ckpt = checkpoint.for_run(req.run_id, req.model_dump())
+    ctx: Dict[str, Any] = {"run_id": run_id}
+    state = prev = None
+    if req.delta:
+        state = delta_mode.DeltaState(delta_mode.target_key(req.name, req.keywords, req.phone, req.target_id))
+        prev = await run_in_threadpool(state.previous) or {}
+    client = http_pool.client("sidecars")
+    steps = _orchestrate_steps(req, client, plan, prev)
+    for st in steps:
+        if st.name in skip:
+            st.enabled = False
+    report = await run_dag(
+        steps, ctx,
+        concurrency=plan_concurrency(plan, default=8), continue_on_error=plan_continue_on_error(plan),
+        on_event=on_event, checkpoint=ckpt, deadline_s=plan_deadline(plan, req.deadline_s),
+    )
+    if state is not None and "urls_initial" in ctx and not report.cut_off:  # partial runs would fake removals
+        await run_in_threadpool(state.save, _delta_snapshot(ctx))
+    return _orchestrate_summary(req, ctx, report)
+
+
+def _delta_snapshot(ctx: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    Delta state of a run: found entities minus failed Reacher/social/PhoneInfoga lookups,
+    failed ingests and novel URLs left over by ingest_limit (the next run picks them up).
+    """
+    ingested = set((ctx.get("ingested") or {}).get("urls", []))
+    failed = {
+        "urls": {u for u in ctx.get("novel_urls", []) if u not in ingested} | set(ctx.get("novel_deferred", [])),
+        "emails": {r.get("email") for r in ctx.get("email_results") or [] if r.get("error")},
+        "usernames": {r.get("username") for r in ctx.get("social") or [] if r.get("error")},
+        "phones": {r.get("phone") for r in ctx.get("phoneinfoga") or [] if r.get("error")},
+    }
+    found = {
+        "urls": list(dict.fromkeys(ctx.get("urls_initial", []) + ctx.get("urls_hybrid", []))),
+        "emails": ctx.get("emails_found", []),
+        "usernames": ctx.get("usernames_found", []),
+        "phones": ctx.get("phones_considered", []),
+    }
+    return delta_mode.snapshot(found, failed)
+
+
+def _orchestrate_steps(req: OrchestrateRequest, client: httpx.AsyncClient, plan: Plan,
+                       prev: Optional[Dict[str, Any]] = None) -> List[Step]:
+    """
+    search ─┬─> phoneinfoga
+            ├─> social, maigret           (usernames)
+            ├─> enrich (Reacher), holehe  (emails)
+            └─> hybrid_search ─> ingest ─> export
+    Local steps (search, verify, hybrid, ingest, export) run in-process; the sync
+    implementations go to the threadpool. Only sidecars are reached over HTTP.
+    Upstream calls go through singleflight.shared so batch targets share them.
+    With `prev` (delta mode) lookups/ingest skip entities the previous run produced
+    and export writes the diff against it.
     """
     phone_norm = _norm_phone(req.phone)
-    base_app = os.getenv("ORCHESTRATOR_BASE_URL", "http://127.0.0.1:8000")
     phoneinfoga_base = os.getenv("PHONEINFOGA_BASE_URL", "http://phoneinfoga:8080")  # will append /api
-
-    # διορθώνουμε κοινά typos & dedupe
-    base_keywords = _dedupe_and_fix_keywords([*req.keywords])
-    if phone_norm:
-        base_keywords.append(phone_norm)
-    payload_search = {"name": req.name, "keywords": base_keywords, "limit": req.search_limit}
-
-    async with httpx.AsyncClient(timeout=httpx.Timeout(30.0)) as client:
-        # 1) initial search
-        r = await client.post(f"{base_app}/search", json=payload_search)
-        r.raise_for_status()
-        search_data = r.json() or {}
+    SOCIAL_ANALYZER_BASE = os.getenv("SOCIAL_ANALYZER_BASE", "http://social-analyzer:9005")
+
+    def new(kind: str, values: List[str]) -> List[str]:
+        return delta_mode.only_new(values, prev.get(kind, [])) if prev is not None else values
+
+    # 1) initial search
+    async def search_step(ctx):
+        # διορθώνουμε κοινά typos & dedupe
+        base_keywords = _dedupe_and_fix_keywords([*req.keywords])
+        if phone_norm:
+            base_keywords.append(phone_norm)
+        payload_search = SearchRequest(name=req.name or "", keywords=base_keywords, limit=req.search_limit)
+        search_data = await shared("search", key_of(payload_search.model_dump()),
+                                   lambda: run_in_threadpool(search, payload_search)) or {}
         items = search_data.get("results") or search_data.get("items") or []
         urls_initial = list(dict.fromkeys(_extract_urls(items)))  # de-dupe preserve order
 
@@ -387,107 +678,165 @@ async def orchestrate(req: OrchestrateRequest):
                 v = it.get(k)
                 if isinstance(v, str): texts.append(v)
 
-        # emails & usernames
-        emails_found = list(_extract_emails(texts))[:req.email_limit]
-        usernames_found = list(_extract_usernames_from_urls(urls_initial))[:req.social_limit]
-
-        # 2) phoneinfoga (optional)
         phones_found: List[str] = []
         if not phone_norm:
             phones_found = _extract_phones(texts)[:req.phone_limit]
-        phones_considered = [phone_norm] if phone_norm else phones_found
-
-        phoneinfoga = None
-        if req.include_phoneinfoga and phones_considered:
-            async def pf_lookup(p: str):
-                try:
+        return {
+            "urls_initial": urls_initial,
+            "emails_found": list(_extract_emails(texts))[:req.email_limit],
+            "usernames_found": list(_extract_usernames_from_urls(urls_initial))[:req.social_limit],
+            "phones_found": phones_found,
+            "phones_considered": [phone_norm] if phone_norm else phones_found,
+        }
+
+    # 2) phoneinfoga (optional)
+    async def phoneinfoga_step(ctx):
+        async def pf_lookup(p: str):
+            try:
+                async with bulkhead("phoneinfoga"):
                     pr = await client.get(f"{phoneinfoga_base}/api/numbers/{p}/scan/local")
-                    if pr.status_code == 200:
-                        return {"phone": p, "result": pr.json()}
-                except Exception:
-                    pass
-                return {"phone": p, "error": True}
-            phoneinfoga = await asyncio.gather(*[pf_lookup(p) for p in phones_considered])
-
-        # 3) social lookups (parallel)
-        SOCIAL_ANALYZER_BASE = os.getenv("SOCIAL_ANALYZER_BASE", "http://social-analyzer:9005")
+                if pr.status_code == 200:
+                    return {"phone": p, "result": pr.json()}
+            except Exception:
+                pass
+            return {"phone": p, "error": True}
+        phones = new("phones", ctx["phones_considered"])
+        if not (req.include_phoneinfoga and phones):
+            return {"phoneinfoga": None}
+        return {"phoneinfoga": await asyncio.gather(*[shared("phoneinfoga", p, lambda p=p: pf_lookup(p)) for p in phones])}
+
+    # 3) social lookups (parallel)
+    async def social_step(ctx):
         async def social_lookup(u: str):
             try:
                 url1 = f"{SOCIAL_ANALYZER_BASE}/api/search"
                 url2 = f"{SOCIAL_ANALYZER_BASE}/search"
-                sr = await client.post(url1, json={"username": u, "limit": req.social_limit})
-                if sr.status_code == 404:
-                    sr = await client.post(url2, json={"username": u, "limit": req.social_limit})
+                async with bulkhead("social_analyzer"):
+                    sr = await client.post(url1, json={"username": u, "limit": req.social_limit})
+                    if sr.status_code == 404:
+                        sr = await client.post(url2, json={"username": u, "limit": req.social_limit})
                 if sr.status_code == 200:
                     return {"username": u, "result": sr.json()}
             except Exception: pass
             return { "username": u, "error": True }
-
-        social_results = await asyncio.gather(*[social_lookup(u) for u in usernames_found])
-
-        # 4) email verification (parallel)
-        async def verify_email(e: str):
+        return {"social": await asyncio.gather(*[
+            shared("social", key_of(u, req.social_limit), lambda u=u: social_lookup(u))
+            for u in new("usernames", ctx["usernames_found"])
+        ])}
+
+    # 4) email verification (parallel)
+    async def enrich_step(ctx):
+        async def verify_one(e: str):
             try:
-                er = await client.post(f"{base_app}/verify_email", json={"email": e})
-                if er.status_code == 200: return { "email": e, "result": er.json() }
+                async with bulkhead("reacher"):
+                    res = await run_in_threadpool(verify_email_reacher, e)
+                if res: return { "email": e, "result": res }  # falsy = Reacher call failed (as /verify_email)
             except Exception: pass
             return { "email": e, "error": True }
-
-        email_results = await asyncio.gather(*[verify_email(e) for e in emails_found])
-
-        # 4b) Holehe enrichment (optional)
-        holehe_runs = None
-        if os.getenv("ENABLE_HOLEHE_IN_ORCHESTRATE", "false").lower() == "true" and emails_found:
-            holehe_runs = await asyncio.gather(*[holehe_lookup_and_index(e) for e in emails_found])
-
-        # 4c) Maigret cross-validation (optional)
-        maigret_runs = None
-        if os.getenv("ENABLE_MAIGRET_IN_ORCHESTRATE", "false").lower() == "true" and usernames_found:
-            maigret_runs = await asyncio.gather(*[maigret_lookup(u) for u in usernames_found])
-
-        # 5) hybrid search
+        return {"email_results": await asyncio.gather(*[
+            shared("reacher", e, lambda e=e: verify_one(e)) for e in new("emails", ctx["emails_found"])
+        ])}
+
+    # 4b) Holehe enrichment (optional)
+    async def holehe_step(ctx):
+        emails = new("emails", ctx["emails_found"])
+        if os.getenv("ENABLE_HOLEHE_IN_ORCHESTRATE", "false").lower() == "true" and emails:
+            return {"holehe": await asyncio.gather(*[
+                shared("holehe", e, lambda e=e: holehe_lookup_and_index(e)) for e in emails
+            ])}
+        return {"holehe": None}
+
+    # 4c) Maigret cross-validation (optional)
+    async def maigret_step(ctx):
+        usernames = new("usernames", ctx["usernames_found"])
+        if os.getenv("ENABLE_MAIGRET_IN_ORCHESTRATE", "false").lower() == "true" and usernames:
+            return {"maigret": await asyncio.gather(*[
+                shared("maigret", u, lambda u=u: maigret_lookup(u)) for u in usernames
+            ])}
+        return {"maigret": None}
+
+    # 5) hybrid search
+    async def hybrid_step(ctx):
         q = " ".join(filter(None, [
             req.name, *req.keywords,
-            *(phones_considered or []),
-            *usernames_found, *emails_found
+            *(ctx["phones_considered"] or []),
+            *ctx["usernames_found"], *ctx["emails_found"]
         ]))
-        hr = await client.post(f"{base_app}/search_hybrid", json={"query": q, "k": req.hybrid_k})
-        hr.raise_for_status()
-        hybrid_data = hr.json() or {}
+        hybrid_data = await shared("hybrid", key_of(q, req.hybrid_k),
+                                   lambda: run_in_threadpool(search_hybrid, HybridReq(query=q, k=req.hybrid_k))) or {}
         hitems = hybrid_data.get("results") or hybrid_data.get("items") or []
         urls_hybrid = list(dict.fromkeys(_extract_urls(hitems)))
-
         # novel URLs (not in initial)
-        novel_urls = [u for u in urls_hybrid if u not in urls_initial][:req.ingest_limit]
-
-        # 6) ingest novel URLs
-        ing_ok = 0
+        novel_urls = [u for u in urls_hybrid if u not in ctx["urls_initial"]]
+        if prev is not None:
+            # delta: skip URLs seen by the previous run or already in the index
+            novel_urls = new("urls", novel_urls)
+            try:
+                indexed = await run_in_threadpool(existing_ids, novel_urls)
+                novel_urls = [u for u in novel_urls if u not in indexed]
+            except Exception:
+                pass
+        novel_urls, deferred = novel_urls[:req.ingest_limit], novel_urls[req.ingest_limit:]
+        return {"query": q, "urls_hybrid": urls_hybrid, "novel_urls": novel_urls, "novel_deferred": deferred}
+
+    # 6) ingest novel URLs
+    async def ingest_step(ctx):
+        async def ingest_batch(urls: List[str]) -> Dict[str, Any]:
+            ing_data = await run_in_threadpool(ingest_urls, IngestReq(urls=urls, source="orchestrate"))
+            return {e.get("url"): e for e in ing_data.get("ingested", [])}
         urls_for_ingest = []
-        if novel_urls:
-            ing_resp = await client.post(f"{base_app}/ingest_urls", json={"urls": novel_urls, "source": "orchestrate"})
-            if ing_resp.status_code == 200:
-                ing_data = ing_resp.json()
-                ingested = ing_data.get("ingested", [])
-                for entry in ingested:
-                    if entry.get("status") == "ok":
-                        ing_ok += 1
-                        urls_for_ingest.append(entry.get("url"))
-
-        # 7) export CSV
-        csv_path = None
+        if ctx["novel_urls"]:
+            # URLs already claimed by another batch target are awaited, not fetched again
+            entries = await shared_many("ingest", ctx["novel_urls"], ingest_batch)
+            for u in ctx["novel_urls"]:
+                if (entries.get(u) or {}).get("status") == "ok":
+                    urls_for_ingest.append(u)
+        return {"ingested": {"ok": len(urls_for_ingest), "urls": urls_for_ingest}}
+
+    # 7) export CSV
+    async def export_step(ctx):
+        if prev is not None:
+            changes = delta_mode.diff(prev, _delta_snapshot(ctx))
+            try:
+                target = delta_mode.target_key(req.name, req.keywords, req.phone, req.target_id)
+                out = await run_in_threadpool(_export_delta, req.name or "", target, changes)
+                return {"csv_path": out["file"], "delta": changes}
+            except Exception:
+                return {"csv_path": "error", "delta": changes}
         try:
-            csv_resp = await client.get(f"{base_app}/export_csv")
-            if csv_resp.status_code == 200:
-                csv_data = csv_resp.json()
-                csv_path = csv_data.get("file")
+            csv_data = await run_in_threadpool(export_csv)
+            return {"csv_path": csv_data.get("file")}
         except Exception:
-            csv_path = "error"
-
+            return {"csv_path": "error"}
+
+    found = ("usernames_found", "emails_found", "phones_considered")
+    return apply_plan([
+        Step("search", search_step, provides=("urls_initial",) + found + ("phones_found",)),
+        Step("phoneinfoga", phoneinfoga_step, requires=("phones_considered",), provides=("phoneinfoga",)),
+        Step("social", social_step, requires=("usernames_found",), provides=("social",)),
+        Step("enrich", enrich_step, requires=("emails_found",), provides=("email_results",)),
+        Step("holehe", holehe_step, requires=("emails_found",), provides=("holehe",)),
+        Step("maigret", maigret_step, requires=("usernames_found",), provides=("maigret",)),
+        Step("hybrid_search", hybrid_step, requires=("urls_initial",) + found,
+             provides=("query", "urls_hybrid", "novel_urls", "novel_deferred")),
+        Step("ingest", ingest_step, requires=("novel_urls",), provides=("ingested",)),
+        Step("export", export_step, requires=("ingested",), provides=("csv_path", "delta")),
+    ], plan)
+
+
+def _orchestrate_summary(req: OrchestrateRequest, ctx: Dict[str, Any], report: RunReport) -> Dict[str, Any]:
+    phone_norm = _norm_phone(req.phone)
+    urls_initial = ctx.get("urls_initial", [])
+    emails_found = ctx.get("emails_found", [])
+    usernames_found = ctx.get("usernames_found", [])
+    phones_found = ctx.get("phones_found", [])
+    novel_urls = ctx.get("novel_urls", [])
     return {
-        "query": q,
+        "run_id": ctx.get("run_id"),
+        "query": ctx.get("query"),
         "counts": {
             "initial_urls": len(urls_initial),
-            "hybrid_urls": len(urls_hybrid),
+            "hybrid_urls": len(ctx.get("urls_hybrid", [])),
             "novel_urls": len(novel_urls),
             "emails_found": len(emails_found),
             "usernames_found": len(usernames_found),
@@ -499,12 +848,14 @@ async def orchestrate(req: OrchestrateRequest):
             "novel_urls": novel_urls[:5],
         },
         "phones_found": phones_found,
-        "phones_considered": phones_considered,
-        "phoneinfoga": phoneinfoga,
-        "social": social_results[:req.limit],
-        "emails": email_results[:req.limit],
-        "holehe": holehe_runs,
-        "maigret": maigret_runs,
-        "ingested": { "ok": ing_ok, "urls": urls_for_ingest },
-        "csv_path": csv_path
+        "phones_considered": ctx.get("phones_considered", []),
+        "phoneinfoga": ctx.get("phoneinfoga"),
+        "social": (ctx.get("social") or [])[:req.limit],
+        "emails": (ctx.get("email_results") or [])[:req.limit],
+        "holehe": ctx.get("holehe"),
+        "maigret": ctx.get("maigret"),
+        "ingested": ctx.get("ingested", {"ok": 0, "urls": []}),
+        "csv_path": ctx.get("csv_path"),
+        "delta": ctx.get("delta"),
+        "steps": report.as_dict(),
     }
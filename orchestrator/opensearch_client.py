@@ -1,26 +1,57 @@
 from __future__ import annotations
 import os
-from typing import Dict, Any, List
-from opensearchpy import OpenSearch, RequestsHttpConnection
+import json
+import threading
+from typing import Dict, Any, Iterator, List, Optional
+from opensearchpy import OpenSearch, Urllib3HttpConnection
+from opensearchpy.exceptions import RequestError
 
 OS_URL = os.getenv("OPENSEARCH_URL", "http://opensearch:9200")
 INDEX = os.getenv("OSINT_INDEX", "osint_pages")
 EMBED_DIM = int(os.getenv("EMBED_DIM", "384"))
+POOL_MAXSIZE = int(os.getenv("OPENSEARCH_POOL_MAXSIZE", "25"))
+BULK_MAX_DOCS = int(os.getenv("BULK_MAX_DOCS", "500"))
+BULK_MAX_BYTES = int(os.getenv("BULK_MAX_BYTES", str(5 * 1024 * 1024)))
+BULK_REFRESH = os.getenv("BULK_REFRESH", "false")  # false | true | wait_for
+HYBRID_PIPELINE = os.getenv("HYBRID_PIPELINE", "tracematrix-rrf")
+RRF_RANK_CONSTANT = int(os.getenv("RRF_RANK_CONSTANT", "60"))
+
+# set once the index is known to exist, so hot paths skip the HEAD request
+_index_ready = False
+
+
+_client: OpenSearch | None = None
 
 
 def client() -> OpenSearch:
-    return OpenSearch(
-        hosts=[OS_URL],
-        use_ssl=OS_URL.startswith("https://"),
-        verify_certs=False,
-        connection_class=RequestsHttpConnection,
-        timeout=30,
-    )
+    """Process-wide client over one keep-alive urllib3 pool (thread-safe, shared by sync endpoints)."""
+    global _client
+    if _client is None:
+        _client = OpenSearch(
+            hosts=[OS_URL],
+            use_ssl=OS_URL.startswith("https://"),
+            verify_certs=False,
+            connection_class=Urllib3HttpConnection,
+            pool_maxsize=POOL_MAXSIZE,
+            timeout=30,
+        )
+    return _client
+
+
+def close_client():
+    global _client
+    c, _client = _client, None
+    if c is not None:
+        c.close()
 
 
 def create_index_if_not_exists():
+    global _index_ready
+    if _index_ready:
+        return True
     c = client()
     if c.indices.exists(index=INDEX):
+        _index_ready = True
         return True
     body = {
         "settings": {
@@ -45,6 +76,7 @@ def create_index_if_not_exists():
     except Exception:
         # ignore if already exists due to race
         pass
+    _index_ready = True
     return True
 
 
@@ -52,20 +84,170 @@ def index_doc(doc: Dict[str, Any]):
     client().index(index=INDEX, body=doc, id=doc.get("url"))
 
 
-def bm25_search(query: str, size: int = 10) -> List[Dict[str, Any]]:
+def existing_ids(ids: List[str]) -> set:
+    """Subset of `ids` (document ids = urls) already in the index; one _mget, no _source."""
+    ids = list(dict.fromkeys(i for i in ids if i))
+    if not ids:
+        return set()
+    res = client().mget(index=INDEX, body={"ids": ids}, _source=False)
+    return {d["_id"] for d in res.get("docs", []) if d.get("found")}
+
+
+# index -> [open deferring indexers, refresh_interval to restore]; the interval is only
+# switched off by the first indexer and restored by the last one to close
+_deferred: Dict[str, list] = {}
+_deferred_lock = threading.Lock()
+
+
+def _defer_refresh(c: OpenSearch, index: str):
+    with _deferred_lock:
+        entry = _deferred.get(index)
+        if entry is None:
+            settings = c.indices.get_settings(index=index, name="index.refresh_interval")
+            prev = settings.get(index, {}).get("settings", {}).get("index", {}).get("refresh_interval")
+            if str(prev) == "-1":
+                prev = None  # left disabled by an indexer that never closed: restore the default
+            c.indices.put_settings(index=index, body={"index": {"refresh_interval": "-1"}})
+            entry = _deferred[index] = [0, prev]
+        entry[0] += 1
+
+
+def _restore_refresh(c: OpenSearch, index: str):
+    with _deferred_lock:
+        entry = _deferred.get(index)
+        if entry is None:
+            return
+        entry[0] -= 1
+        if entry[0] > 0:
+            return  # another indexer is still writing; it refreshes when it closes
+        del _deferred[index]
+        c.indices.put_settings(index=index, body={"index": {"refresh_interval": entry[1]}})
+    c.indices.refresh(index=index)
+
+
+class BulkIndexer:
+    """
+    Buffers documents and writes them through the _bulk endpoint once either
+    `max_docs` or `max_bytes` is reached (and on close). Per-item failures are
+    collected in `errors` ({_id: reason}).
+
+    With defer_refresh=True the index refresh_interval is disabled while the
+    indexer is open and a single refresh is issued on close (concurrent
+    deferring indexers on the same index share this: the last one restores it).
+
+        with BulkIndexer(defer_refresh=True) as bi:
+            for d in docs:
+                bi.add(d)
+        bi.errors
+    """
+
+    def __init__(self, index: str = INDEX, max_docs: int = BULK_MAX_DOCS, max_bytes: int = BULK_MAX_BYTES,
+                 refresh: str = BULK_REFRESH, defer_refresh: bool = False):
+        self.index = index
+        self.max_docs = max_docs
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+        self.defer_refresh = defer_refresh
+        self.errors: Dict[str, str] = {}
+        self.indexed = 0
+        self.requests = 0
+        self._lines: List[str] = []
+        self._ids: List[str] = []
+        self._bytes = 0
+        self._client = client()
+        if defer_refresh:
+            _defer_refresh(self._client, index)
+
+    def add(self, doc: Dict[str, Any], doc_id: str | None = None):
+        doc_id = doc_id or doc.get("url")
+        action = json.dumps({"index": {"_index": self.index, "_id": doc_id}})
+        source = json.dumps(doc)
+        self._lines += [action, source]
+        self._ids.append(doc_id)
+        self._bytes += len(action) + len(source) + 2
+        if len(self._ids) >= self.max_docs or self._bytes >= self.max_bytes:
+            self.flush()
+
+    def flush(self):
+        if not self._lines:
+            return
+        body = "\n".join(self._lines) + "\n"
+        ids = self._ids
+        self._lines, self._ids, self._bytes = [], [], 0
+        self.requests += 1
+        try:
+            res = self._client.bulk(body=body, params={"refresh": self.refresh})
+        except Exception as e:
+            for i in ids:
+                self.errors[i] = str(e)
+            return
+        for i, item in zip(ids, res.get("items", [])):
+            op = item.get("index", {})
+            if op.get("error"):
+                self.errors[op.get("_id", i)] = str(op["error"].get("reason") or op["error"])
+            else:
+                self.indexed += 1
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if self.defer_refresh:
+                self.defer_refresh = False  # closing twice must not release another indexer's hold
+                _restore_refresh(self._client, self.index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def index_docs(docs: List[Dict[str, Any]], defer_refresh: bool | None = None) -> Dict[str, str]:
+    """Index many documents (id=url) through BulkIndexer. Returns {url: error} for failed items."""
+    if not docs:
+        return {}
+    if defer_refresh is None:
+        defer_refresh = len(docs) > BULK_MAX_DOCS  # only worth it when several _bulk requests go out
+    with BulkIndexer(defer_refresh=defer_refresh) as bi:
+        for d in docs:
+            bi.add(d)
+    return bi.errors
+
+
+def _shape(body: Dict[str, Any], source_includes: Optional[List[str]] = None,
+           source_excludes: Optional[List[str]] = None, highlight_query: Optional[str] = None) -> Dict[str, Any]:
+    """Add _source filtering and (optionally) content highlighting to a search body."""
+    if source_includes or source_excludes:
+        body["_source"] = {"includes": source_includes or ["*"], "excludes": source_excludes or []}
+    if highlight_query:
+        body["highlight"] = {
+            "fields": {"content": {"fragment_size": 160, "number_of_fragments": 3}},
+            "highlight_query": {"match": {"content": highlight_query}},
+        }
+    return body
+
+
+def _to_doc(h: Dict[str, Any]) -> Dict[str, Any]:
+    doc = {"url": h["_id"], **h.get("_source", {}), "_score": h.get("_score", 0)}
+    if "highlight" in h:
+        doc["highlight"] = h["highlight"].get("content", [])
+    return doc
+
+
+def bm25_body(query: str, size: int = 10, **shape) -> Dict[str, Any]:
     if query == "*":
         q = {"match_all": {}}
     else:
         q = {"multi_match": {"query": query, "fields": ["title^2", "snippet^1.5", "content"]}}
     # OpenSearch has a max of 10000 results per query by default
     actual_size = min(size, 10000)
-    res = client().search(index=INDEX, body={"size": actual_size, "query": q})
-    hits = res.get("hits", {}).get("hits", [])
-    return [{"url": h["_id"], **h.get("_source", {}), "_score": h.get("_score", 0)} for h in hits]
+    return _shape({"size": actual_size, "query": q}, **shape)
 
 
-def knn_search(vec: List[float], size: int = 10) -> List[Dict[str, Any]]:
-    res = client().search(index=INDEX, body={
+def knn_body(vec: List[float], size: int = 10, **shape) -> Dict[str, Any]:
+    return _shape({
         "size": size,
         "query": {
             "knn": {
@@ -75,52 +257,120 @@ def knn_search(vec: List[float], size: int = 10) -> List[Dict[str, Any]]:
                 }
             }
         }
-    })
+    }, **shape)
+
+
+def bm25_search(query: str, size: int = 10, **shape) -> List[Dict[str, Any]]:
+    """BM25 over title/snippet/content. shape: source_includes, source_excludes, highlight_query."""
+    res = client().search(index=INDEX, body=bm25_body(query, size, **shape))
     hits = res.get("hits", {}).get("hits", [])
-    return [{"url": h["_id"], **h.get("_source", {}), "_score": h.get("_score", 0)} for h in hits]
+    return [_to_doc(h) for h in hits]
 
 
-def get_all_docs() -> List[Dict[str, Any]]:
-    """Retrieve all documents from the index using scroll API (no limit)"""
-    c = client()
-    results = []
+def knn_search(vec: List[float], size: int = 10, **shape) -> List[Dict[str, Any]]:
+    """Approximate k-NN over `vector`. shape: source_includes, source_excludes, highlight_query."""
+    res = client().search(index=INDEX, body=knn_body(vec, size, **shape))
+    hits = res.get("hits", {}).get("hits", [])
+    return [_to_doc(h) for h in hits]
 
-    try:
-        # Check if index exists
-        if not c.indices.exists(index=INDEX):
-            return results
-
-        # Initial scroll request
-        resp = c.search(
-            index=INDEX,
-            body={"query": {"match_all": {}}, "size": 1000},
-            scroll='2m'
-        )
 
-        scroll_id = resp.get('_scroll_id')
-        hits = resp.get("hits", {}).get("hits", [])
+def hybrid_msearch(query: str, vec: List[float], size: int = 10, **shape):
+    """
+    BM25 and k-NN sub-queries in one _msearch round-trip. Returns (bm25_hits, knn_hits).
+    A sub-query that is missing from the reply or failed is retried on its own.
+    """
+    header = json.dumps({"index": INDEX})
+    lines = [header, json.dumps(bm25_body(query, size, **shape)), header, json.dumps(knn_body(vec, size, **shape))]
+    res = client().msearch(body="\n".join(lines) + "\n")
+    responses = res.get("responses") or []
+    out = []
+    for i, retry in enumerate((lambda: bm25_search(query, size, **shape), lambda: knn_search(vec, size, **shape))):
+        r = responses[i] if i < len(responses) and isinstance(responses[i], dict) else None
+        if r is None or r.get("error"):
+            out.append(retry())
+        else:
+            out.append([_to_doc(h) for h in r.get("hits", {}).get("hits", [])])
+    return out[0], out[1]
 
-        for h in hits:
-            results.append({"url": h["_id"], **h.get("_source", {}), "_score": h.get("_score", 0)})
 
-        # Continue scrolling until no more results
-        while len(hits) > 0:
-            resp = c.scroll(scroll_id=scroll_id, scroll='2m')
-            scroll_id = resp.get('_scroll_id')
-            hits = resp.get("hits", {}).get("hits", [])
+# True once the pipeline exists, False once the cluster rejected it (None: not tried yet)
+_pipeline_ready: Optional[bool] = None
 
-            for h in hits:
-                results.append({"url": h["_id"], **h.get("_source", {}), "_score": h.get("_score", 0)})
 
-        # Clear the scroll context
+def ensure_hybrid_pipeline() -> bool:
+    """
+    Create the RRF search pipeline used by hybrid_pipeline_search. False when the cluster
+    can't run it (score-ranker-processor needs OpenSearch >= 2.19): fuse with _msearch instead.
+    """
+    global _pipeline_ready
+    if _pipeline_ready is None:
         try:
-            if scroll_id:
-                c.clear_scroll(scroll_id=scroll_id)
-        except:
-            pass
-    except Exception as e:
-        # If anything goes wrong, return empty list or partial results
-        print(f"Error in get_all_docs: {e}")
+            client().transport.perform_request("PUT", f"/_search/pipeline/{HYBRID_PIPELINE}", body={
+                "description": "TraceMatrix hybrid BM25 + k-NN with reciprocal rank fusion",
+                "phase_results_processors": [
+                    {"score-ranker-processor": {"combination": {"technique": "rrf", "rank_constant": RRF_RANK_CONSTANT}}}
+                ],
+            })
+            _pipeline_ready = True
+        except RequestError:  # unknown processor type: remembered, not retried per query
+            _pipeline_ready = False
+        except Exception:  # cluster unreachable: try again on the next query
+            return False
+    return _pipeline_ready
+
+
+def hybrid_pipeline_search(query: str, vec: List[float], size: int = 10, **shape) -> List[Dict[str, Any]]:
+    """Server-side fusion: one `hybrid` query run through the RRF search pipeline."""
+    ensure_hybrid_pipeline()
+    body = _shape({
+        "size": size,
+        "query": {"hybrid": {"queries": [bm25_body(query, size)["query"], knn_body(vec, size)["query"]]}},
+    }, **shape)
+    res = client().search(index=INDEX, body=body, params={"search_pipeline": HYBRID_PIPELINE})
+    return [_to_doc(h) for h in res.get("hits", {}).get("hits", [])]
 
-    return results
 
+def iter_docs(fields: List[str], page_size: int = 1000, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every document (only `fields` from _source) page by page with search_after,
+    inside a point-in-time when the cluster supports it. Memory stays at one page.
+    """
+    c = client()
+    if not c.indices.exists(index=INDEX):
+        return
+    pit_id = None
+    try:
+        pit_id = c.create_pit(index=INDEX, params={"keep_alive": "2m"}).get("pit_id")
+    except Exception:
+        pit_id = None  # older cluster: plain search_after over the live index
+    body: Dict[str, Any] = {
+        "size": page_size,
+        "query": {"match_all": {}},
+        "_source": {"includes": fields},
+        "sort": [{"url": "asc"}],
+        "track_scores": True,
+    }
+    sent = 0
+    try:
+        while limit is None or sent < limit:
+            if limit is not None:
+                body["size"] = min(page_size, limit - sent)
+            if pit_id:
+                body["pit"] = {"id": pit_id, "keep_alive": "2m"}
+                res = c.search(body=body)
+            else:
+                res = c.search(index=INDEX, body=body)
+            hits = res.get("hits", {}).get("hits", [])
+            if not hits:
+                break
+            for h in hits:
+                yield {"url": h["_id"], **h.get("_source", {}), "_score": h.get("_score") or 0}
+            sent += len(hits)
+            pit_id = res.get("pit_id") or pit_id
+            body["search_after"] = hits[-1]["sort"]
+    finally:
+        if pit_id:
+            try:
+                c.delete_pit(body={"pit_id": [pit_id]})
+            except Exception:
+                pass
@@ -1,14 +1,17 @@
 from __future__ import annotations
 import os
 from typing import Any, Dict, Optional
-import requests
+try:
+    from .app.services.http_pool import session
+except ImportError:  # flat layout (orchestrator/ on sys.path), as main.py runs
+    from app.services.http_pool import session
 
 DEFAULT_BASE = os.getenv("PHONEINFOGA_URL", "http://phoneinfoga:8080").rstrip("/")
 
 def _try_post_lookup(base: str, number: str, timeout: float) -> Optional[Dict[str, Any]]:
     try:
         url = f"{base}/api/lookup"
-        r = requests.post(url, json={"number": number}, timeout=timeout)
+        r = session("phoneinfoga").post(url, json={"number": number}, timeout=timeout)
         if r.status_code == 404:
             return None
         r.raise_for_status()
@@ -21,7 +24,7 @@ def _try_get_scan(base: str, number: str, timeout: float) -> Optional[Dict[str,
     for path in (f"/api/numbers/{number}", f"/api/lookup?number={number}", f"/api/scan?number={number}"):
         try:
             url = f"{base}{path}"
-            r = requests.get(url, timeout=timeout)
+            r = session("phoneinfoga").get(url, timeout=timeout)
             if r.status_code == 404:
                 continue
             r.raise_for_status()
@@ -1,6 +1,10 @@
 
 from __future__ import annotations
-import os, requests
+import os
+try:
+    from .app.services.http_pool import session
+except ImportError:  # flat layout (orchestrator/ on sys.path), as main.py runs
+    from app.services.http_pool import session
 from typing import List, Dict, Optional
 
 class GoogleCSEClient:
@@ -21,7 +25,7 @@ class GoogleCSEClient:
         url = "https://customsearch.googleapis.com/customsearch/v1"
         params = {"key": self.api_key, "cx": self.cx, "q": self._join_query(query, site_filters), "num": str(num or self.per_query_num), "safe": "off"}
         if extra_params: params.update(extra_params)
-        resp = requests.get(url, params=params, timeout=self.timeout)
+        resp = session("google").get(url, params=params, timeout=self.timeout)
         resp.raise_for_status()
         data = resp.json()
         items = data.get("items", []) or []
@@ -49,7 +53,7 @@ class ReacherClient:
     def check_email(self, email: str) -> Dict:
         url = f"{self.base_url}/v0/check_email"
         payload = {"to_email": email}
-        resp = requests.post(url, json=payload, timeout=self.timeout)
+        resp = session("reacher").post(url, json=payload, timeout=self.timeout)
         resp.raise_for_status()
         return resp.json()
 
@@ -1,20 +1,123 @@
 
 from __future__ import annotations
+import os, time, threading
 import trafilatura, datetime
-from typing import Dict, Any
-from sentence_transformers import SentenceTransformer
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List
+try:
+    from .embed_cache import get_cache
+    from .encoders import load_encoder
+except ImportError:  # flat layout (orchestrator/ on sys.path), as main.py runs
+    from embed_cache import get_cache
+    from encoders import load_encoder
+
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "8"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "600"))
 
 _model = None
 def get_model():
+    """Encoder selected by EMBED_BACKEND (torch | int8 | onnx); see encoders.py."""
     global _model
     if _model is None:
-        _model = SentenceTransformer("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+        _model = load_encoder()
     return _model
 
-def fetch_and_embed(url: str):
+def model_ready() -> bool:
+    return _model is not None
+
+def warm_up():
+    """Load the encoder and run one encode so the first real query pays no setup cost."""
+    get_model().encode(["warm up"])
+
+_qcache: "OrderedDict[str, tuple]" = OrderedDict()  # normalized query -> (expires_at, vector)
+_qlock = threading.Lock()
+
+def encode_query(query: str) -> List[float]:
+    """Query vector with a bounded LRU/TTL cache keyed by case- and whitespace-normalized text."""
+    text = " ".join((query or "").split())
+    key = text.casefold()
+    now = time.time()
+    with _qlock:
+        hit = _qcache.get(key)
+        if hit and hit[0] > now:
+            _qcache.move_to_end(key)
+            return hit[1]
+    vec = get_model().encode([text])[0].tolist()
+    with _qlock:
+        _qcache[key] = (now + QUERY_CACHE_TTL, vec)
+        _qcache.move_to_end(key)
+        while len(_qcache) > QUERY_CACHE_SIZE:
+            _qcache.popitem(last=False)
+    return vec
+
+def fetch_text(url: str) -> str:
     downloaded = trafilatura.fetch_url(url)
     text = trafilatura.extract(downloaded, include_comments=False, include_tables=False) if downloaded else ""
-    text = (text or "").strip()
+    return (text or "").strip()
+
+def embed_texts(texts: List[str], batch_size: int = EMBED_BATCH_SIZE) -> List[List[float]]:
+    """Encode many texts with a single model call; texts already in the embedding cache are skipped."""
+    if not texts:
+        return []
     model = get_model()
-    vec = model.encode([text or url])[0].tolist()
+    cache = get_cache()
+    if cache is None:
+        return [v.tolist() for v in model.encode(texts, batch_size=batch_size)]
+    keys = [cache.key(model.name, t) for t in texts]
+    found = cache.get_many(keys)
+    missing = list(dict.fromkeys(k for k in keys if k not in found))
+    if missing:
+        by_key = dict(zip(keys, texts))
+        vecs = model.encode([by_key[k] for k in missing], batch_size=batch_size)
+        fresh = {k: v.tolist() for k, v in zip(missing, vecs)}
+        cache.put_many(fresh)
+        found.update(fresh)
+    return [found[k] for k in keys]
+
+def _doc(text: str, vec: List[float]) -> Dict[str, Any]:
     return {"content": text, "vector": vec, "timestamp": datetime.datetime.utcnow().isoformat()}
+
+def fetch_and_embed(url: str):
+    text = fetch_text(url)
+    vec = embed_texts([text or url])[0]
+    return _doc(text, vec)
+
+def fetch_and_embed_many(urls: List[str], concurrency: int = INGEST_CONCURRENCY,
+                         batch_size: int = EMBED_BATCH_SIZE) -> List[Dict[str, Any]]:
+    """
+    Pipelined variant of fetch_and_embed for a list of URLs.
+    Fetches run in a bounded thread pool; as soon as `batch_size` texts have been
+    extracted they are encoded together while the remaining fetches continue.
+    Returns one entry per input URL (same order): the embedded doc, or {"error": "..."}.
+    """
+    out: List[Dict[str, Any]] = [{} for _ in urls]
+    pending: List[tuple] = []  # (position, text)
+
+    def flush():
+        if not pending:
+            return
+        try:
+            vecs = embed_texts([t or urls[i] for i, t in pending], batch_size=batch_size)
+            for (i, t), v in zip(pending, vecs):
+                out[i] = _doc(t, v)
+        except Exception as e:
+            for i, _ in pending:
+                out[i] = {"error": str(e)}
+        pending.clear()
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {pool.submit(fetch_text, u): i for i, u in enumerate(urls)}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            try:
+                pending.append((i, fut.result()))
+            except Exception as e:
+                out[i] = {"error": str(e)}
+                continue
+            if len(pending) >= batch_size:
+                flush()
+    flush()
+    return out
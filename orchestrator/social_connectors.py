@@ -1,13 +1,17 @@
 from __future__ import annotations
-import os, requests
+import os
 from typing import Dict, Any
+try:
+    from .app.services.http_pool import session
+except ImportError:  # flat layout (orchestrator/ on sys.path), as main.py runs
+    from app.services.http_pool import session
 
 def social_analyzer_username(username: str, base_url: str = None) -> Dict[str, Any]:
     # HTTP-only (no SSL). Default compose mapping exposes 9005.
     base_url = base_url or os.getenv("SOCIAL_ANALYZER_URL", "http://social-analyzer:9005")
     url = f"{base_url.rstrip('/')}/api/search"
     try:
-        r = requests.post(url, json={"username": username}, timeout=60)
+        r = session("social_analyzer").post(url, json={"username": username}, timeout=60)
         r.raise_for_status()
         return {"tool":"social-analyzer", "json": r.json()}
     except Exception as e:
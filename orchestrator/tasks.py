@@ -1,12 +1,141 @@
+import os, asyncio
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from celery import group
+from celery.result import AsyncResult, GroupResult
 from .celery_app import celery_app
 
-@celery_app.task(name="tasks.scrape_and_ingest")
-def scrape_and_ingest(urls: list[str]) -> dict:
-    # Hook: Trafilatura + NER + file_meta + OpenSearch bulk
-    return {"ok": True, "count": len(urls)}
+# Background jobs. A job is a saved GroupResult in the Redis result backend:
+#   ingest        -> one scrape_and_ingest task per chunk of URLs (fetch + embed + _bulk)
+#   username scan -> one username_scan task per tool
+# Workers pick chunks/tools independently, so capacity grows with worker count.
+# GET /jobs/{id} reads per-task state (PROGRESS meta while running) and finished results.
 
-@celery_app.task(name="tasks.username_scan")
-def username_scan(username: str) -> dict:
-    # Hook: Social-Analyzer / Sherlock / Maigret
-    return {"username": username, "sources_found": 0}
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "25"))
+USERNAME_TOOLS = [t.strip() for t in os.getenv("USERNAME_SCAN_TOOLS", "social_analyzer,maigret").split(",") if t.strip()]
 
+# task_always_eager: results never reach the backend, so the newest jobs are kept here
+EAGER_JOBS_MAX = 256
+_eager_jobs: "OrderedDict[str, GroupResult]" = OrderedDict()
+
+
+def _progress(task, **meta):
+    if not task.request.is_eager:  # eager runs have no backend to report to
+        task.update_state(state="PROGRESS", meta=meta)
+
+
+@celery_app.task(name="tasks.scrape_and_ingest", bind=True)
+def scrape_and_ingest(self, urls: list[str], source: str = "celery") -> dict:
+    """Fetch, embed and bulk-index one chunk of URLs."""
+    from . import opensearch_client as osc, scrape_embed
+    osc.create_index_if_not_exists()
+    _progress(self, stage="fetch", urls=len(urls))
+    embedded = scrape_embed.fetch_and_embed_many(urls)
+    docs = [{"url": u, "title": "", "snippet": "", "source": source, **emb}
+            for u, emb in zip(urls, embedded) if "error" not in emb]
+    _progress(self, stage="index", urls=len(urls), docs=len(docs))
+    try:
+        failed = osc.index_docs(docs)
+    except Exception as e:
+        failed = {d["url"]: str(e) for d in docs}
+    ok, errors = [], {}
+    for u, emb in zip(urls, embedded):
+        err = emb.get("error") or failed.get(u)
+        if err:
+            errors[u] = err
+        else:
+            ok.append(u)
+    return {"ok": len(ok), "count": len(urls), "urls": ok, "errors": errors}
+
+
+def _scan_social_analyzer(username: str) -> Dict[str, Any]:
+    from .social_connectors import social_analyzer_username
+    return social_analyzer_username(username)
+
+
+def _scan_maigret(username: str) -> Dict[str, Any]:
+    from .app.services.maigret_service import maigret_lookup
+    from .app.services.opensearch_client import close_client
+
+    async def scan():
+        try:
+            return await maigret_lookup(username)
+        finally:
+            await close_client()  # the OpenSearch client belongs to this task's loop
+
+    return {"tool": "maigret", "hits": asyncio.run(scan())}
+
+
+SCANNERS = {"social_analyzer": _scan_social_analyzer, "maigret": _scan_maigret}
+
+
+@celery_app.task(name="tasks.username_scan", bind=True)
+def username_scan(self, username: str, tool: Optional[str] = None) -> dict:
+    """Run one username tool (or, without `tool`, every configured tool in turn)."""
+    tools = [tool] if tool else USERNAME_TOOLS
+    out = {}
+    for t in tools:
+        _progress(self, username=username, tool=t)
+        try:
+            out[t] = SCANNERS[t](username)
+        except Exception as e:
+            out[t] = {"tool": t, "error": str(e)}
+    found = sum(len(r.get("hits") or []) for r in out.values() if isinstance(r, dict))
+    return {"username": username, "tools": out, "sources_found": found}
+
+
+def _submit(sig_group) -> str:
+    res = sig_group.apply_async()
+    if celery_app.conf.task_always_eager:
+        _eager_jobs[res.id] = res
+        while len(_eager_jobs) > EAGER_JOBS_MAX:
+            _eager_jobs.popitem(last=False)
+    else:
+        res.save()
+    return res.id
+
+
+def submit_ingest(urls: List[str], source: str = "celery", chunk_size: int = INGEST_CHUNK_SIZE) -> Dict[str, Any]:
+    urls = list(dict.fromkeys(urls))
+    size = max(1, chunk_size)
+    chunks = [urls[i:i + size] for i in range(0, len(urls), size)]
+    job_id = _submit(group(scrape_and_ingest.s(c, source) for c in chunks))
+    return {"job_id": job_id, "tasks": len(chunks)}
+
+
+def submit_username_scan(username: str, tools: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Raises ValueError for tool names without a scanner (or when no tool is left to run)."""
+    tools = list(dict.fromkeys(tools or USERNAME_TOOLS))
+    unknown = [t for t in tools if t not in SCANNERS]
+    if unknown:
+        raise ValueError(f"Unknown tools: {', '.join(unknown)} (expected {', '.join(sorted(SCANNERS))})")
+    if not tools:
+        raise ValueError("No username tools configured")
+    job_id = _submit(group(username_scan.s(username, t) for t in tools))
+    return {"job_id": job_id, "tasks": len(tools)}
+
+
+def _task_view(r: AsyncResult) -> Dict[str, Any]:
+    view: Dict[str, Any] = {"id": r.id, "state": r.state}
+    if r.state == "SUCCESS":
+        view["result"] = r.result
+    elif r.state == "FAILURE":
+        view["error"] = str(r.result)
+    elif isinstance(r.info, dict):
+        view["progress"] = r.info
+    return view
+
+
+def job_status(job_id: str) -> Optional[Dict[str, Any]]:
+    """Aggregate state of a submitted job; None if the id is unknown (or expired)."""
+    res = _eager_jobs.get(job_id) or GroupResult.restore(job_id, app=celery_app)
+    if res is None:
+        return None
+    tasks = [_task_view(r) for r in res.results]
+    done = sum(t["state"] in ("SUCCESS", "FAILURE") for t in tasks)
+    failed = sum(t["state"] == "FAILURE" for t in tasks)
+    if done < len(tasks):
+        state = "PROGRESS" if any(t["state"] != "PENDING" for t in tasks) else "PENDING"
+    else:
+        state = "FAILURE" if failed == len(tasks) and tasks else "PARTIAL" if failed else "SUCCESS"
+    return {"job_id": job_id, "state": state, "total": len(tasks), "completed": done, "failed": failed, "tasks": tasks}
@@ -4,3 +4,9 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
+
+# keep run checkpoints written by /orchestrate tests out of the container path
+import tempfile
+os.environ.setdefault("CHECKPOINT_DIR", os.path.join(tempfile.gettempdir(), "orch-test-checkpoints"))
+os.environ.setdefault("DELTA_DIR", os.path.join(tempfile.gettempdir(), "orch-test-delta"))
+os.environ.setdefault("CACHE_DISK", "0")  # response cache: L1 only unless a test opts in
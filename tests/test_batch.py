@@ -0,0 +1,81 @@
+import asyncio
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+
+@pytest.mark.asyncio
+async def test_singleflight_shares_calls_only_inside_a_scope():
+    from orchestrator.app.services import singleflight
+
+    calls = []
+
+    async def verify(e):
+        calls.append(e)
+        await asyncio.sleep(0.02)
+        return {"email": e}
+
+    await asyncio.gather(*[singleflight.shared("reacher", "a@b.c", lambda: verify("a@b.c")) for _ in range(3)])
+    assert len(calls) == 3
+
+    calls.clear()
+    with singleflight.scope() as memo:
+        res = await asyncio.gather(*[singleflight.shared("reacher", "a@b.c", lambda: verify("a@b.c")) for _ in range(3)])
+        assert res == [{"email": "a@b.c"}] * 3
+        assert calls == ["a@b.c"]
+        assert memo.stats() == {"calls": {"reacher": 1}, "shared": {"reacher": 2}}
+
+
+@pytest.mark.asyncio
+async def test_shared_many_fetches_each_key_once_across_callers():
+    from orchestrator.app.services import singleflight
+
+    batches = []
+
+    async def ingest(urls):
+        batches.append(sorted(urls))
+        await asyncio.sleep(0.02)
+        return {u: {"url": u, "status": "ok"} for u in urls}
+
+    with singleflight.scope():
+        a, b = await asyncio.gather(
+            singleflight.shared_many("ingest", ["u1", "u2"], ingest),
+            singleflight.shared_many("ingest", ["u2", "u3"], ingest),
+        )
+    assert batches == [["u1", "u2"], ["u3"]]
+    assert set(a) == {"u1", "u2"} and set(b) == {"u2", "u3"}
+
+
+@pytest.mark.asyncio
+async def test_batch_endpoint_dedupes_searches_and_keeps_per_target_results(monkeypatch):
+    from orchestrator.app.main import app
+    from orchestrator.app import routes
+    from orchestrator.app.services import core_service
+    from orchestrator.app.services import fallback as fb
+    from orchestrator.app.services.plan import Plan
+
+    searches = []
+
+    async def fake_search(payload):
+        searches.append(payload["name"])
+        await asyncio.sleep(0.02)
+        return {"count": 1, "results": [{"url": f"https://{payload['name']}", "title": payload["name"], "rrf": 1.0}]}
+
+    async def media(cfg, payload):
+        return [{"url": f"https://{payload['name']}/a.png", "media_type": "image"}]
+
+    monkeypatch.setattr(routes, "load_cfg", lambda: Plan())
+    monkeypatch.setattr(core_service, "_search", fake_search)
+    monkeypatch.setattr(core_service, "search_hybrid", lambda q, k: asyncio.sleep(0, {"results": []}))
+    monkeypatch.setattr(fb, "ingest_urls", lambda urls, text=None: asyncio.sleep(0, {"count": len(urls)}))
+    monkeypatch.setattr(fb, "discover_media", media)
+    monkeypatch.setattr(fb, "_export", lambda cfg, payload, results: {"csv": "x.csv"})
+
+    targets = [{"name": "alice"}, {"name": "bob"}, {"name": "alice"}]
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        r = await ac.post("/orchestrate/batch", json={"targets": targets, "defaults": {"keywords": ["athens"]}})
+    j = r.json()
+    assert r.status_code == 200 and j["count"] == 3 and j["ok"] == 3
+    assert [t["result"]["results_preview"][0]["url"] for t in j["targets"]] == [
+        "https://alice/a.png", "https://bob/a.png", "https://alice/a.png"]
+    assert sorted(searches) == ["alice", "bob"]  # the second "alice" reused the first one's search
+    assert j["shared"]["shared"].get("search", 0) >= 1
@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_caps_concurrency_and_counts_waits():
+    from orchestrator.app.services.bulkhead import Bulkhead
+
+    bh = Bulkhead("reacher", limit=2)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with bh.slot():
+            peak = max(peak, bh.in_flight)
+            await asyncio.sleep(0.05)
+
+    tasks = [asyncio.create_task(call()) for _ in range(6)]
+    await asyncio.sleep(0.01)
+    assert bh.queued == 4
+    await asyncio.gather(*tasks)
+    st = bh.stats()
+    assert peak == 2
+    assert st["acquired"] == 6 and st["in_flight"] == 0 and st["queued"] == 0
+    assert st["wait_max_ms"] >= 90
+
+
+@pytest.mark.asyncio
+async def test_limits_from_plan_and_resize():
+    from orchestrator.app.services import bulkhead as bulkheads
+    from orchestrator.app.services.plan import compile_plan
+
+    cfg = {
+        "plan": {"steps": [{"name": "enrich", "providers": ["reacher"], "reacher": {"parallel": 8}}]},
+        "guardrails": {"bulkheads": {"holehe": 2}},
+    }
+    assert dict(compile_plan(cfg).bulkheads) == {"reacher": 8, "holehe": 2}
+
+    bulkheads._registry.clear()
+    await bulkheads.configure(compile_plan(cfg))
+    assert bulkheads.get("reacher").limit == 8
+    cfg["plan"]["steps"][0]["reacher"]["parallel"] = 3
+    await bulkheads.configure(compile_plan(cfg))
+    assert bulkheads.get("reacher").limit == 3
+    assert set(bulkheads.stats()) == {"reacher"}
+    bulkheads._registry.clear()
+
+
+def test_bulkhead_works_across_event_loops():
+    from orchestrator.app.services.bulkhead import Bulkhead
+
+    bh = Bulkhead("reacher", limit=1)
+
+    async def run():
+        async def call():
+            async with bh.slot():
+                await asyncio.sleep(0.01)
+        await asyncio.gather(call(), call())
+
+    # e.g. one asyncio.run per Celery task
+    asyncio.run(run())
+    asyncio.run(run())
+    st = bh.stats()
+    assert st["acquired"] == 4 and st["in_flight"] == 0 and st["queued"] == 0
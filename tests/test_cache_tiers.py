@@ -0,0 +1,102 @@
+def test_l1_evicts_lru_within_namespace_budget_and_expires(monkeypatch):
+    from orchestrator.app.services import cache as cache_mod
+
+    now = [1000.0]
+    monkeypatch.setattr(cache_mod.time, "time", lambda: now[0])
+    l1 = cache_mod.LRUTier(max_items=100, budgets_mb={"serp": 300 / 2**20, "provider": 1})
+
+    for i in range(3):
+        l1.set(f"sx:q:{i}", {"page": i}, ttl=60, size=100)
+    l1.set("reacher:a@b.c", {"ok": True}, ttl=60, size=100)
+    assert l1.get("sx:q:0") == {"page": 0}  # now most recent in "serp"
+
+    l1.set("sx:q:3", {"page": 3}, ttl=60, size=100)  # over the serp budget: drops sx:q:1
+    assert l1.get("sx:q:1") is None
+    assert l1.get("sx:q:0") and l1.get("sx:q:3") and l1.get("reacher:a@b.c")
+
+    now[0] += 61
+    assert l1.get("sx:q:0") is None
+    s = l1.stats()
+    assert s["evictions"] == {"lru": 1, "ttl": 1}
+    assert s["hits"] == 4 and s["misses"] == 2
+    assert s["bytes"]["serp"]["used"] == 200
+
+
+def test_l1_sweeps_expired_entries_without_reads(monkeypatch):
+    from orchestrator.app.services import cache as cache_mod
+
+    now = [1000.0]
+    monkeypatch.setattr(cache_mod.time, "time", lambda: now[0])
+    monkeypatch.setattr(cache_mod, "L1_SWEEP_EVERY", 4)
+    l1 = cache_mod.LRUTier(max_items=100, budgets_mb={"provider": 1})
+    for i in range(3):
+        l1.set(f"reacher:{i}", i, ttl=10, size=100)
+    now[0] += 11
+    l1.set("reacher:fresh", "x", ttl=10, size=100)  # 4th set: sweep drops the three expired ones
+    s = l1.stats()
+    assert s["items"] == 1 and s["evictions"]["ttl"] == 3
+    assert s["bytes"]["provider"]["used"] == 100
+
+
+def test_l1_item_cap_and_cache_front(monkeypatch):
+    from orchestrator.app.services import cache as cache_mod
+
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    c = cache_mod.Cache(cache_mod.LRUTier(max_items=2))
+    c.set("g:q:1:10", {"items": [1]})
+    c.set("g:q:11:10", {"items": [2]})
+    c.set("g:q:21:10", {"items": [3]})
+    assert c.get("g:q:1:10") is None and c.get("g:q:21:10") == {"items": [3]}
+    assert c.stats()["l1"]["items"] == 2 and "redis" not in c.stats()
+
+
+def test_disk_tier_survives_restart_expires_and_compacts(tmp_path, monkeypatch):
+    from orchestrator.app.services import cache as cache_mod
+
+    path = str(tmp_path / "cache.sqlite3")
+    c = cache_mod.Cache(disk=cache_mod.DiskTier(path))
+    c.set("sx:john:1", {"results": [{"url": "https://a"}]}, ttl=60)
+    c.set("sx:john:2", {"results": []}, ttl=-1)  # already expired
+
+    # "restart": fresh process state, same file
+    again = cache_mod.Cache(disk=cache_mod.DiskTier(path))
+    assert again.get("sx:john:1") == {"results": [{"url": "https://a"}]}
+    assert again.get("sx:john:2") is None
+    assert again.stats()["disk"]["items"] == 1  # compacted at open
+
+    small = cache_mod.DiskTier(str(tmp_path / "small.sqlite3"), max_bytes=1000)
+    for i in range(10):
+        small.set_many({f"g:q:{i}": "x" * 190}, ttl=60)
+    small.get_many(["g:q:0"])  # touch the oldest so LRU keeps it
+    small.compact()
+    s = small.stats()
+    assert s["bytes"] <= 900 and s["evictions"] >= 6
+    assert small.get_many(["g:q:0"]) and not small.get_many(["g:q:1"])
+
+
+def test_cached_values_are_versioned_compressed_and_legacy_json_still_reads(tmp_path):
+    import json
+    from orchestrator.app.services import cache as cache_mod
+
+    page = {"results": [{"title": f"t{i}", "url": f"https://example.org/{i}", "content": "lorem " * 20} for i in range(30)]}
+    blob = cache_mod.encode(page)
+    assert blob[0] == cache_mod.FORMAT_VERSION and blob[1] & 0x01  # compressed above the threshold
+    assert len(blob) < len(json.dumps(page)) // 3
+    assert cache_mod.decode(blob) == page
+
+    small = cache_mod.encode({"items": []})
+    assert not small[1] & 0x01 and cache_mod.decode(small) == {"items": []}
+
+    assert cache_mod.decode(json.dumps(page)) == page  # written by older versions
+    assert cache_mod.decode(b"\x07\x00{}") is None  # unknown format version: a miss
+    assert cache_mod.decode(b"\x01\x80{}") is None  # unknown flag: a miss
+
+    if cache_mod.msgpack is not None:
+        assert blob[1] & 0x02 and cache_mod.decode(cache_mod.encode(page)) == page
+    else:  # JSON body; an entry written by a msgpack-enabled worker is a miss here
+        assert not blob[1] & 0x02 and cache_mod.decode(b"\x01\x02\x80") is None
+
+    disk = cache_mod.DiskTier(str(tmp_path / "c.sqlite3"))
+    disk._db.execute("INSERT INTO kv VALUES (?, ?, 9e12, 10, 0)", ("sx:old:1", json.dumps({"results": []})))
+    c = cache_mod.Cache(disk=disk)
+    assert c.get("sx:old:1") == {"results": []}
@@ -0,0 +1,76 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_retry_with_same_run_id_resumes_after_last_completed_step(tmp_path):
+    from orchestrator.app.services.checkpoint import Checkpoint, fingerprint
+    from orchestrator.app.services.kvstore import DiskStore
+    from orchestrator.app.services.scheduler import Step, run_dag
+
+    calls = {"search": 0, "enrich": 0, "export": 0}
+    fail_export = {"on": True}
+
+    async def search(ctx):
+        calls["search"] += 1
+        return {"urls": ["https://a"]}
+
+    async def enrich(ctx):
+        calls["enrich"] += 1
+        return {"emails": ["a@b.c"]}
+
+    async def export(ctx):
+        calls["export"] += 1
+        if fail_export["on"]:
+            raise RuntimeError("disk full")
+        return {"csv": f"{len(ctx['urls'])}-{len(ctx['emails'])}.csv"}
+
+    def steps():
+        return [
+            Step("search", search, provides=("urls",)),
+            Step("enrich", enrich, requires=("urls",), provides=("emails",)),
+            Step("export", export, requires=("urls", "emails"), provides=("csv",)),
+        ]
+
+    store = DiskStore(str(tmp_path))
+    payload = {"name": "John", "keywords": ["athens"]}
+
+    first = await run_dag(steps(), {}, checkpoint=Checkpoint("run1", fingerprint(payload), store=store))
+    assert first.steps["export"].status == "error"
+
+    fail_export["on"] = False
+    ctx = {}
+    second = await run_dag(steps(), ctx, checkpoint=Checkpoint("run1", fingerprint({**payload, "run_id": "run1"}), store=store))
+    assert {n: r.status for n, r in second.steps.items()} == {"search": "resumed", "enrich": "resumed", "export": "ok"}
+    assert calls == {"search": 1, "enrich": 1, "export": 2}
+    assert ctx["csv"] == "1-1.csv"
+
+    # a different request under the same id starts from scratch
+    other = await run_dag(steps(), {}, checkpoint=Checkpoint("run1", fingerprint({"name": "Jane"}), store=store))
+    assert other.steps["search"].status == "ok"
+    assert calls["search"] == 2
+
+
+@pytest.mark.asyncio
+async def test_degraded_outputs_are_not_checkpointed(tmp_path):
+    from orchestrator.app.services.checkpoint import Checkpoint
+    from orchestrator.app.services.kvstore import DiskStore
+    from orchestrator.app.services.scheduler import Step, run_dag
+
+    calls = {"discover": 0, "ingest": 0}
+
+    async def discover(ctx):
+        calls["discover"] += 1
+        return {}  # nothing found
+
+    async def ingest(ctx):
+        calls["ingest"] += 1
+        return {"ingested": None}  # upstream failure
+
+    def steps():
+        return [Step("discover", discover, provides=("urls",)), Step("ingest", ingest, provides=("ingested",))]
+
+    store = DiskStore(str(tmp_path))
+    await run_dag(steps(), {}, checkpoint=Checkpoint("run2", "fp", store=store))
+    second = await run_dag(steps(), {}, checkpoint=Checkpoint("run2", "fp", store=store))
+    assert {n: r.status for n, r in second.steps.items()} == {"discover": "ok", "ingest": "ok"}
+    assert calls == {"discover": 2, "ingest": 2}
@@ -0,0 +1,31 @@
+def test_delta_snapshot_filters_seen_entities_and_diffs(tmp_path):
+    from orchestrator.app.services.delta import DeltaState, diff, only_new, target_key
+    from orchestrator.app.services.kvstore import DiskStore
+
+    key = target_key("John  Doe", ["Athens", "lawyer"], None)
+    assert key == target_key("john doe", ["lawyer", "athens", ""], "")
+    assert target_key("John", target_id="case-7") == "case-7"
+
+    state = DeltaState(key, store=DiskStore(str(tmp_path)))
+    assert state.previous() is None
+
+    first = {"urls": ["https://a", "https://b"], "emails": ["j@d.gr"], "usernames": ["jdoe"], "phones": []}
+    state.save(first)
+    prev = DeltaState(key, store=DiskStore(str(tmp_path))).previous()
+    assert prev["urls"] == ["https://a", "https://b"] and prev["emails"] == ["j@d.gr"]
+
+    assert only_new(["jdoe", "johnd", "johnd"], prev["usernames"]) == ["johnd"]
+
+    second = {"urls": ["https://b", "https://c"], "emails": ["j@d.gr"], "usernames": ["jdoe", "johnd"], "phones": []}
+    d = diff(prev, second)
+    assert d["added"]["urls"] == ["https://c"] and d["added"]["usernames"] == ["johnd"]
+    assert d["removed"]["urls"] == ["https://a"] and d["removed"]["emails"] == []
+    assert d["counts"] == {"added": 2, "removed": 1}
+
+
+def test_snapshot_leaves_out_failed_items():
+    from orchestrator.app.services.delta import snapshot
+
+    found = {"urls": ["https://a", "https://b", "https://a"], "emails": ["j@d.gr", "x@d.gr"], "usernames": ["jdoe"]}
+    failed = {"urls": {"https://b"}, "emails": {"x@d.gr"}}
+    assert snapshot(found, failed) == {"urls": ["https://a"], "emails": ["j@d.gr"], "usernames": ["jdoe"], "phones": []}
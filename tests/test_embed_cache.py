@@ -0,0 +1,34 @@
+from orchestrator.embed_cache import EmbeddingCache
+
+
+def test_embed_cache_roundtrip_and_eviction(tmp_path):
+    # 3 vectors of 10 float32 fit in the budget, the 4th/5th force LRU eviction
+    c = EmbeddingCache(path=str(tmp_path / "emb.sqlite3"), max_bytes=3 * 10 * 4)
+    keys = [c.key("model", f"text {i}") for i in range(5)]
+    assert c.key("model", "x") != c.key("other-model", "x")
+    for k in keys:
+        c.put_many({k: [0.5] * 10})
+    found = c.get_many(keys)
+    assert keys[-1] in found and keys[0] not in found
+    assert found[keys[-1]] == [0.5] * 10
+    st = c.stats()
+    assert st["evictions"] >= 2
+    assert st["hits"]["disk"] == len(found) and st["misses"] == 5 - len(found)
+
+
+def test_embed_cache_tracks_size_across_replacements_and_reopen(tmp_path):
+    path = str(tmp_path / "emb.sqlite3")
+    c = EmbeddingCache(path=path, max_bytes=10 * 10 * 4)
+    keys = [c.key("model", f"text {i}") for i in range(4)]
+    c.put_many({k: [0.1] * 10 for k in keys})
+    c.put_many({keys[0]: [0.2] * 10})  # replacing a row must not grow the total
+    assert c._used == 4 * 10 * 4 and c.stats()["evictions"] == 0
+    c._db.close()
+
+    again = EmbeddingCache(path=path, max_bytes=3 * 10 * 4)
+    assert again._used == 4 * 10 * 4
+    again.put_many({again.key("model", "new"): [0.3] * 10})
+    st = again.stats()
+    # one batch eviction down to 90% of the budget (2 rows left of 5)
+    assert st["evictions"] == 3 and st["disk_entries"] == 2
+    assert again._used == 2 * 10 * 4
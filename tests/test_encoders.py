@@ -0,0 +1,37 @@
+from orchestrator import encoders
+
+
+class StubEncoder:
+    backend = "stub"
+
+    def __init__(self, vectors, dim=3, model_name="m"):
+        self.vectors = vectors
+        self.dim = dim
+        self.model_name = model_name
+
+    def encode(self, texts, batch_size=32):
+        return [self.vectors[t] for t in texts]
+
+
+def test_parity_check_passes_close_vectors_and_flags_drift():
+    texts = ["a", "b"]
+    ref = StubEncoder({"a": [1.0, 0.0, 0.0], "b": [0.0, 1.0, 0.0]})
+    close = StubEncoder({"a": [0.999, 0.01, 0.0], "b": [0.0, 1.0, 0.001]})
+    drifted = StubEncoder({"a": [1.0, 0.0, 0.0], "b": [1.0, 1.0, 0.0]})
+
+    ok = encoders.parity_check(close, reference=ref, texts=texts)
+    assert ok["ok"] and ok["min_cosine"] >= 0.99 and ok["backend"] == "stub"
+
+    bad = encoders.parity_check(drifted, reference=ref, texts=texts)
+    assert not bad["ok"] and bad["min_cosine"] < 0.8 and bad["mean_cosine"] > bad["min_cosine"]
+
+    wrong_dim = StubEncoder(close.vectors, dim=4)
+    assert not encoders.parity_check(wrong_dim, reference=ref, texts=texts)["ok"]
+
+
+def test_onnx_exports_are_keyed_by_model(monkeypatch):
+    monkeypatch.setattr(encoders, "ONNX_PATH", None)
+    monkeypatch.setattr(encoders, "ONNX_DIR", "/tmp/onnx")
+    a = encoders.onnx_path("sentence-transformers/all-MiniLM-L6-v2")
+    b = encoders.onnx_path("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+    assert a != b and a.startswith("/tmp/onnx/") and a.endswith(".onnx")
@@ -0,0 +1,45 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_clients_are_shared_per_upstream_and_closed_by_lifespan():
+    from orchestrator.app.services import http_pool
+
+    a = http_pool.client("searxng")
+    assert http_pool.client("searxng") is a
+    assert http_pool.client("google") is not a
+    assert http_pool.session("reacher") is http_pool.session("reacher")
+
+    await http_pool.aclose_all()
+    assert a.is_closed
+    assert http_pool.client("searxng") is not a
+    await http_pool.aclose_all()
+
+
+def test_each_event_loop_keeps_its_own_clients():
+    import asyncio
+    from orchestrator.app.services import http_pool
+
+    async def run(keep_open):
+        c = http_pool.client("fetch")
+        if not keep_open:
+            await http_pool.aclose_all()
+        return c
+
+    loop = asyncio.new_event_loop()
+    try:
+        first = loop.run_until_complete(run(keep_open=True))
+        second = asyncio.run(run(keep_open=False))
+        assert second is not first and second.is_closed
+        assert not first.is_closed  # not dropped by the other loop, still served on its own
+        assert loop.run_until_complete(run(keep_open=False)) is first and first.is_closed
+    finally:
+        loop.close()
+
+
+def test_flat_connectors_share_the_package_pool():
+    from orchestrator.app.services import http_pool
+    from orchestrator import phoneinfoga_connector, providers_min, social_connectors
+
+    for mod in (phoneinfoga_connector, providers_min, social_connectors):
+        assert mod.session is http_pool.session
@@ -0,0 +1,109 @@
+import json
+import orchestrator.opensearch_client as oc
+from orchestrator.hybrid_rrf import reciprocal_rank_fusion
+
+# Fixed fixture: what the index returns for the text query and for the query vector
+BM25_HITS = [{"_id": u, "_source": {"title": u}, "_score": s} for u, s in
+             [("https://a", 9.1), ("https://b", 7.4), ("https://c", 3.2), ("https://d", 1.0)]]
+KNN_HITS = [{"_id": u, "_source": {"title": u}, "_score": s} for u, s in
+            [("https://c", 0.93), ("https://e", 0.91), ("https://a", 0.88), ("https://f", 0.5)]]
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = 0
+
+    def _hits(self, body):
+        return BM25_HITS if "knn" not in body["query"] else KNN_HITS
+
+    def search(self, index=None, body=None, **kw):
+        self.calls += 1
+        return {"hits": {"hits": self._hits(body)}}
+
+    def msearch(self, body):
+        self.calls += 1
+        lines = [json.loads(l) for l in body.strip().split("\n")]
+        return {"responses": [{"hits": {"hits": self._hits(b)}} for b in lines[1::2]]}
+
+
+def _fused(bm, kn, k=10):
+    return reciprocal_rank_fusion([[d["url"] for d in bm], [d["url"] for d in kn]], k=k)
+
+
+def test_msearch_matches_sequential_rrf(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(oc, "client", lambda: fake)
+    vec = [0.1] * 4
+
+    seq = _fused(oc.bm25_search("john", size=4), oc.knn_search(vec, size=4))
+    assert fake.calls == 2
+
+    bm, kn = oc.hybrid_msearch("john", vec, size=4)
+    assert fake.calls == 3  # one round-trip for both sub-queries
+    assert _fused(bm, kn) == seq
+    assert seq[:2] == ["https://a", "https://c"]
+
+
+def test_msearch_retries_failed_or_missing_sub_query(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(oc, "client", lambda: fake)
+    fake.msearch = lambda body: {"responses": [{"error": {"type": "search_phase_execution_exception"}}]}
+
+    bm, kn = oc.hybrid_msearch("john", [0.1] * 4, size=4)
+    assert [d["url"] for d in bm] == [h["_id"] for h in BM25_HITS]
+    assert [d["url"] for d in kn] == [h["_id"] for h in KNN_HITS]
+    assert fake.calls == 2  # both halves re-run on their own
+
+
+class FakeIndices:
+    def __init__(self):
+        self.interval = "5s"
+        self.refreshes = 0
+
+    def get_settings(self, index, name):
+        return {index: {"settings": {"index": {"refresh_interval": self.interval}}}}
+
+    def put_settings(self, index, body):
+        self.interval = body["index"]["refresh_interval"]
+
+    def refresh(self, index):
+        self.refreshes += 1
+
+
+def test_overlapping_deferred_refresh_restores_interval_once(monkeypatch):
+    fake = FakeClient()
+    fake.indices = FakeIndices()
+    monkeypatch.setattr(oc, "client", lambda: fake)
+
+    a = oc.BulkIndexer(index="i", defer_refresh=True)
+    b = oc.BulkIndexer(index="i", defer_refresh=True)  # would have snapshotted "-1" on its own
+    assert fake.indices.interval == "-1"
+    a.close()
+    assert fake.indices.interval == "-1" and fake.indices.refreshes == 0
+    b.close()
+    b.close()
+    assert fake.indices.interval == "5s" and fake.indices.refreshes == 1
+
+
+def test_pipeline_rejected_by_older_cluster_is_remembered(monkeypatch):
+    from opensearchpy.exceptions import ConnectionError, RequestError
+
+    class Transport:
+        calls = 0
+        error = ConnectionError("N/A", "down", None)
+
+        def perform_request(self, method, url, body=None):
+            self.calls += 1
+            raise self.error
+
+    class PipelineClient:
+        transport = Transport()
+
+    fake = PipelineClient()
+    monkeypatch.setattr(oc, "client", lambda: fake)
+    monkeypatch.setattr(oc, "_pipeline_ready", None)
+
+    assert oc.ensure_hybrid_pipeline() is False and oc._pipeline_ready is None  # unreachable: retried
+    fake.transport.error = RequestError(400, "illegal_argument_exception", "unknown processor [score-ranker-processor]")
+    assert oc.ensure_hybrid_pipeline() is False
+    assert oc.ensure_hybrid_pipeline() is False and fake.transport.calls == 2
@@ -0,0 +1,175 @@
+import os
+import sys
+import time
+import types
+import pytest
+
+# scrape_embed/main use flat imports (orchestrator/ on sys.path, as in the container)
+ORCH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "orchestrator")
+if ORCH not in sys.path:
+    sys.path.insert(0, ORCH)
+
+
+class _NumberParseException(Exception):
+    pass
+
+
+# module-level imports of the legacy app that these tests never exercise
+STUBS = {
+    "trafilatura": {"fetch_url": lambda url: None, "extract": lambda *a, **k: ""},
+    "sentence_transformers": {"SentenceTransformer": object},
+    "phonenumbers": {"NumberParseException": _NumberParseException,
+                     "PhoneNumberFormat": types.SimpleNamespace(E164=0)},
+    "rapidfuzz": {"fuzz": types.SimpleNamespace(partial_ratio=lambda a, b: 0, token_set_ratio=lambda a, b: 0)},
+}
+
+
+@pytest.fixture(autouse=True)
+def heavy_imports(monkeypatch, tmp_path):
+    for name, attrs in STUBS.items():
+        mod = types.ModuleType(name)
+        mod.__dict__.update(attrs)
+        monkeypatch.setitem(sys.modules, name, mod)
+    monkeypatch.setenv("EXPORT_DIR", str(tmp_path))  # main mounts it as /exports at import
+
+
+@pytest.fixture
+def fake_fetch_and_encode(monkeypatch):
+    import scrape_embed
+
+    batches = []
+
+    def fetch_text(url):
+        if url.endswith("/bad"):
+            raise RuntimeError("404")
+        time.sleep(0.05 if url.endswith("/0") else 0.0)  # first URL finishes last
+        return "" if url.endswith("/empty") else f"text of {url}"
+
+    def embed_texts(texts, batch_size=32):
+        batches.append(list(texts))
+        if any("boom" in t for t in texts):
+            raise RuntimeError("encoder crashed")
+        return [[float(len(t))] for t in texts]
+
+    monkeypatch.setattr(scrape_embed, "fetch_text", fetch_text)
+    monkeypatch.setattr(scrape_embed, "embed_texts", embed_texts)
+    return scrape_embed, batches
+
+
+def test_fetch_and_embed_many_keeps_input_order_and_per_url_errors(fake_fetch_and_encode):
+    scrape_embed, batches = fake_fetch_and_encode
+    urls = ["https://e/0", "https://e/bad", "https://e/2", "https://e/empty", "https://e/4"]
+
+    out = scrape_embed.fetch_and_embed_many(urls, concurrency=4, batch_size=2)
+
+    assert len(out) == len(urls)
+    assert out[0]["content"] == "text of https://e/0" and out[0]["vector"] == [float(len("text of https://e/0"))]
+    assert out[1] == {"error": "404"}
+    assert out[2]["content"] == "text of https://e/2"
+    assert out[3]["content"] == "" and out[3]["vector"] == [float(len("https://e/empty"))]  # falls back to the URL
+    assert all(len(b) <= 2 for b in batches) and sum(map(len, batches)) == 4
+
+
+def test_fetch_and_embed_many_maps_encode_failure_to_its_batch(fake_fetch_and_encode):
+    scrape_embed, _ = fake_fetch_and_encode
+    out = scrape_embed.fetch_and_embed_many(["https://e/boom", "https://e/ok"], concurrency=1, batch_size=1)
+    assert out[0] == {"error": "encoder crashed"}
+    assert out[1]["content"] == "text of https://e/ok"
+
+
+def test_ingest_pipelined_maps_fetch_and_bulk_failures(monkeypatch):
+    import main
+
+    embedded = {
+        "https://e/1": {"content": "one", "vector": [1.0]},
+        "https://e/2": {"error": "timeout"},
+        "https://e/3": {"content": "three!", "vector": [3.0]},
+    }
+    indexed = []
+
+    def index_docs(docs):
+        indexed.extend(docs)
+        return {"https://e/3": "mapper_parsing_exception"}
+
+    monkeypatch.setattr(main, "fetch_and_embed_many", lambda urls: [embedded[u] for u in urls])
+    monkeypatch.setattr(main, "index_docs", index_docs)
+    req = main.IngestReq(urls=list(embedded), source="test")
+
+    res = main._ingest_pipelined(req)["ingested"]
+    assert [r["url"] for r in res] == list(embedded)
+    assert res[0] == {"url": "https://e/1", "status": "ok", "chars": 3}
+    assert res[1]["status"] == "error:timeout"
+    assert res[2]["status"] == "error:mapper_parsing_exception"
+    assert [d["url"] for d in indexed] == ["https://e/1", "https://e/3"]
+    assert indexed[0]["source"] == "test"
+
+    def bulk_down(docs):
+        raise ConnectionError("opensearch down")
+
+    monkeypatch.setattr(main, "index_docs", bulk_down)
+    res = main._ingest_pipelined(req)["ingested"]
+    assert [r["status"] for r in res] == ["error:opensearch down", "error:timeout", "error:opensearch down"]
+
+
+def test_csv_export_is_chunked_and_gzip_round_trips():
+    import csv, gzip, io
+    import main
+
+    rows = [{c: f"{c}{i}" for c in main.EXPORT_COLUMNS} for i in range(7)]
+    plain = list(main._csv_chunks(iter(rows), False, rows_per_chunk=3))
+    assert len(plain) == 3  # 3 + 3 + the remaining row (header goes with the first)
+    packed = b"".join(main._csv_chunks(iter(rows), True, rows_per_chunk=3))
+    assert gzip.decompress(packed) == b"".join(plain)
+    back = list(csv.DictReader(io.StringIO(b"".join(plain).decode("utf-8"))))
+    assert back == rows
+
+
+def test_compact_doc_replaces_content_with_highlights():
+    import main
+
+    req = main.HybridReq(query="john", compact=True, highlight=True)
+    shape = main._search_shape(req)
+    assert shape["source_includes"] == main.COMPACT_FIELDS and shape["source_excludes"] == ["vector"]
+    assert main._search_shape(main.HybridReq(query="john")) == {}
+    d = main._compact_doc({"url": "https://a", "content": "long", "highlight": ["<em>john</em> a", "b"]})
+    assert d == {"url": "https://a", "content": "<em>john</em> a … b"}
+
+
+def test_delta_leaves_urls_past_ingest_limit_for_the_next_run(monkeypatch):
+    import asyncio
+    import main
+
+    urls = [f"https://e/{i}" for i in range(5)]
+    monkeypatch.setattr(main, "search_hybrid", lambda req: {"results": [{"url": u} for u in urls]})
+    monkeypatch.setattr(main, "existing_ids", lambda ids: set())
+    monkeypatch.setattr(main, "ingest_urls", lambda req: {"ingested": [{"url": u, "status": "ok"} for u in req.urls]})
+    req = main.OrchestrateRequest(name="x", ingest_limit=2, delta=True)
+
+    def run(prev):
+        steps = {s.name: s for s in main._orchestrate_steps(req, None, main.Plan(), prev)}
+        ctx = {"urls_initial": [], "usernames_found": [], "emails_found": [], "phones_considered": []}
+
+        async def go():
+            ctx.update(await steps["hybrid_search"].fn(ctx))
+            ctx.update(await steps["ingest"].fn(ctx))
+        asyncio.run(go())
+        return ctx
+
+    ctx = run({})
+    assert ctx["novel_urls"] == urls[:2] and ctx["novel_deferred"] == urls[2:]
+    snap = main._delta_snapshot(ctx)
+    assert snap["urls"] == urls[:2]
+    assert run(snap)["novel_urls"] == urls[2:4]
+
+
+def test_pipeline_mode_falls_back_to_msearch_without_the_rrf_pipeline(monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "create_index_if_not_exists", lambda: None)
+    monkeypatch.setattr(main, "encode_query", lambda q: [0.0])
+    monkeypatch.setattr(main, "ensure_hybrid_pipeline", lambda: False)
+    monkeypatch.setattr(main, "hybrid_pipeline_search", lambda *a, **k: pytest.fail("pipeline used"))
+    monkeypatch.setattr(main, "hybrid_msearch", lambda q, v, size, **shape: ([{"url": "https://a"}], [{"url": "https://b"}]))
+
+    out = main.search_hybrid(main.HybridReq(query="john", mode="pipeline"))
+    assert sorted(d["url"] for d in out["results"]) == ["https://a", "https://b"]
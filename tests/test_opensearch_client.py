@@ -0,0 +1,110 @@
+import json
+import pytest
+import orchestrator.opensearch_client as oc
+
+
+def test_sync_client_is_shared_until_closed(monkeypatch):
+    monkeypatch.setattr(oc, "_client", None)
+    c = oc.client()
+    assert oc.client() is c
+    oc.close_client()
+    assert oc._client is None and oc.client() is not c
+    oc.close_client()
+
+
+@pytest.mark.asyncio
+async def test_async_client_is_opened_once_and_closed(monkeypatch):
+    from orchestrator.app.services import opensearch_client as aoc
+    if aoc.AsyncOpenSearch is None:
+        pytest.skip("opensearch-py[async] not installed")
+
+    monkeypatch.setattr(aoc, "_clients", type(aoc._clients)())
+    await aoc.init_client()
+    c = aoc.get_client()
+    assert aoc.get_client() is c
+    await aoc.close_client()
+    assert not aoc._clients and aoc.get_client() is not c
+    await aoc.close_client()
+
+
+def test_async_client_is_per_event_loop(monkeypatch):
+    import asyncio
+    from orchestrator.app.services import opensearch_client as aoc
+    if aoc.AsyncOpenSearch is None:
+        pytest.skip("opensearch-py[async] not installed")
+
+    monkeypatch.setattr(aoc, "_clients", type(aoc._clients)())
+    seen = []
+
+    async def task():
+        c = aoc.get_client()
+        assert aoc.get_client() is c
+        seen.append(c)
+        await aoc.close_client()
+
+    asyncio.run(task())
+    asyncio.run(task())  # the next Celery task's loop must not get the first (closed) loop's client
+    assert seen[0] is not seen[1] and not aoc._clients
+
+
+class PagingClient:
+    """Index of `n` docs served page by page with search_after, optionally inside a PIT."""
+
+    def __init__(self, n, pit=True):
+        self.docs = [{"_id": f"https://e/{i:03d}", "_source": {"url": f"https://e/{i:03d}", "title": f"t{i}"},
+                      "_score": 1.0, "sort": [f"https://e/{i:03d}"]} for i in range(n)]
+        self.pit = pit
+        self.bodies = []
+        self.deleted = []
+        self.indices = self
+
+    def exists(self, index):
+        return True
+
+    def create_pit(self, index, params):
+        if not self.pit:
+            raise RuntimeError("no PIT support")
+        return {"pit_id": "p1"}
+
+    def delete_pit(self, body):
+        self.deleted.extend(body["pit_id"])
+
+    def search(self, index=None, body=None, **kw):
+        self.bodies.append(json.loads(json.dumps(body)))
+        after = (body.get("search_after") or [""])[0]
+        hits = [d for d in self.docs if d["sort"][0] > after][:body["size"]]
+        return {"hits": {"hits": hits}, **({"pit_id": "p1"} if self.pit else {})}
+
+
+def test_iter_docs_pages_with_search_after_inside_a_pit(monkeypatch):
+    fake = PagingClient(5)
+    monkeypatch.setattr(oc, "client", lambda: fake)
+
+    got = list(oc.iter_docs(["url", "title"], page_size=2))
+    assert [d["url"] for d in got] == [f"https://e/{i:03d}" for i in range(5)]
+    assert len(fake.bodies) == 4  # 2 + 2 + 1 + the empty page
+    assert all(b["_source"] == {"includes": ["url", "title"]} and b["pit"]["id"] == "p1" for b in fake.bodies)
+    assert fake.bodies[1]["search_after"] == ["https://e/001"]
+    assert fake.deleted == ["p1"]
+
+
+def test_iter_docs_limit_and_plain_search_after_without_pit(monkeypatch):
+    fake = PagingClient(5, pit=False)
+    monkeypatch.setattr(oc, "client", lambda: fake)
+
+    got = list(oc.iter_docs(["url"], page_size=2, limit=3))
+    assert [d["url"] for d in got] == ["https://e/000", "https://e/001", "https://e/002"]
+    assert [b["size"] for b in fake.bodies] == [2, 1]
+    assert all("pit" not in b for b in fake.bodies) and fake.deleted == []
+
+
+def test_search_bodies_filter_source_and_highlight():
+    body = oc.bm25_body("john", size=5, source_includes=["url", "title"], source_excludes=["vector"],
+                        highlight_query="john")
+    assert body["_source"] == {"includes": ["url", "title"], "excludes": ["vector"]}
+    assert body["highlight"]["highlight_query"] == {"match": {"content": "john"}}
+    assert "_source" not in oc.knn_body([0.1], size=5) and "highlight" not in oc.bm25_body("john")
+
+    doc = oc._to_doc({"_id": "https://a", "_source": {"title": "A"}, "_score": 2.0,
+                      "highlight": {"content": ["<em>john</em>"]}})
+    assert doc == {"url": "https://a", "title": "A", "_score": 2.0, "highlight": ["<em>john</em>"]}
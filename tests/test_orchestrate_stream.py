@@ -0,0 +1,59 @@
+import json
+import pytest
+from httpx import AsyncClient, ASGITransport
+from orchestrator.app.main import app
+
+
+def _fake_pipeline(monkeypatch, tmp_path):
+    from orchestrator.app import routes
+    from orchestrator.app.services import checkpoint
+    from orchestrator.app.services import fallback as fb
+    from orchestrator.app.services.kvstore import DiskStore
+    from orchestrator.app.services.plan import Plan
+
+    async def web_search(cfg, payload):
+        return [{"url": "https://a"}, {"url": "https://b"}]
+
+    async def ingest_urls(urls, text=None):
+        return {"count": len(urls)}
+
+    async def run_hybrid(cfg, payload):
+        return [{"url": "https://a", "title": "A"}]
+
+    async def discover_media(cfg, payload):
+        return [{"url": "https://a/img.png", "type": "image"}]
+
+    monkeypatch.setattr(routes, "load_cfg", lambda: Plan())
+    monkeypatch.setattr(checkpoint, "get_store", lambda _dir: DiskStore(str(tmp_path)))
+    monkeypatch.setattr(fb, "web_search", web_search)
+    monkeypatch.setattr(fb, "ingest_urls", ingest_urls)
+    monkeypatch.setattr(fb, "run_hybrid", run_hybrid)
+    monkeypatch.setattr(fb, "discover_media", discover_media)
+    monkeypatch.setattr(fb, "_export", lambda cfg, payload, results: {"csv": "run.csv", "json": "run.json"})
+
+
+@pytest.mark.asyncio
+async def test_orchestrate_ndjson_streams_steps_then_summary(monkeypatch, tmp_path):
+    _fake_pipeline(monkeypatch, tmp_path)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        r = await ac.post("/orchestrate", json={"name": "John", "stream": "ndjson"})
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("application/x-ndjson")
+        events = [json.loads(line) for line in r.text.splitlines() if line]
+        steps = [e["data"]["name"] for e in events if e["event"] == "step"]
+        assert set(steps) == {"auto_discovery", "ingest", "hybrid_search", "media_discovery", "export"}
+        assert steps.index("auto_discovery") < steps.index("ingest") < steps.index("hybrid_search") < steps.index("export")
+        assert events[-1]["event"] == "summary"
+        assert events[-1]["data"]["mode"] == "fallback_hybrid"
+        assert events[-1]["data"]["summary"]["results"] == 2
+
+
+@pytest.mark.asyncio
+async def test_orchestrate_sse_via_accept_header(monkeypatch, tmp_path):
+    _fake_pipeline(monkeypatch, tmp_path)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        r = await ac.post("/orchestrate", json={"name": "John"}, headers={"Accept": "text/event-stream"})
+        assert r.headers["content-type"].startswith("text/event-stream")
+        frames = [f for f in r.text.split("\n\n") if f.strip()]
+        assert frames[0].startswith("event: step\ndata: ")
+        assert frames[-1].startswith("event: summary\ndata: ")
@@ -0,0 +1,63 @@
+import os
+import pytest
+
+
+def test_shipped_plan_compiles_with_steps_by_name(monkeypatch):
+    from orchestrator.app.services.plan import read_plan
+
+    monkeypatch.setenv("SEARXNG_URL", "http://searx:8080")
+    root = os.path.dirname(os.path.dirname(__file__))
+    plan = read_plan(os.path.join(root, "config", "orchestrator.fallback.yaml"))
+    assert plan.step("hybrid_search").get("engines")["opensearch"]["k"] == 50
+    assert plan.step("media_discovery").get("images")["searxng_url"] == "http://searx:8080"
+    assert plan.global_s == 120 and plan.max_parallel_steps == 4
+    assert plan.step("missing") is None
+
+
+def test_invalid_plan_names_the_key():
+    from orchestrator.app.services.plan import PlanError, compile_plan
+
+    with pytest.raises(PlanError, match=r"plan.steps\[ingest\].timeout_s"):
+        compile_plan({"plan": {"steps": [{"name": "ingest", "timeout_s": "soon"}]}})
+    with pytest.raises(PlanError, match="duplicate"):
+        compile_plan({"plan": {"steps": [{"name": "a"}, {"name": "a"}]}})
+    with pytest.raises(PlanError, match="guardrails.limits.max_parallel_steps"):
+        compile_plan({"guardrails": {"limits": {"max_parallel_steps": 0}}})
+
+
+def test_plan_is_cached_and_reloaded_on_change(tmp_path, monkeypatch):
+    from orchestrator.app.services import plan as plan_mod
+
+    p = tmp_path / "plan.yaml"
+    p.write_text("guardrails:\n  timeouts:\n    global_s: ${GLOBAL_S}\n")
+    monkeypatch.setenv("GLOBAL_S", "30")
+    first = plan_mod.load_plan(str(p))
+    assert first.global_s == 30.0
+    assert plan_mod.load_plan(str(p)) is first
+
+    p.write_text("guardrails:\n  timeouts:\n    global_s: 60\n")
+    os.utime(p, ns=(0, 10**18))
+    second = plan_mod.load_plan(str(p))
+    assert second.global_s == 60.0
+
+    # a broken edit is reported and the last good plan keeps serving
+    p.write_text("guardrails:\n  timeouts:\n    global_s: never\n")
+    os.utime(p, ns=(0, 2 * 10**18))
+    assert plan_mod.load_plan(str(p)) is second
+
+
+def test_plan_exposes_typed_limits_and_read_only_steps():
+    from orchestrator.app.services.plan import compile_plan, step_cfg
+
+    plan = compile_plan({
+        "fallback": {"enabled": "false", "ingest_limit": 3},
+        "plan": {"steps": [{"name": "enrich", "retries": 2, "providers": ["reacher"], "reacher": {"parallel": 4}}]},
+        "guardrails": {"timeouts": {"batch_s": 300}, "bulkheads": {"holehe": 2}},
+    })
+    assert plan.fallback_enabled is False and plan.ingest_limit == 3 and plan.search_limit == 10
+    assert plan.batch_s == 300 and plan.max_parallel_steps is None
+    assert dict(plan.bulkheads) == {"reacher": 4, "holehe": 2}
+    assert plan.step("enrich").retries == 2
+    with pytest.raises(TypeError):
+        step_cfg(plan, "enrich")["retries"] = 5
+    assert step_cfg(plan, "missing") == {}
@@ -0,0 +1,110 @@
+import asyncio, time
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_independent_steps_overlap_and_dependents_wait():
+    from orchestrator.app.services.scheduler import Step, run_dag
+
+    async def slow(key):
+        async def fn(ctx):
+            await asyncio.sleep(0.2)
+            return {key: True}
+        return fn
+
+    async def join(ctx):
+        return {"done": ctx["a"] and ctx["b"]}
+
+    steps = [
+        Step("a", await slow("a"), provides=("a",)),
+        Step("b", await slow("b"), provides=("b",)),
+        Step("join", join, requires=("a", "b"), provides=("done",)),
+    ]
+    ctx = {}
+    t0 = time.perf_counter()
+    report = await run_dag(steps, ctx, concurrency=4)
+    assert time.perf_counter() - t0 < 0.35  # a and b ran together
+    assert ctx["done"] is True
+    assert [r.status for r in report.steps.values()] == ["ok", "ok", "ok"]
+    assert report.steps["join"].started_s >= 0.2
+
+
+@pytest.mark.asyncio
+async def test_failure_skips_dependents_and_retries_from_plan():
+    from orchestrator.app.services.plan import compile_plan
+    from orchestrator.app.services.scheduler import Step, apply_plan, run_dag
+
+    calls = {"flaky": 0}
+
+    async def flaky(ctx):
+        calls["flaky"] += 1
+        if calls["flaky"] == 1:
+            raise RuntimeError("boom")
+        return {"x": 1}
+
+    async def broken(ctx):
+        raise ValueError("nope")
+
+    async def after(ctx):
+        return {"z": 1}
+
+    cfg = compile_plan({"plan": {"steps": [{"name": "flaky", "retries": 1}, {"name": "off", "enabled": False}]}})
+    steps = apply_plan([
+        Step("flaky", flaky, provides=("x",)),
+        Step("broken", broken, provides=("y",)),
+        Step("after", after, requires=("y",), provides=("z",)),
+        Step("off", after, provides=("w",)),
+    ], cfg)
+    ctx = {}
+    report = await run_dag(steps, ctx)
+    st = {n: r.status for n, r in report.steps.items()}
+    assert st == {"flaky": "ok", "broken": "error", "after": "skipped", "off": "disabled"}
+    assert report.steps["flaky"].attempts == 2
+    assert ctx == {"x": 1}
+
+
+@pytest.mark.asyncio
+async def test_step_timeout_from_guardrails():
+    from orchestrator.app.services.plan import compile_plan
+    from orchestrator.app.services.scheduler import Step, apply_plan, run_dag
+
+    async def hang(ctx):
+        await asyncio.sleep(5)
+
+    steps = apply_plan([Step("hang", hang)], compile_plan({"guardrails": {"timeouts": {"per_step_s": 0.05}}}))
+    report = await run_dag(steps, {})
+    assert report.steps["hang"].status == "timeout"
+
+
+@pytest.mark.asyncio
+async def test_global_deadline_cuts_off_slow_steps_and_keeps_finished_ones():
+    from orchestrator.app.services.plan import compile_plan
+    from orchestrator.app.services.scheduler import Step, apply_plan, plan_deadline, remaining, run_dag
+
+    budgets = {}
+
+    async def fast(ctx):
+        return {"a": 1}
+
+    async def slow(ctx):
+        budgets["slow"] = remaining(45)
+        await asyncio.sleep(5)
+        return {"b": 1}
+
+    async def after(ctx):
+        return {"c": 1}
+
+    cfg = compile_plan({"guardrails": {"timeouts": {"per_step_s": 45, "global_s": 0.1}}})
+    steps = apply_plan([
+        Step("fast", fast, provides=("a",)),
+        Step("slow", slow, provides=("b",)),
+        Step("after", after, requires=("b",), provides=("c",)),
+    ], cfg)
+    ctx = {}
+    report = await run_dag(steps, ctx, deadline_s=plan_deadline(cfg))
+    assert ctx == {"a": 1}
+    assert {n: r.status for n, r in report.steps.items()} == {"fast": "ok", "slow": "cut_off", "after": "cut_off"}
+    assert budgets["slow"] <= 0.1
+    assert report.as_dict()["cut_off"] == ["slow", "after"]
+    assert report.total_s < 1
+    assert remaining(7) == 7  # outside a run the default comes back unchanged
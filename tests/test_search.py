@@ -24,3 +24,14 @@ async def test_search_paginates_and_rrf(monkeypatch):
             assert r.status_code == 200
             assert j["count"] >= 2
             assert all("rrf" in x for x in j["results"])
+
+
+@pytest.mark.asyncio
+async def test_ready_flips_after_startup():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        assert (await ac.get("/ready")).status_code == 503
+        async with app.router.lifespan_context(app):
+            r = await ac.get("/ready")
+            assert r.status_code == 200 and r.json()["ready"] is True
+        assert (await ac.get("/ready")).status_code == 503
@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+import respx
+import httpx
+
+SEARX = "http://searx.test/search"
+GOOGLE = "https://customsearch.googleapis.com/customsearch/v1"
+
+
+@pytest.mark.asyncio
+async def test_searxng_pages_run_concurrently_and_keep_rank_order(monkeypatch):
+    from orchestrator.app.connectors import searxng
+    from orchestrator.app.services.cache import AsyncCache, Cache
+
+    monkeypatch.setenv("SEARXNG_BASE_URL", "http://searx.test")
+    monkeypatch.setattr(searxng, "acache", AsyncCache(Cache()))
+    in_flight, peak, asked = [0], [0], []
+
+    async def page(request):
+        n = int(request.url.params["pageno"])
+        asked.append(n)
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0.05 if n == 1 else 0.01)  # first page answers last
+        in_flight[0] -= 1
+        items = [] if n == 4 else [{"title": f"p{n}-{i}", "url": f"https://r/{n}/{i}"} for i in range(10)]
+        return httpx.Response(200, json={"results": items})
+
+    with respx.mock() as mock:
+        mock.get(SEARX).mock(side_effect=page)
+        res = await searxng.search_searxng("john", 60, max_pages=10, page_concurrency=4)
+
+    assert peak[0] == 4
+    assert [r["engine_rank"] for r in res] == list(range(1, 31))
+    assert res[0]["url"] == "https://r/1/0" and res[-1]["url"] == "https://r/3/9"
+    assert max(asked) <= 5  # stops issuing pages after the empty page 4
+
+    # fetched pages were written back: a repeat query is served from the cache
+    with respx.mock(assert_all_called=False) as mock:
+        route = mock.get(SEARX).mock(side_effect=page)
+        again = await searxng.search_searxng("john", 60, max_pages=10, page_concurrency=4)
+    assert again == res and route.call_count == 0
+
+
+@pytest.mark.asyncio
+async def test_google_cse_fetches_all_pages_at_once_and_stops_on_short_page(monkeypatch):
+    from orchestrator.app.connectors import google_cse
+    from orchestrator.app.services.cache import AsyncCache, Cache
+
+    monkeypatch.setenv("GOOGLE_CSE_API_KEY", "k")
+    monkeypatch.setenv("GOOGLE_CSE_CX", "cx")
+    monkeypatch.setattr(google_cse, "acache", AsyncCache(Cache()))
+
+    def page(request):
+        start = int(request.url.params["start"])
+        count = 4 if start == 21 else int(request.url.params["num"])
+        return httpx.Response(200, json={"items": [{"title": "t", "link": f"https://g/{start + i}"} for i in range(count)]})
+
+    with respx.mock() as mock:
+        route = mock.get(GOOGLE).mock(side_effect=page)
+        res = await google_cse.search_google_cse("john", 50)
+
+    assert [r["engine_rank"] for r in res] == list(range(1, 25))
+    assert [r["url"] for r in res][-1] == "https://g/24"
+    assert route.call_count <= 5
+
+
+@pytest.mark.asyncio
+async def test_errors_of_pages_past_the_end_are_ignored():
+    from orchestrator.app.connectors.paging import fetch_pages
+
+    cancelled = []
+
+    async def fetch(i):
+        try:
+            await asyncio.sleep({0: 0.03, 1: 0.01, 2: 0.0}.get(i, 0.2))  # page 2 fails first
+        except asyncio.CancelledError:
+            cancelled.append(i)
+            raise
+        if i == 2:
+            raise RuntimeError("page 3 is past the end")
+        return [{"i": i}] * (3 if i == 1 else 10)  # page 1 is short: nothing follows
+
+    pages = await fetch_pages(fetch, pages=6, need=100, concurrency=6, last_page=lambda i, items: len(items) < 10)
+    assert [p[0]["i"] for p in pages] == [0, 1]
+    assert sorted(cancelled) == [3, 4, 5]
+
+    async def failing(i):
+        if i == 0:
+            raise RuntimeError("first page failed")
+        return [{"i": i}] * 10
+
+    with pytest.raises(RuntimeError, match="first page failed"):
+        await fetch_pages(failing, pages=3, need=100, concurrency=3)
@@ -0,0 +1,119 @@
+import asyncio
+import sys
+import pytest
+
+pytest.importorskip("celery")
+
+
+@pytest.fixture
+def eager(monkeypatch):
+    from orchestrator.celery_app import celery_app
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    return celery_app
+
+
+def test_username_scan_fans_out_per_tool(eager, monkeypatch):
+    from orchestrator import tasks
+
+    monkeypatch.setitem(tasks.SCANNERS, "social_analyzer", lambda u: {"tool": "social-analyzer", "json": {"u": u}})
+    monkeypatch.setitem(tasks.SCANNERS, "maigret", lambda u: {"tool": "maigret", "hits": [{"site": "x"}]})
+
+    job = tasks.submit_username_scan("jdoe")
+    assert job["tasks"] == 2
+    status = tasks.job_status(job["job_id"])
+    assert status["state"] == "SUCCESS" and status["completed"] == 2
+    by_tool = {list(t["result"]["tools"])[0]: t["result"] for t in status["tasks"]}
+    assert by_tool["maigret"]["sources_found"] == 1
+    assert "social_analyzer" in by_tool
+
+
+def test_ingest_is_chunked_and_partial_failures_reported(eager, monkeypatch):
+    from orchestrator import tasks
+
+    class FakeScrape:
+        @staticmethod
+        def fetch_and_embed_many(urls):
+            return [{"error": "boom"} if u.endswith("bad") else {"content": u, "vector": [0.0]} for u in urls]
+
+    class FakeOS:
+        indexed = []
+
+        @staticmethod
+        def create_index_if_not_exists():
+            pass
+
+        @classmethod
+        def index_docs(cls, docs):
+            cls.indexed.extend(d["url"] for d in docs)
+            return {}
+
+    import orchestrator
+    for name, fake in (("scrape_embed", FakeScrape), ("opensearch_client", FakeOS)):
+        monkeypatch.setitem(sys.modules, f"orchestrator.{name}", fake)
+        monkeypatch.setattr(orchestrator, name, fake, raising=False)
+    urls = [f"https://e/{i}" for i in range(5)] + ["https://e/bad"]
+    job = tasks.submit_ingest(urls, chunk_size=2)
+    assert job["tasks"] == 3
+    status = tasks.job_status(job["job_id"])
+    assert status["state"] == "SUCCESS" and status["total"] == 3
+    ok = sum(t["result"]["ok"] for t in status["tasks"])
+    errors = {u for t in status["tasks"] for u in t["result"]["errors"]}
+    assert ok == 5 and errors == {"https://e/bad"}
+    assert len(FakeOS.indexed) == 5
+
+
+def test_unknown_tools_are_rejected_and_eager_jobs_are_capped(eager, monkeypatch):
+    from orchestrator import tasks
+
+    with pytest.raises(ValueError, match="Unknown tools: sherlock"):
+        tasks.submit_username_scan("jdoe", ["maigret", "sherlock"])
+
+    monkeypatch.setitem(tasks.SCANNERS, "maigret", lambda u: {"tool": "maigret", "hits": []})
+    monkeypatch.setattr(tasks, "EAGER_JOBS_MAX", 2)
+    monkeypatch.setattr(tasks, "_eager_jobs", type(tasks._eager_jobs)())
+    ids = [tasks.submit_username_scan("jdoe", ["maigret"])["job_id"] for _ in range(3)]
+    assert list(tasks._eager_jobs) == ids[1:]  # oldest dropped
+
+
+def test_maigret_scans_get_an_opensearch_client_per_task(eager, monkeypatch):
+    from orchestrator import tasks
+    from orchestrator.app.services import opensearch_client as aoc
+
+    class FakeProc:
+        returncode = 0
+
+        async def communicate(self):
+            return b'{"site": "GitHub", "url_user": "https://github.com/jdoe", "status": "FOUND"}', b""
+
+    class FakeOpenSearch:
+        made = []
+
+        def __init__(self, **kw):
+            self.loop = asyncio.get_running_loop()
+            self.indices = self
+            self.checked = 0
+            self.closed = False
+            self.made.append(self)
+
+        async def exists(self, index):
+            if asyncio.get_running_loop() is self.loop and not self.closed:  # a foreign loop would fail here
+                self.checked += 1
+            return True
+
+        async def close(self):
+            self.closed = True
+
+    async def fake_exec(*a, **k):
+        return FakeProc()
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_exec)
+    monkeypatch.setattr(aoc, "AsyncOpenSearch", FakeOpenSearch)
+    monkeypatch.setattr(aoc, "_clients", type(aoc._clients)())
+
+    for _ in range(2):  # back to back, each in its own asyncio.run
+        job = tasks.submit_username_scan("jdoe", ["maigret"])
+        status = tasks.job_status(job["job_id"])
+        assert status["tasks"][0]["result"]["sources_found"] == 1
+    assert len(FakeOpenSearch.made) == 2
+    assert all(c.checked == 2 and c.closed for c in FakeOpenSearch.made)
+    assert not aoc._clients